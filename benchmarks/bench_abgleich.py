@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Soll/Ist-Abgleich (Zeilen-Schleife vs. spaltenweiser Join)
+Erzeugt eine synthetische Arbeitstabelle (Rollen + Granulate) und Scans mit fehlenden, zusätzlichen
+und abweichenden Chargen. Vergleicht eine Schleife über alle Zeilen mit abgleich_berechnen.
+
+Gemessen (Median aus 3 Läufen, pandas 3.0, Schleife / spaltenweise):
+  ohne pyarrow:  3.000 Zeilen 18 / 56 ms, 20.000 Zeilen 100 / 147 ms, 100.000 Zeilen 531 / 612 ms
+  mit pyarrow:   3.000 Zeilen 26 / 91 ms, 20.000 Zeilen 163 / 194 ms, 100.000 Zeilen 610 / 574 ms
+Der spaltenweise Abgleich ist also erst ab etwa 100.000 Zeilen und mit pyarrow gleich schnell (1.1x);
+die Zeit steckt im Aufbau der DataFrames aus den Einträgen, nicht in der Zuordnung selbst.
+
+Aufruf: python benchmarks/bench_abgleich.py [--zeilen 100000] [--anteil-gescannt 0.8]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import (SPALTEN_GRANULATE, SPALTEN_ROLLEN, GranulatEintrag, RollenEintrag,  # noqa: E402
+                             StammdatenBlatt, abgleich_berechnen, charge_schluessel)
+
+
+def erzeuge_daten(anzahl, anteil_gescannt, seed=1):
+    """Arbeitstabelle (je Hälfte Rollen/Granulate) und passende Scans mit Abweichungen"""
+    zufall = random.Random(seed)
+    rollen = StammdatenBlatt(SPALTEN_ROLLEN)
+    granulate = StammdatenBlatt(SPALTEN_GRANULATE)
+    eintraege = []
+
+    for i in range(anzahl // 2):
+        charge = f"{4300000000 + i}"
+        breite = 1000 + i % 7 * 100
+        rollen.zeilen.append((charge, 17000000 + i % 500, f"Band Typ {i % 500}", 100.0, breite, 150.0, f"A{i % 40:02d}"))
+        if zufall.random() < anteil_gescannt:
+            eintraege.append(RollenEintrag(charge='0' + charge if i % 10 == 0 else charge, status='gefunden',
+                                           breite_original=breite, fach_kontrolliert='A01',
+                                           breite_kontrolliert=breite + (zufall.choice((-5, 50)) if i % 20 == 0 else 0)))
+
+    for i in range(anzahl - anzahl // 2):
+        charge = f"0618{i:06d}"
+        soll = 25.0 * (1 + i % 40)
+        granulate.zeilen.append((charge, 20001000 + i % 300, f"Granulat {i % 300}", soll))
+        if zufall.random() < anteil_gescannt:
+            eintraege.append(GranulatEintrag(charge=charge, status='gefunden', frei_verwendbar_kg=soll,
+                                             zahlmenge_kg=soll * (0.9 if i % 15 == 0 else 1.0)))
+
+    # Scans ohne Zeile in der Arbeitstabelle
+    for i in range(anzahl // 100):
+        eintraege.append(RollenEintrag(charge=f"99{i:08d}", status='nicht_gefunden'))
+    return rollen, granulate, eintraege
+
+
+def abgleich_schleife(rollen, granulate, eintraege, toleranz_breite_mm, toleranz_gewicht_kg, toleranz_gewicht_prozent):
+    """Naheliegende Umsetzung: Dict der Scans, jede Zeile der Arbeitstabelle einzeln prüfen, dann Berichts-Tabellen"""
+    scans = {}
+    for eintrag in eintraege:
+        scans.setdefault((eintrag.typ, charge_schluessel(eintrag.charge)), eintrag)
+
+    nicht_gescannt, breite, gewicht, zugeordnet = [], [], [], set()
+    for typ, blatt in (('ROLLE', rollen), ('GRANULAT', granulate)):
+        for zeile in range(len(blatt)):
+            item = blatt.datensatz(zeile)
+            schluessel = (typ, charge_schluessel(item['Charge']))
+            if schluessel in zugeordnet:
+                continue
+            eintrag = scans.get(schluessel)
+            if eintrag is None:
+                nicht_gescannt.append(item)
+                continue
+            zugeordnet.add(schluessel)
+            if typ == 'ROLLE':
+                if abs(float(eintrag.breite_kontrolliert) - float(item['Breite mm'])) > toleranz_breite_mm:
+                    breite.append(item)
+            else:
+                soll = float(item['Frei verwendbar'])
+                grenze = max(toleranz_gewicht_kg, abs(soll) * toleranz_gewicht_prozent / 100)
+                if abs(float(eintrag.zahlmenge_kg) - soll) > grenze:
+                    gewicht.append(item)
+
+    zusaetzlich = [eintrag.als_dict() for schluessel, eintrag in scans.items() if schluessel not in zugeordnet]
+    return [pd.DataFrame(teil) for teil in (nicht_gescannt, zusaetzlich, breite, gewicht)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--zeilen', type=int, default=100000, help='Zeilen der Arbeitstabelle')
+    parser.add_argument('--anteil-gescannt', type=float, default=0.8)
+    parser.add_argument('--toleranz-breite', type=float, default=10)
+    parser.add_argument('--toleranz-kg', type=float, default=1)
+    parser.add_argument('--toleranz-prozent', type=float, default=5)
+    args = parser.parse_args()
+
+    rollen, granulate, eintraege = erzeuge_daten(args.zeilen, args.anteil_gescannt)
+    toleranzen = (args.toleranz_breite, args.toleranz_kg, args.toleranz_prozent)
+
+    start = time.perf_counter()
+    alt = abgleich_schleife(rollen, granulate, eintraege, *toleranzen)
+    dauer_alt = time.perf_counter() - start
+
+    # Erster Aufruf lädt pandas-Interna nach, das gehört nicht zur Messung
+    klein = erzeuge_daten(1000, args.anteil_gescannt)
+    abgleich_berechnen(*klein, *toleranzen)
+
+    start = time.perf_counter()
+    neu = abgleich_berechnen(rollen, granulate, eintraege, *toleranzen)
+    dauer_neu = time.perf_counter() - start
+
+    anzahl_alt = [len(teil) for teil in alt]
+    anzahl_neu = [len(neu[blatt]) for blatt in ('Nicht_gescannt', 'Zusaetzlich', 'Breite_Abweichung', 'Gewicht_Abweichung')]
+    assert anzahl_alt == anzahl_neu, f"Abgleich liefert andere Ergebnisse: {anzahl_alt} != {anzahl_neu}"
+
+    print(f"Arbeitstabelle: {args.zeilen} Zeilen, Scans: {len(eintraege)}")
+    print(f"Nicht gescannt / zusätzlich / Breite / Gewicht: {' / '.join(map(str, anzahl_neu))}")
+    print(f"Zeilen-Schleife: {dauer_alt * 1000:8.0f} ms")
+    print(f"spaltenweise:    {dauer_neu * 1000:8.0f} ms")
+    print(f"Faktor:          {dauer_alt / dauer_neu:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
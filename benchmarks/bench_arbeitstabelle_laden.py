@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Laden der Arbeitstabelle per pandas vs. Streaming-Leser
+Vergleicht das bisherige Einlesen (pd.ExcelFile, beide Blätter komplett als
+DataFrames, danach Charge-Index) mit arbeitstabelle_streamen (openpyxl
+read-only, nur benötigte Spalten, Index im selben Durchgang).
+Gemessen werden Ladezeit und Speicherspitze (tracemalloc).
+
+Aufruf: python benchmarks/bench_arbeitstabelle_laden.py [--zeilen 20000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import ChargeIndex, arbeitstabelle_streamen  # noqa: E402
+
+
+def erzeuge_arbeitstabelle(pfad, zeilen):
+    """Schreibt eine synthetische Arbeitstabelle mit allen Original-Spalten (ca. 80 % Rollen)"""
+    rollen_anzahl = int(zeilen * 0.8)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Rollen')
+    ws.append(['Werk', 'Lagerort', 'Material', 'Materialkurztext', 'Charge', 'Länge m',
+               'Breite mm', 'Frei verwendbar', 'Rollenstatus', 'Fach'])
+    for i in range(rollen_anzahl):
+        ws.append(['2000', '2150', 17000000 + i % 500, f'Band Typ {i % 500}', str(4300000000 + i),
+                   100.0 + i % 50, 1000 + i % 7 * 100, 150.5, 'frei', f'A{i % 40:02d}'])
+    ws = wb.create_sheet('Granulate')
+    ws.append(['Werk', 'LOrt', 'Materialnummer', 'Materialkurztext', 'Charge', 'Frei verwendbar', 'BME'])
+    for i in range(zeilen - rollen_anzahl):
+        ws.append(['2000', '2160', 20000000 + i % 200, f'Granulat {i % 200}', f'0{610000000 + i}',
+                   25.0 + i % 10, 'KG'])
+    wb.save(pfad)
+
+
+def laden_pandas(pfad):
+    """Bisheriger Weg: beide Blätter vollständig als DataFrames, danach Index"""
+    with pd.ExcelFile(pfad) as excel_file:
+        df_rollen = excel_file.parse('Rollen', dtype={'Charge': str})
+        df_rollen['Charge'] = df_rollen['Charge'].astype(str)
+        df_granulate = excel_file.parse('Granulate', dtype={'Charge': str})
+        df_granulate['Charge'] = df_granulate['Charge'].astype(str)
+    df_granulate.rename(columns={'Materialnummer': 'Material'}, inplace=True)
+    return df_rollen, df_granulate, ChargeIndex.aus_dataframes(df_rollen, df_granulate)
+
+
+def messen(funktion, pfad):
+    """Liefert (Sekunden, Speicherspitze in MB, Ergebnis); Zeit ohne tracemalloc gemessen"""
+    start = time.perf_counter()
+    ergebnis = funktion(pfad)
+    dauer = time.perf_counter() - start
+    tracemalloc.start()
+    funktion(pfad)
+    _, spitze = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dauer, spitze / 1024 / 1024, ergebnis
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--zeilen', type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        pfad = Path(verzeichnis) / 'Arbeitstabelle.xlsx'
+        erzeuge_arbeitstabelle(pfad, args.zeilen)
+
+        dauer_pandas, speicher_pandas, (_, _, index_pandas) = messen(laden_pandas, pfad)
+        dauer_stream, speicher_stream, (_, _, index_stream, _) = messen(arbeitstabelle_streamen, pfad)
+
+    assert index_pandas.exakt == index_stream.exakt, "Streaming-Leser liefert einen anderen Index"
+
+    print(f"Arbeitstabelle: {args.zeilen} Zeilen")
+    print(f"pandas:    {dauer_pandas * 1000:8.0f} ms, Spitze {speicher_pandas:7.1f} MB")
+    print(f"Streaming: {dauer_stream * 1000:8.0f} ms, Spitze {speicher_stream:7.1f} MB")
+    print(f"Faktor:    {dauer_pandas / dauer_stream:8.1f}x Zeit, {speicher_pandas / speicher_stream:.1f}x Speicher")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Charge-Suche per DataFrame-Maske vs. Charge-Index
+Vergleicht die bisherige Suche (boolesche Maske über beide Tabellenblätter,
+ggf. zweiter Durchlauf ohne führende Nullen) mit dem ChargeIndex.
+
+Aufruf: python benchmarks/bench_charge_lookup.py [--zeilen 80000] [--scans 2000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import ChargeIndex  # noqa: E402
+
+
+def erzeuge_arbeitstabelle(zeilen):
+    """Erzeugt synthetische Rollen/Granulate-DataFrames (ca. 80 % Rollen)"""
+    rollen_anzahl = int(zeilen * 0.8)
+    granulate_anzahl = zeilen - rollen_anzahl
+    df_rollen = pd.DataFrame({
+        'Charge': [f"{4300000000 + i}" for i in range(rollen_anzahl)],
+        'Material': [str(17000000 + i % 500) for i in range(rollen_anzahl)],
+    })
+    df_granulate = pd.DataFrame({
+        'Charge': [f"0{610000000 + i}" for i in range(granulate_anzahl)],
+        'Material': [str(20000000 + i % 200) for i in range(granulate_anzahl)],
+    })
+    return df_rollen, df_granulate
+
+
+def suche_maske(df_rollen, df_granulate, charge):
+    """Bisherige Suche aus InventurApp.suche_charge + Retry aus process_scan"""
+    for kandidat in (charge, str(int(charge)) if charge.isdigit() else None):
+        if kandidat is None:
+            continue
+        ergebnis = df_rollen[df_rollen['Charge'] == kandidat]
+        if not ergebnis.empty:
+            return ('ROLLE', ergebnis.iloc[0].to_dict())
+        ergebnis = df_granulate[df_granulate['Charge'] == kandidat]
+        if not ergebnis.empty:
+            return ('GRANULAT', ergebnis.iloc[0].to_dict())
+    return ('NICHT_GEFUNDEN', None)
+
+
+def suche_index(index, df_rollen, df_granulate, charge):
+    """Neue Suche über den ChargeIndex"""
+    treffer = index.suche(charge)
+    if treffer is None:
+        return ('NICHT_GEFUNDEN', None)
+    typ, zeile = treffer
+    df = df_rollen if typ == 'ROLLE' else df_granulate
+    return (typ, df.iloc[zeile].to_dict())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--zeilen', type=int, default=80000)
+    parser.add_argument('--scans', type=int, default=2000)
+    args = parser.parse_args()
+
+    df_rollen, df_granulate = erzeuge_arbeitstabelle(args.zeilen)
+    alle_chargen = list(df_rollen['Charge']) + list(df_granulate['Charge'])
+
+    random.seed(42)
+    scans = random.sample(alle_chargen, args.scans)
+    # Ein Teil der Scans mit zusätzlichen führenden Nullen bzw. unbekannt
+    scans = ['00' + c if i % 5 == 0 and not c.startswith('0') else c for i, c in enumerate(scans)]
+    scans += [str(9900000000 + i) for i in range(args.scans // 10)]
+
+    start = time.perf_counter()
+    index = ChargeIndex.aus_dataframes(df_rollen, df_granulate)
+    aufbau = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ergebnis_maske = [suche_maske(df_rollen, df_granulate, c)[0] for c in scans]
+    dauer_maske = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ergebnis_index = [suche_index(index, df_rollen, df_granulate, c)[0] for c in scans]
+    dauer_index = time.perf_counter() - start
+
+    assert ergebnis_maske == ergebnis_index, "Index liefert andere Treffer als die Maske"
+
+    print(f"Arbeitstabelle: {args.zeilen} Zeilen, {len(scans)} Scans")
+    print(f"Index-Aufbau:   {aufbau * 1000:8.1f} ms")
+    print(f"Maske:          {dauer_maske / len(scans) * 1e6:8.1f} µs/Scan")
+    print(f"Index:          {dauer_index / len(scans) * 1e6:8.1f} µs/Scan")
+    print(f"Faktor:         {dauer_maske / dauer_index:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Barcode-Dekodierung (ScanDekodierer) vor der Chargen-Suche
+Erzeugt gemischte Scan-Inhalte wie an einem Zähltag mit neuen Palettenetiketten: reine Chargen,
+GS1-128 und GS1-DataMatrix (FNC1 als GS), GS1-Klarschrift und ein Lieferantenformat (Regex-Regel).
+Misst den Durchsatz gegen das bisherige .strip() und prüft, dass jede Charge richtig herauskommt.
+
+Aufruf: python benchmarks/bench_dekodieren.py [--scans 200000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import GS1_TRENNZEICHEN, STANDARD_ETIKETTEN, ScanDekodierer  # noqa: E402
+
+LIEFERANT = {'name': 'Lieferant', 'format': 'regex', 'muster': r'CH(?P<charge>\d+)/(?P<zahlmenge>[\d,]+)KG'}
+
+
+def erzeuge_scans(anzahl, seed=1):
+    """Liste von (Scan-Inhalt, erwartete Charge); etwa die Hälfte reine Chargen"""
+    zufall = random.Random(seed)
+    scans = []
+    for i in range(anzahl):
+        charge = f"{4300000000 + i}" if i % 2 else f"0618{i % 10 ** 6:06d}"
+        gramm = zufall.randrange(1000, 1000000)
+        art = zufall.random()
+        if art < 0.5:
+            scans.append((charge, charge))
+        elif art < 0.7:
+            scans.append((f"]C110{charge}{GS1_TRENNZEICHEN}3103{gramm:06d}", charge))
+        elif art < 0.85:
+            scans.append((f"]d201{4012345000000 + i % 1000:014d}10{charge}{GS1_TRENNZEICHEN}"
+                          f"240{17000000 + i % 500}{GS1_TRENNZEICHEN}3103{gramm:06d}", charge))
+        elif art < 0.95:
+            scans.append((f"(10){charge}(3103){gramm:06d}", charge))
+        else:
+            scans.append((f"CH{charge}/{gramm / 1000:.3f}KG".replace('.', ','), charge))
+    return scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scans', type=int, default=200000, help='Anzahl Scan-Inhalte')
+    args = parser.parse_args()
+
+    scans = erzeuge_scans(args.scans)
+    inhalte = [inhalt for inhalt, _ in scans]
+    dekodierer = ScanDekodierer(STANDARD_ETIKETTEN + [LIEFERANT])
+
+    start = time.perf_counter()
+    for inhalt in inhalte:
+        inhalt.strip()
+    dauer_alt = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ergebnisse = [dekodierer.dekodieren(inhalt) for inhalt in inhalte]
+    dauer_neu = time.perf_counter() - start
+
+    falsch = sum(ergebnis['charge'] != charge for ergebnis, (_, charge) in zip(ergebnisse, scans))
+    assert not falsch, f"{falsch} Chargen falsch dekodiert"
+    mit_gewicht = sum(ergebnis['zahlmenge'] is not None for ergebnis in ergebnisse)
+
+    print(f"Scans: {len(scans)}, davon mit Gewicht vom Etikett: {mit_gewicht}")
+    print(f".strip():          {dauer_alt * 1000:8.0f} ms ({dauer_alt / len(scans) * 1e6:6.2f} µs/Scan)")
+    print(f"ScanDekodierer:    {dauer_neu * 1000:8.0f} ms ({dauer_neu / len(scans) * 1e6:6.2f} µs/Scan)")
+    print(f"Durchsatz:         {len(scans) / dauer_neu:8.0f} Scans/s")
+
+
+if __name__ == "__main__":
+    main()
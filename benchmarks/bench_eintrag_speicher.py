@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Speicherbedarf je Inventur-Eintrag (dict vs. __slots__-Klassen)
+Misst mit tracemalloc, wie viel Speicher eine Sitzung mit N Rollen- und
+Granulat-Einträgen belegt: bisher als dict (plus Kopie für den Undo-Stack),
+jetzt als RollenEintrag/GranulatEintrag, die Liste und Undo-Stack gemeinsam nutzen.
+
+Aufruf: python benchmarks/bench_eintrag_speicher.py [--eintraege 100000]
+"""
+
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import GranulatEintrag, RollenEintrag  # noqa: E402
+
+UNDO_GROESSE = 50
+
+
+def rolle(i):
+    return dict(zeitstempel=f"01.12.2025 10:{i // 60 % 60:02d}:{i % 60:02d}", charge=str(4300000000 + i),
+                material=str(17000000 + i % 500), kurztext=f"Band Typ {i % 500}", bemerkung='',
+                status='gefunden', laenge=100.0 + i % 50, flaeche=150.5, breite_original=1000,
+                breite_kontrolliert=1000, fach_original='A01', fach_kontrolliert=f"A{i % 40:02d}")
+
+
+def granulat(i):
+    return dict(zeitstempel=f"01.12.2025 10:{i // 60 % 60:02d}:{i % 60:02d}", charge=f"0{610000000 + i}",
+                material=str(20000000 + i % 200), kurztext=f"Granulat {i % 200}", bemerkung='',
+                status='gefunden', frei_verwendbar_kg=25.0, zahlmenge_kg=24.5)
+
+
+def sitzung_dict(anzahl):
+    """Bisher: dict je Eintrag, Kopie in die Liste, weitere Kopie in den Undo-Stack"""
+    daten, undo = [], []
+    for i in range(anzahl):
+        scan = dict(rolle(i), typ='ROLLE') if i % 5 else dict(granulat(i), typ='GRANULAT')
+        daten.append(scan.copy())
+        undo.append(scan.copy())
+        if len(undo) > UNDO_GROESSE:
+            undo.pop(0)
+    return daten, undo
+
+
+def sitzung_slots(anzahl):
+    """Jetzt: __slots__-Eintrag, Liste und Undo-Stack teilen sich das Objekt"""
+    daten, undo = [], []
+    for i in range(anzahl):
+        scan = RollenEintrag(**rolle(i)) if i % 5 else GranulatEintrag(**granulat(i))
+        daten.append(scan)
+        undo.append(scan)
+        if len(undo) > UNDO_GROESSE:
+            undo.pop(0)
+    return daten, undo
+
+
+def messen(funktion, anzahl):
+    """Belegter Speicher (Bytes) nach Aufbau der Sitzung"""
+    tracemalloc.start()
+    ergebnis = funktion(anzahl)
+    aktuell, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del ergebnis
+    return aktuell
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--eintraege', type=int, default=100000)
+    args = parser.parse_args()
+
+    speicher_dict = messen(sitzung_dict, args.eintraege)
+    speicher_slots = messen(sitzung_slots, args.eintraege)
+
+    print(f"Einträge: {args.eintraege} (80 % Rollen)")
+    print(f"dict:      {speicher_dict / 1024 / 1024:7.1f} MB, {speicher_dict / args.eintraege:6.0f} Bytes/Eintrag")
+    print(f"__slots__: {speicher_slots / 1024 / 1024:7.1f} MB, {speicher_slots / args.eintraege:6.0f} Bytes/Eintrag")
+    print(f"Ersparnis: {(speicher_dict - speicher_slots) / args.eintraege:6.0f} Bytes/Eintrag "
+          f"({(1 - speicher_slots / speicher_dict) * 100:.0f} %)")
+
+
+if __name__ == "__main__":
+    main()
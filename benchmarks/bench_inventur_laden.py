@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Fortsetzen einer Inventur (iterrows vs. spaltenweise Umwandlung)
+Vergleicht die bisherige zeilenweise Umwandlung der Inventur-Blätter
+(iterrows mit float()/int()/str() je Zelle) mit inventur_blatt_umwandeln.
+Mit --mit-excel wird zusätzlich das Lesen einer Rollen-Datei dieser Größe gemessen.
+
+Aufruf: python benchmarks/bench_inventur_laden.py [--scans 100000] [--mit-excel]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import INVENTUR_SPALTEN_ROLLEN, inventur_blatt_umwandeln  # noqa: E402
+
+
+def erzeuge_rollen_blatt(anzahl):
+    """Inventur-Blatt wie von pd.read_excel geliefert (Spalten als Text)"""
+    return pd.DataFrame({
+        'Datum/Uhrzeit': [f"01.12.2025 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}" for i in range(anzahl)],
+        'Charge': [str(4300000000 + i) for i in range(anzahl)],
+        'Material': [str(17000000 + i % 500) for i in range(anzahl)],
+        'Materialkurztext': [f"Band Typ {i % 500}" for i in range(anzahl)],
+        'Länge m': [str(100.0 + i % 50) for i in range(anzahl)],
+        'Fläche m²': [str(150.5 + i % 7) for i in range(anzahl)],
+        'Breite mm': [str(1000 + i % 7 * 100) for i in range(anzahl)],
+        'Breite kontrolliert': [str(1000 + i % 7 * 100) for i in range(anzahl)],
+        'Fach': [f"A{i % 40:02d}" for i in range(anzahl)],
+        'Fach kontrolliert': [f"A{i % 40:02d}" for i in range(anzahl)],
+        'Bemerkung': ['' if i % 10 else 'geprüft' for i in range(anzahl)],
+    })
+
+
+def umwandeln_iterrows(df):
+    """Bisherige Umwandlung aus load_existing_rollen"""
+    eintraege = []
+    for _, row in df.iterrows():
+        bemerkung = row.get('Bemerkung', '')
+        if pd.isna(bemerkung) or str(bemerkung).lower() == 'nan':
+            bemerkung = ''
+        eintraege.append({
+            'zeitstempel': str(row.get('Datum/Uhrzeit', '')),
+            'charge': str(row.get('Charge', '')),
+            'material': str(row.get('Material', '')),
+            'kurztext': str(row.get('Materialkurztext', '')),
+            'laenge': float(row.get('Länge m', 0)),
+            'flaeche': float(row.get('Fläche m²', 0)),
+            'breite_original': int(row.get('Breite mm', 0)),
+            'breite_kontrolliert': int(row.get('Breite kontrolliert', 0)),
+            'fach_original': str(row.get('Fach', '')),
+            'fach_kontrolliert': str(row.get('Fach kontrolliert', '')),
+            'bemerkung': str(bemerkung),
+            'status': 'gefunden',
+            'typ': 'ROLLE'
+        })
+    return eintraege
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scans', type=int, default=100000)
+    parser.add_argument('--mit-excel', action='store_true', help='zusätzlich Excel-Datei schreiben und lesen')
+    args = parser.parse_args()
+
+    df = erzeuge_rollen_blatt(args.scans)
+
+    start = time.perf_counter()
+    alt = umwandeln_iterrows(df)
+    dauer_alt = time.perf_counter() - start
+
+    start = time.perf_counter()
+    neu, probleme = inventur_blatt_umwandeln(df, INVENTUR_SPALTEN_ROLLEN, 'ROLLE', 'gefunden')
+    dauer_neu = time.perf_counter() - start
+
+    assert not probleme and alt == [eintrag.als_dict() for eintrag in neu], "Spaltenweise Umwandlung liefert andere Einträge"
+
+    print(f"Gespeicherte Scans: {args.scans}")
+    print(f"iterrows:      {dauer_alt * 1000:8.0f} ms")
+    print(f"spaltenweise:  {dauer_neu * 1000:8.0f} ms")
+    print(f"Faktor:        {dauer_alt / dauer_neu:8.1f}x")
+
+    if args.mit_excel:
+        with tempfile.TemporaryDirectory() as verzeichnis:
+            pfad = Path(verzeichnis) / 'Inventur_Rollen.xlsx'
+            df.to_excel(pfad, sheet_name='Inventur', index=False)
+            start = time.perf_counter()
+            pd.read_excel(pfad, sheet_name=None, dtype=str)
+            print(f"Excel lesen:   {(time.perf_counter() - start) * 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
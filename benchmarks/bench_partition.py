@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: Stammdaten der ganzen Firma vs. nur eines Lagerorts (Partition)
+Erzeugt eine synthetische Arbeitstabelle mit mehreren Lagerorten und misst den warmen Start
+(arbeitstabelle_daten_laden aus dem Cache) samt Speicherspitze (tracemalloc) ohne und mit Partition,
+dazu den ersten Scan einer Charge eines anderen Lagerorts (ohne Oberfläche wird der Zweit-Index dabei geladen,
+die Oberfläche lädt ihn nach dem Start im Hintergrund vor).
+
+Aufruf: python benchmarks/bench_partition.py [--zeilen 100000] [--lagerorte 10]
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import InventurEngine, module_laden  # noqa: E402
+
+
+def erzeuge_arbeitstabelle(pfad, zeilen, lagerorte):
+    """Schreibt eine Arbeitstabelle, deren Zeilen reihum auf die Lagerorte 0101, 0102, ... verteilt sind"""
+    rollen_anzahl = int(zeilen * 0.8)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Rollen')
+    ws.append(['Werk', 'Lagerort', 'Material', 'Materialkurztext', 'Charge', 'Länge m',
+               'Breite mm', 'Frei verwendbar', 'Rollenstatus', 'Fach'])
+    for i in range(rollen_anzahl):
+        ws.append(['1701', f'01{i % lagerorte + 1:02d}', 17000000 + i % 500, f'Band Typ {i % 500}',
+                   str(4300000000 + i), 100.0 + i % 50, 1000 + i % 7 * 100, 150.5, 'frei', f'A{i % 40:02d}'])
+    ws = wb.create_sheet('Granulate')
+    ws.append(['Werk', 'LOrt', 'Materialnummer', 'Materialkurztext', 'Charge', 'Frei verwendbar', 'BME'])
+    for i in range(zeilen - rollen_anzahl):
+        ws.append(['1701', f'01{i % lagerorte + 1:02d}', 20000000 + i % 200, f'Granulat {i % 200}',
+                   f'0{610000000 + i}', 25.0 + i % 10, 'KG'])
+    wb.save(pfad)
+
+
+def warmer_start(verzeichnis, config):
+    """Lädt einmal kalt (Cache schreiben), misst dann den warmen Start: (ms, Speicherspitze MB, Engine)"""
+    InventurEngine(verzeichnis, config).arbeitstabelle_laden()
+    engine = InventurEngine(verzeichnis, config)
+    start = time.perf_counter()
+    engine.arbeitstabelle_laden()
+    dauer = time.perf_counter() - start
+
+    tracemalloc.start()
+    InventurEngine(verzeichnis, config).arbeitstabelle_daten_laden()
+    _, spitze = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return dauer * 1000, spitze / 1024 / 1024, engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--zeilen', type=int, default=100000)
+    parser.add_argument('--lagerorte', type=int, default=10)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    module_laden()
+
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        erzeuge_arbeitstabelle(Path(verzeichnis) / 'Arbeitstabelle.xlsx', args.zeilen, args.lagerorte)
+
+        dauer_alle, speicher_alle, alle = warmer_start(verzeichnis, {})
+        dauer_teil, speicher_teil, teil = warmer_start(verzeichnis, {'partition_lagerort': '0101'})
+
+        # Charge aus Lagerort 0102: beim ersten Mal wird der Zweit-Index geladen, danach O(1)
+        fremde_charge = '4300000001'
+        start = time.perf_counter()
+        typ, item = teil.suche_charge(fremde_charge)
+        dauer_erster = time.perf_counter() - start
+        start = time.perf_counter()
+        teil.suche_charge(fremde_charge)
+        dauer_zweiter = time.perf_counter() - start
+
+    assert typ == 'ROLLE' and teil.fremde_partition(item) == "Werk 1701 / Lagerort 0102", (typ, item)
+    assert len(alle.charge_index) == len(teil.charge_index) + len(teil.fremde_daten[2])
+
+    print(f"Arbeitstabelle: {args.zeilen} Zeilen, {args.lagerorte} Lagerorte")
+    print(f"Alle Lagerorte:    {len(alle.charge_index):7d} Chargen, Start {dauer_alle:6.0f} ms, "
+          f"Spitze {speicher_alle:6.1f} MB")
+    print(f"Lagerort 0101:     {len(teil.charge_index):7d} Chargen, Start {dauer_teil:6.0f} ms, "
+          f"Spitze {speicher_teil:6.1f} MB")
+    print(f"Fremde Charge:     erster Scan {dauer_erster * 1000:6.0f} ms (Zweit-Index laden), "
+          f"danach {dauer_zweiter * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
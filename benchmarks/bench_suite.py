@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark-Suite: Laden, Suche, Vorschläge, Duplikatprüfung, Speichern und Artikelliste bei 1k bis 1M Zeilen
+Erzeugt synthetische Arbeitstabellen (Blätter Rollen/Granulate mit den Original-Spalten) und
+bestehende Inventur-Dateien, misst die InventurEngine darauf und schreibt die Ergebnisse als JSON.
+Mit --vergleich werden die Zeiten einer früheren Ergebnisdatei (z.B. Vorversion) gegenübergestellt.
+Die Artikelliste (Treeview) wird nur gemessen, wenn ein Display vorhanden ist.
+
+Aufruf: python benchmarks/bench_suite.py [--groessen 1000,10000,100000,1000000] [--ausgabe ergebnisse.json]
+                                         [--vergleich alt.json] [--daten-ordner bench_daten]
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import (INVENTUR_SPALTEN_GRANULAT, INVENTUR_SPALTEN_ROLLEN,  # noqa: E402
+                             InventurEngine, MasterdatenCache)
+
+ANZAHL_SUCHEN = 20000
+ANZAHL_VORSCHLAEGE = 200
+
+
+def rollen_charge(i):
+    return str(4300000000 + i)
+
+
+def granulat_charge(i):
+    return f"0{610000000 + i}"
+
+
+def erzeuge_arbeitstabelle(pfad, zeilen):
+    """Schreibt eine synthetische Arbeitstabelle mit allen Original-Spalten (ca. 80 % Rollen)"""
+    rollen_anzahl = int(zeilen * 0.8)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Rollen')
+    ws.append(['Werk', 'Lagerort', 'Material', 'Materialkurztext', 'Charge', 'Länge m',
+               'Breite mm', 'Frei verwendbar', 'Rollenstatus', 'Fach'])
+    for i in range(rollen_anzahl):
+        ws.append(['2000', '2150', 17000000 + i % 500, f'Band Typ {i % 500}', rollen_charge(i),
+                   100.0 + i % 50, 1000 + i % 7 * 100, 150.5, 'frei', f'A{i % 40:02d}'])
+    ws = wb.create_sheet('Granulate')
+    ws.append(['Werk', 'LOrt', 'Materialnummer', 'Materialkurztext', 'Charge', 'Frei verwendbar', 'BME'])
+    for i in range(zeilen - rollen_anzahl):
+        ws.append(['2000', '2160', 20000000 + i % 200, f'Granulat {i % 200}', granulat_charge(i),
+                   25.0 + i % 10, 'KG'])
+    wb.save(pfad)
+    return rollen_anzahl, zeilen - rollen_anzahl
+
+
+def zeitstempel(i):
+    return f"01.12.2025 {6 + i // 3600 % 12:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+
+
+def erzeuge_inventur(data_dir, rollen_anzahl, granulate_anzahl, anteil):
+    """Schreibt Inventur_Rollen.xlsx und Inventur_Granulat.xlsx mit einem Anteil bereits gescannter Chargen"""
+    nicht_gefunden = max(1, int((rollen_anzahl + granulate_anzahl) * anteil * 0.01))
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Inventur')
+    ws.append([spalte for spalte, _, _ in INVENTUR_SPALTEN_ROLLEN])
+    for i in range(int(rollen_anzahl * anteil)):
+        breite = 1000 + i % 7 * 100
+        ws.append([zeitstempel(i), rollen_charge(i), str(17000000 + i % 500), f'Band Typ {i % 500}',
+                   100.0 + i % 50, 150.5, breite, breite, f'A{i % 40:02d}', f'A{i % 40:02d}', ''])
+    ws = wb.create_sheet('Nicht_gefunden')
+    ws.append([spalte for spalte, _, _ in INVENTUR_SPALTEN_ROLLEN])
+    for i in range(nicht_gefunden):
+        ws.append([zeitstempel(i), f"99{i:08d}", '', '', 0.0, 0.0, 0, 1000, '', 'Z01', 'Etikett fehlt'])
+    wb.save(data_dir / 'Inventur_Rollen.xlsx')
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Inventur')
+    ws.append([spalte for spalte, _, _ in INVENTUR_SPALTEN_GRANULAT])
+    for i in range(int(granulate_anzahl * anteil)):
+        ws.append([zeitstempel(i), granulat_charge(i), str(20000000 + i % 200), f'Granulat {i % 200}',
+                   25.0 + i % 10, 25.0 + i % 10, ''])
+    wb.save(data_dir / 'Inventur_Granulat.xlsx')
+
+
+def daten_bereitstellen(ordner, zeilen, anteil):
+    """Legt die Testdaten für eine Größe an (vorhandene Dateien im Daten-Ordner werden wiederverwendet)"""
+    data_dir = ordner / f"zeilen_{zeilen}"
+    vorlage = data_dir / 'vorlage'
+    if not (vorlage / 'Inventur_Granulat.xlsx').exists():
+        vorlage.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        rollen_anzahl, granulate_anzahl = erzeuge_arbeitstabelle(vorlage / 'Arbeitstabelle.xlsx', zeilen)
+        erzeuge_inventur(vorlage, rollen_anzahl, granulate_anzahl, anteil)
+        print(f"  Testdaten erzeugt ({time.perf_counter() - start:.1f} s)")
+
+    # Jede Messung auf einer frischen Kopie (kein Cache, kein Journal, keine Backups)
+    arbeit = data_dir / 'lauf'
+    shutil.rmtree(arbeit, ignore_errors=True)
+    shutil.copytree(vorlage, arbeit)
+    return arbeit
+
+
+def suchbegriffe(engine, anzahl, seed=1):
+    """Mischung wie am Zähltag: Treffer, Treffer mit/ohne führende Nullen, unbekannte Chargen"""
+    zufall = random.Random(seed)
+    rollen, granulate = len(engine.stamm_rollen), len(engine.stamm_granulate)
+    begriffe = []
+    for _ in range(anzahl):
+        art = zufall.random()
+        if art < 0.6:
+            begriffe.append(rollen_charge(zufall.randrange(rollen)))
+        elif art < 0.9 and granulate:
+            charge = granulat_charge(zufall.randrange(granulate))
+            begriffe.append(charge.lstrip('0') if zufall.random() < 0.5 else charge)
+        else:
+            begriffe.append(f"77{zufall.randrange(10 ** 8):08d}")
+    return begriffe
+
+
+def beschaedigte_chargen(begriffe, anzahl, seed=1):
+    """Unvollständig oder falsch gelesene Etiketten: Anfang, Ende, eine bzw. zwei falsche Ziffern"""
+    zufall = random.Random(seed)
+    beschaedigt = []
+    for charge in begriffe[:anzahl]:
+        art = zufall.randrange(4)
+        if art == 0:
+            beschaedigt.append(charge[:-2])
+        elif art == 1:
+            beschaedigt.append(charge[3:])
+        else:
+            for _ in range(art - 1):
+                pos = zufall.randrange(len(charge))
+                charge = charge[:pos] + str((int(charge[pos]) + 1) % 10) + charge[pos + 1:]
+            beschaedigt.append(charge)
+    return beschaedigt
+
+
+def liste_messen(eintraege, virtuelle_liste_ab):
+    """Baut die Artikelliste wie InventurApp.update_list auf (None ohne Display)"""
+    import tkinter as tk
+    from tkinter import ttk
+
+    from inventur_app import InventurApp, VirtuelleListe
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    try:
+        root.withdraw()
+        tree = ttk.Treeview(root, columns=('Zeit', 'Charge', 'Material', 'Typ', 'Fach', 'Status'),
+                            show='headings', height=15)
+        scrollbar = ttk.Scrollbar(root, orient=tk.VERTICAL, command=tree.yview)
+
+        def werte(item):
+            return InventurApp.liste_werte(None, item)
+
+        start = time.perf_counter()
+        eintraege = sorted(eintraege, key=lambda x: x.zeitstempel, reverse=True)
+        if len(eintraege) > virtuelle_liste_ab:
+            VirtuelleListe(tree, scrollbar, werte, {}).neu_aufbauen(eintraege)
+        else:
+            for item in eintraege:
+                tree.insert('', 'end', values=werte(item))
+        root.update_idletasks()
+        return time.perf_counter() - start
+    finally:
+        root.destroy()
+
+
+def messen(ergebnisse, zeilen, name, funktion, aufrufe=1, wiederholungen=1):
+    """Misst eine Funktion (aufrufe = Anzahl Aufrufe darin) und merkt die beste von wiederholungen Zeiten"""
+    dauer = float('inf')
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        rueckgabe = funktion()
+        dauer = min(dauer, time.perf_counter() - start)
+    ergebnis = {'zeilen': zeilen, 'messung': name, 'sekunden': round(dauer, 6), 'aufrufe': aufrufe}
+    if aufrufe > 1:
+        ergebnis['mikrosekunden_pro_aufruf'] = round(dauer / aufrufe * 1e6, 3)
+    ergebnisse.append(ergebnis)
+    pro_aufruf = f" ({ergebnis['mikrosekunden_pro_aufruf']:.2f} µs/Aufruf)" if aufrufe > 1 else ''
+    print(f"  {name:<28} {dauer * 1000:10.1f} ms{pro_aufruf}")
+    return rueckgabe
+
+
+def groesse_messen(ordner, zeilen, args, logger):
+    """Alle Messungen für eine Größe der Arbeitstabelle"""
+    print(f"Arbeitstabelle mit {zeilen} Zeilen:")
+    data_dir = daten_bereitstellen(ordner, zeilen, args.anteil_gescannt)
+    ergebnisse = []
+
+    engine = InventurEngine(data_dir, {'virtuelle_liste_ab': args.virtuelle_liste_ab}, logger)
+    try:
+        # Kalt: Excel lesen und Cache schreiben, warm: aus dem Cache
+        MasterdatenCache(engine.arbeitstabelle_path).pfad.unlink(missing_ok=True)
+        messen(ergebnisse, zeilen, 'arbeitstabelle_laden_kalt', engine.arbeitstabelle_laden)
+        messen(ergebnisse, zeilen, 'arbeitstabelle_laden_warm', engine.arbeitstabelle_laden, wiederholungen=3)
+
+        messen(ergebnisse, zeilen, 'inventur_laden', engine.inventur_laden)
+
+        begriffe = suchbegriffe(engine, ANZAHL_SUCHEN)
+        messen(ergebnisse, zeilen, 'suche_charge', lambda: [engine.suche_charge(c) for c in begriffe],
+               aufrufe=len(begriffe), wiederholungen=3)
+        messen(ergebnisse, zeilen, 'is_already_scanned', lambda: [engine.is_already_scanned(c) for c in begriffe],
+               aufrufe=len(begriffe), wiederholungen=3)
+        beschaedigt = beschaedigte_chargen(begriffe, ANZAHL_VORSCHLAEGE)
+        messen(ergebnisse, zeilen, 'vorschlaege', lambda: [engine.vorschlaege(c) for c in beschaedigt],
+               aufrufe=len(beschaedigt))
+
+        eintraege = engine.alle_eintraege()
+        dauer = liste_messen(eintraege, args.virtuelle_liste_ab)
+        if dauer is None:
+            print(f"  {'liste_aufbauen':<28} übersprungen (kein Display)")
+        else:
+            ergebnisse.append({'zeilen': zeilen, 'messung': 'liste_aufbauen', 'sekunden': round(dauer, 6), 'aufrufe': 1})
+            print(f"  {'liste_aufbauen':<28} {dauer * 1000:10.1f} ms")
+
+        snapshot = engine.daten_snapshot()
+        messen(ergebnisse, zeilen, 'save_to_excel', lambda: engine.save_to_excel(snapshot))
+    finally:
+        engine.schliessen()
+
+    for ergebnis in ergebnisse:
+        ergebnis['inventur_eintraege'] = len(eintraege)
+    return ergebnisse
+
+
+def version():
+    """Git-Stand des Programms (None außerhalb eines Repositories)"""
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=Path(__file__).resolve().parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def vergleichen(alt_pfad, ergebnisse):
+    """Stellt die Zeiten einer früheren Ergebnisdatei gegenüber (Faktor > 1 = jetzt langsamer)"""
+    alt = json.loads(Path(alt_pfad).read_text(encoding='utf-8'))
+    alte_zeiten = {(e['zeilen'], e['messung']): e['sekunden'] for e in alt['ergebnisse']}
+    print(f"\nVergleich mit {alt_pfad} (Version {alt.get('version')}):")
+    for ergebnis in ergebnisse:
+        vorher = alte_zeiten.get((ergebnis['zeilen'], ergebnis['messung']))
+        if not vorher:
+            continue
+        faktor = ergebnis['sekunden'] / vorher
+        markierung = '  ⚠️ langsamer' if faktor > 1.2 else ''
+        print(f"  {ergebnis['zeilen']:>8} {ergebnis['messung']:<28} {vorher * 1000:10.1f} → "
+              f"{ergebnis['sekunden'] * 1000:10.1f} ms  ({faktor:.2f}x){markierung}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--groessen', default='1000,10000,100000,1000000',
+                        help='Zeilen der Arbeitstabelle, kommagetrennt')
+    parser.add_argument('--anteil-gescannt', type=float, default=0.5,
+                        help='Anteil der Arbeitstabelle, der bereits in den Inventur-Dateien steht')
+    parser.add_argument('--virtuelle-liste-ab', type=int, default=5000)
+    parser.add_argument('--ausgabe', type=Path, default=Path('bench_ergebnisse.json'))
+    parser.add_argument('--vergleich', type=Path, help='frühere Ergebnisdatei zum Vergleich')
+    parser.add_argument('--daten-ordner', type=Path,
+                        help='Testdaten hier ablegen und bei späteren Läufen wiederverwenden (Standard: temporär)')
+    args = parser.parse_args()
+
+    # Meldungen der Engine nur bei Fehlern, sonst stören sie die Ausgabe
+    logger = logging.getLogger('bench_suite')
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.WARNING)
+
+    groessen = [int(groesse) for groesse in args.groessen.split(',')]
+    ergebnisse = []
+    with tempfile.TemporaryDirectory() as temp:
+        ordner = args.daten_ordner or Path(temp)
+        for zeilen in groessen:
+            ergebnisse.extend(groesse_messen(ordner, zeilen, args, logger))
+
+    bericht = {
+        'version': version(),
+        'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plattform': platform.platform(),
+        'parameter': {'anteil_gescannt': args.anteil_gescannt, 'virtuelle_liste_ab': args.virtuelle_liste_ab,
+                      'suchen': ANZAHL_SUCHEN},
+        'ergebnisse': ergebnisse,
+    }
+    args.ausgabe.write_text(json.dumps(bericht, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nErgebnisse: {args.ausgabe}")
+
+    if args.vergleich:
+        vergleichen(args.vergleich, ergebnisse)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,16 +13,25 @@ Datum: Dezember 2025
 Version: 2.0
 """
 
+import time
+PROGRAMMSTART = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-from openpyxl import Workbook, load_workbook
 from datetime import datetime
 import os
 import sys
 from pathlib import Path
 import json
 import logging
+import threading
+from collections import deque
+
+from inventur_engine import (ArbeitstabelleFehler, EingabeFehler, GranulatEintrag, InventurEintrag,
+                             InventurEngine, PersistenzWorker, RollenEintrag, ScanMessung, abgleich_zusammenfassung,
+                             batch_zusammenfassung, dauer_text, einfuege_position, eingaben_uebernehmen,
+                             module_laden, unterschiede_text, vorschlag_text, zeit_schluessel)
+
 
 class InventurApp:
     def __init__(self):
@@ -33,14 +42,10 @@ class InventurApp:
         self.base_dir = Path(self.get_base_path())
         self.data_dir = self.base_dir / 'data'
         self.config_dir = self.base_dir / 'config'
-        self.arbeitstabelle_path = self.data_dir / 'Arbeitstabelle.xlsx'
-        self.inventur_rollen_path = self.data_dir / 'Inventur_Rollen.xlsx'
-        self.inventur_granulat_path = self.data_dir / 'Inventur_Granulat.xlsx'
         
-        # Erstelle Verzeichnisse falls nicht vorhanden
+        # Erstelle Verzeichnisse falls nicht vorhanden (Backup-Ordner legt der Inventur-Kern an)
         self.data_dir.mkdir(exist_ok=True)
         self.config_dir.mkdir(exist_ok=True)
-        (self.data_dir / 'backups').mkdir(exist_ok=True)
         
         # Jetzt Logging setup (nachdem Pfade definiert sind)
         self.setup_logging()
@@ -48,9 +53,20 @@ class InventurApp:
         self.load_config()
         self.init_data()
         self.setup_ui()
-        self.load_existing_inventur()
         self.bind_shortcuts()
         
+        # Scanner-Eingaben (schnelle Tastenfolge + ENTER) gehen nie verloren, auch nicht bei offenen Dialogen
+        if self.config.get('scanner_tastenabstand_ms', 50):
+            self.scanner = ScannerEingabe(self.root, self.scanner_eingabe,
+                                          self.config.get('scanner_tastenabstand_ms', 50),
+                                          self.config.get('scanner_min_laenge', 4))
+        
+        # Ergebnisse des Schreib-Threads regelmäßig im Tk-Thread abholen
+        self.root.after(100, self.worker_ergebnisse_pruefen)
+        
+        # Module, Arbeitstabelle und Inventur im Hintergrund laden (Fenster ist sofort bedienbar)
+        self.hintergrund_start()
+        
     def get_base_path(self):
         """Gibt den Basispfad zurück - funktioniert sowohl für .py als auch .exe"""
         if getattr(sys, 'frozen', False):
@@ -87,7 +103,29 @@ class InventurApp:
             "farbe_rolle_text": "#1976D2",
             "farbe_granulat_bg": "#FFF9C4",
             "farbe_granulat_text": "#F57F17",
-            "vollbild": True
+            "vollbild": True,
+            "excel_speicher_intervall_sek": 30,
+            "virtuelle_liste_ab": 5000,
+            "speicher_backend": "excel",
+            "sync_server": "",
+            "sync_station": "",
+            "sync_intervall_sek": 5,
+            "abgleich_toleranz_breite_mm": 0,
+            "abgleich_toleranz_gewicht_kg": 0,
+            "abgleich_toleranz_gewicht_prozent": 0,
+            "latenz_messung": False,
+            "latenz_fenster": 1000,
+            "statistik_fenster_min": 15,
+            "vorschlaege_max_abstand": 2,
+            "vorschlaege_anzahl": 8,
+            "etiketten": [
+                {"name": "GS1", "format": "gs1", "charge": "10", "material": "240", "gewicht": "310"}
+            ],
+            "scanner_tastenabstand_ms": 50,
+            "scanner_min_laenge": 4,
+            "arbeitstabelle_pruefen_sek": 5,
+            "partition_werk": "",
+            "partition_lagerort": ""
         }
         
         try:
@@ -112,94 +150,207 @@ class InventurApp:
     
     def init_data(self):
         """Initialisiert die Datenstrukturen"""
-        # Separate DataFrames für Rollen und Granulat
-        self.df_rollen = None
-        self.df_granulate = None
-        
-        # Separate Listen für Inventur-Daten
-        self.inventur_rollen_data = []
-        self.inventur_granulat_data = []
-        self.nicht_gefunden_rollen_data = []
-        self.nicht_gefunden_granulat_data = []
+        # Daten, Suche, Journal/Datenbank und Excel-Dateien liegen im Inventur-Kern
+        # Meldungen aus Hintergrund-Threads (z.B. Inventur laden beim Start) zeigt der Tk-Thread an
+        self.thread_meldungen = deque()
+        self.engine = InventurEngine(self.data_dir, self.config, self.logger, melden=self.engine_melden)
         
         self.current_scan = None
         self.current_type = None  # 'ROLLE' oder 'GRANULAT'
-        self.undo_stack = []
+        self.excel_speichern_id = None
+        
+        # Schreib-Thread für Excel-Dateien (Momentaufnahme wird vor dem Einreihen erstellt)
+        self.worker = PersistenzWorker(self.logger)
+        self.excel_lock = threading.Lock()
+        self.excel_auftrag = None
+        
+        # Eigener Thread für den Abgleich mit dem Sync-Server (der Sync-Client liegt im Kern)
+        self.sync_worker = None
+        self.sync_laeuft = False
+        if self.engine.sync is not None:
+            self.sync_worker = PersistenzWorker(self.logger, name='SyncWorker')
+        
+        # Eigener Thread für eine im laufenden Betrieb geänderte Arbeitstabelle (SAP-Export)
+        self.nachlade_worker = None
+        self.nachladen_laeuft = False
+        if self.config.get('arbeitstabelle_pruefen_sek', 5):
+            self.nachlade_worker = PersistenzWorker(self.logger, name='NachladeWorker')
+        
+        # Eigener Thread für den Zweit-Index (übrige Werke/Lagerorte), nie synchron im Tk-Thread laden
+        self.fremde_worker = None
+        if self.engine.partition.aktiv:
+            self.engine.fremde_synchron = False
+            self.fremde_worker = PersistenzWorker(self.logger, name='ZweitIndexWorker')
+        
+        # Progressiver Start: bis die Arbeitstabelle geladen ist, werden Scans vorgemerkt
+        self.bereit = False
+        
+        # Warteschlange der Scans (FIFO): abgearbeitet, sobald kein Scan und kein Dialog mehr offen ist
+        self.scan_warteschlange = deque()
+        self.scan_laeuft = False
+        self.warnung_auftrag = None
+        self.start_worker = None
+        
+        # Fenster mit den Chargen eines Batch-Imports, die noch Eingaben brauchen
+        self.arbeitsliste = None
+        
+        # Diagnose-Fenster mit den Laufzeiten der Scan-Phasen
+        self.diagnose = None
+    
+    def engine_melden(self, titel, text):
+        """Fehlermeldung des Kerns: sofort im Tk-Thread, aus anderen Threads beim nächsten Abholen"""
+        if threading.current_thread() is threading.main_thread():
+            messagebox.showerror(titel, text)
+        else:
+            self.thread_meldungen.append((titel, text))
+    
+    def hintergrund_start(self):
+        """Startet das Laden von Modulen und Arbeitstabelle im Hintergrund"""
+        self.fenster_bereit_ms = (time.perf_counter() - PROGRAMMSTART) * 1000
+        self.start_fortschritt(10, "Programm-Module werden geladen...")
+        
+        # Eigener Thread, damit die Anzeige „ausstehend" des Schreib-Threads nicht verfälscht wird
+        self.start_worker = PersistenzWorker(self.logger, name='StartWorker')
+        self.start_worker.einreihen('Module laden', module_laden, self.start_module_geladen)
+        self.start_worker.einreihen('Arbeitstabelle laden', self.engine.arbeitstabelle_daten_laden,
+                                    self.start_arbeitstabelle_geladen)
+    
+    def start_module_geladen(self, ok, ergebnis):
+        """Rückmeldung des Start-Threads: pandas/openpyxl importiert"""
+        if ok:
+            self.logger.info(f"Module geladen ({ergebnis:.0f} ms)")
+            self.start_fortschritt(40, "Arbeitstabelle wird geladen...")
+    
+    def start_arbeitstabelle_geladen(self, ok, ergebnis):
+        """Rückmeldung des Start-Threads: Arbeitstabelle übernehmen, Inventur im Start-Thread laden"""
+        if not ok:
+            if isinstance(ergebnis, ArbeitstabelleFehler):
+                messagebox.showerror("Fehler", str(ergebnis))
+            else:
+                messagebox.showerror("Fehler", f"Fehler beim Lesen der Excel-Datei:\n{ergebnis}")
+            sys.exit(1)
+        
+        if ergebnis is None:
+            messagebox.showwarning("Warnung", 
+                f"Arbeitstabelle nicht gefunden!\n\n"
+                f"Bitte kopieren Sie die Arbeitstabelle.xlsx in:\n"
+                f"{self.engine.arbeitstabelle_path.absolute()}\n\n"
+                f"Die Datei muss zwei Tabellenblätter enthalten:\n"
+                f"- 'Rollen'\n"
+                f"- 'Granulate'")
+        else:
+            self.engine.stammdaten_uebernehmen(ergebnis)
+        self.update_info_label()
+        
+        # Excel bzw. Datenbank lesen und Journal einspielen ebenfalls im Start-Thread (erst nach
+        # stammdaten_uebernehmen, die Statistik zählt nur Chargen der eigenen Partition)
+        self.start_fortschritt(80, "Bisherige Inventur wird geladen...")
+        self.start_worker.einreihen('Inventur laden', self.engine.inventur_laden, self.start_inventur_geladen)
+        self.start_worker.stoppen()
+    
+    def start_inventur_geladen(self, ok, ergebnis):
+        """Rückmeldung des Start-Threads: geladene Inventur anzeigen, Scans freigeben"""
+        if not ok:
+            messagebox.showerror("Fehler", f"Fehler beim Laden der Inventur:\n{ergebnis}")
+            ergebnis = (0, 0)
+        if not self.inventur_anzeigen(*ergebnis):
+            self.status_var.set("Bereit zum Scannen...")
+        self.start_abschliessen()
+    
+    def start_abschliessen(self):
+        """Beendet den Hintergrundstart und arbeitet vorgemerkte Scans ab"""
+        self.bereit = True
+        self.start_fortschritt(None)
+        
+        gesamt_ms = (time.perf_counter() - PROGRAMMSTART) * 1000
+        self.logger.info(f"Start abgeschlossen: Fenster nach {self.fenster_bereit_ms:.0f} ms bedienbar, "
+                         f"Daten nach {gesamt_ms:.0f} ms geladen "
+                         f"({gesamt_ms - self.fenster_bereit_ms:.0f} ms früher bedienbar)")
+        
+        if self.engine.sync is not None:
+            self.sync_starten()
+        
+        if self.nachlade_worker is not None:
+            self.root.after(int(self.config.get('arbeitstabelle_pruefen_sek', 5) * 1000), self.arbeitstabelle_pruefen)
+        
+        self.fremde_vorladen()
         
-        # Lade Arbeitstabelle
-        self.load_arbeitstabelle()
+        if self.scan_warteschlange:
+            self.logger.info(f"{len(self.scan_warteschlange)} vorgemerkte Scans werden verarbeitet")
+            self.warteschlange_abarbeiten()
     
-    def load_arbeitstabelle(self):
-        """Lädt die Arbeitstabelle mit zwei Tabellenblättern (Rollen und Granulate)"""
+    def scanner_eingabe(self, text, widget):
+        """Nimmt einen erkannten Scanner-Burst an (False: gehört in das Feld, in dem er getippt wurde)"""
+        # In einem anderen Eingabefeld (Fach, Material, ...) kann auch ein Fach-/Material-Barcode gemeint sein:
+        # nur Chargen der Arbeitstabelle, bereits gescannte und Etiketten gehen dort in die Warteschlange
+        if widget is not self.scan_entry and isinstance(widget, tk.Entry):
+            try:
+                gelesen = self.engine.dekodierer.dekodieren(text)
+            except EingabeFehler:
+                gelesen = {'charge': text, 'etikett': 'unlesbar'}
+            if not (gelesen['etikett'] or self.engine.is_already_scanned(gelesen['charge'])
+                    or self.engine.suche_charge(gelesen['charge'])[0] != 'NICHT_GEFUNDEN'):
+                return False
+        self.scan_einreihen(text)
+        return True
+    
+    def scan_eingabe_abschliessen(self):
+        """ENTER bzw. "Scannen" im Scan-Feld: Inhalt in die Warteschlange"""
+        roh = self.scan_var.get()
+        self.scan_var.set("")
+        self.scan_einreihen(roh)
+    
+    def scan_einreihen(self, roh):
+        """Hängt einen Scan an die Warteschlange und arbeitet sie ab, sobald die Oberfläche frei ist"""
+        if not roh.strip():
+            self.status_var.set("Bitte Barcode eingeben oder scannen")
+            return
+        self.scan_warteschlange.append(roh)
+        self.warteschlange_anzeigen()
+        if not self.bereit:
+            self.status_var.set(f"Arbeitstabelle wird geladen... ({len(self.scan_warteschlange)} Scans vorgemerkt)")
+            return
+        self.root.after_idle(self.warteschlange_abarbeiten)
+    
+    def warteschlange_abarbeiten(self):
+        """Verarbeitet den nächsten Scan der Warteschlange, wenn kein Scan, keine Eingabemaske und kein Dialog offen ist"""
+        if (not self.bereit or self.scan_laeuft or self.current_scan is not None or not self.scan_warteschlange
+                or self.root.grab_current() is not None):
+            return
+        self.scan_var.set(self.scan_warteschlange.popleft())
+        self.warteschlange_anzeigen()
+        # Läuft während eines modalen Dialogs (NotFoundDialog) weiter: kein zweiter Scan dazwischen
+        self.scan_laeuft = True
         try:
-            if self.arbeitstabelle_path.exists():
-                # Prüfe ob beide Tabellenblätter vorhanden sind
-                try:
-                    excel_file = pd.ExcelFile(self.arbeitstabelle_path)
-                    available_sheets = excel_file.sheet_names
-                    
-                    if 'Rollen' not in available_sheets or 'Granulate' not in available_sheets:
-                        messagebox.showerror("Fehler", 
-                            f"⚠️ FEHLER: Arbeitstabelle.xlsx muss zwei Tabellenblätter haben:\n"
-                            f"- 'Rollen'\n"
-                            f"- 'Granulate'\n\n"
-                            f"Gefundene Blätter: {', '.join(available_sheets)}\n\n"
-                            f"Bitte überprüfen Sie die Datei.")
-                        sys.exit(1)
-                    
-                    # Lade Rollen-Tabellenblatt
-                    self.df_rollen = pd.read_excel(self.arbeitstabelle_path, sheet_name='Rollen', dtype={'Charge': str})
-                    if 'Charge' in self.df_rollen.columns:
-                        self.df_rollen['Charge'] = self.df_rollen['Charge'].astype(str)
-                    
-                    # Lade Granulate-Tabellenblatt
-                    self.df_granulate = pd.read_excel(self.arbeitstabelle_path, sheet_name='Granulate', dtype={'Charge': str})
-                    if 'Charge' in self.df_granulate.columns:
-                        self.df_granulate['Charge'] = self.df_granulate['Charge'].astype(str)
-                    
-                    # Umbenennen: "Materialnummer" → "Material" (für einheitliche Verarbeitung)
-                    if 'Materialnummer' in self.df_granulate.columns:
-                        self.df_granulate.rename(columns={'Materialnummer': 'Material'}, inplace=True)
-                    
-                    # Prüfe erforderliche Spalten für Rollen
-                    required_rollen_columns = ['Charge', 'Material', 'Materialkurztext', 'Länge m', 'Breite mm', 'Frei verwendbar']
-                    missing_rollen = [col for col in required_rollen_columns if col not in self.df_rollen.columns]
-                    
-                    # Prüfe erforderliche Spalten für Granulate
-                    required_granulate_columns = ['Charge', 'Material', 'Materialkurztext', 'Frei verwendbar']
-                    missing_granulate = [col for col in required_granulate_columns if col not in self.df_granulate.columns]
-                    
-                    if missing_rollen or missing_granulate:
-                        error_msg = "Fehlende Spalten:\n"
-                        if missing_rollen:
-                            error_msg += f"Rollen: {', '.join(missing_rollen)}\n"
-                        if missing_granulate:
-                            error_msg += f"Granulate: {', '.join(missing_granulate)}"
-                        messagebox.showerror("Fehler", error_msg)
-                        sys.exit(1)
-                    
-                    rollen_count = len(self.df_rollen)
-                    granulate_count = len(self.df_granulate)
-                    total_count = rollen_count + granulate_count
-                    
-                    self.logger.info(f"Arbeitstabelle geladen: {rollen_count} Rollen, {granulate_count} Granulate, {total_count} gesamt")
-                    
-                except Exception as e:
-                    messagebox.showerror("Fehler", f"Fehler beim Lesen der Excel-Datei:\n{e}")
-                    sys.exit(1)
-                    
-            else:
-                messagebox.showwarning("Warnung", 
-                    f"Arbeitstabelle nicht gefunden!\n\n"
-                    f"Bitte kopieren Sie die Arbeitstabelle.xlsx in:\n"
-                    f"{self.arbeitstabelle_path.absolute()}\n\n"
-                    f"Die Datei muss zwei Tabellenblätter enthalten:\n"
-                    f"- 'Rollen'\n"
-                    f"- 'Granulate'")
-                
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Laden der Arbeitstabelle:\n{e}")
-            self.logger.error(f"Fehler beim Laden der Arbeitstabelle: {e}")
+            self.process_scan()
+        finally:
+            self.scan_laeuft = False
+        if self.scan_warteschlange and self.current_scan is None:
+            self.root.after_idle(self.warteschlange_abarbeiten)
+    
+    def warteschlange_anzeigen(self):
+        """Zeigt die Anzahl wartender Scans in der Status-Leiste"""
+        anzahl = len(self.scan_warteschlange)
+        self.warteschlange_var.set(f"📥 {anzahl} Scan{'s' if anzahl != 1 else ''} in Warteschlange" if anzahl else "")
+    
+    def warnung_anzeigen(self, text):
+        """Zeigt eine Warnung unter dem Scan-Feld (ohne Dialog, damit folgende Scans nicht verloren gehen)"""
+        self.warnung_var.set(f"⚠️ {text}")
+        self.root.bell()
+        if self.warnung_auftrag is not None:
+            self.root.after_cancel(self.warnung_auftrag)
+        self.warnung_auftrag = self.root.after(15000, lambda: self.warnung_var.set(""))
+    
+    def start_fortschritt(self, prozent, text=None):
+        """Zeigt den Fortschritt des Hintergrundstarts an (None blendet die Anzeige aus)"""
+        if prozent is None:
+            self.start_progress.grid_remove()
+            return
+        self.start_progress['value'] = prozent
+        if text:
+            if self.scan_warteschlange:
+                text += f" ({len(self.scan_warteschlange)} Scans vorgemerkt)"
+            self.status_var.set(text)
     
     def setup_ui(self):
         """Erstellt die Benutzeroberfläche"""
@@ -257,17 +408,22 @@ class InventurApp:
                                foreground="#1f4e79")
         title_label.grid(row=0, column=1)
         
-        # Info (rechts)
-        if self.df_rollen is not None and self.df_granulate is not None:
-            rollen_count = len(self.df_rollen)
-            granulate_count = len(self.df_granulate)
+        # Info (rechts, wird nach dem Laden der Arbeitstabelle aktualisiert)
+        self.info_label = ttk.Label(header_frame, text="Arbeitstabelle wird geladen...", font=("Arial", 10))
+        self.info_label.grid(row=0, column=2, padx=(20, 0))
+    
+    def update_info_label(self):
+        """Zeigt die Anzahl der Artikel in der Arbeitstabelle im Header an"""
+        if self.engine.stamm_rollen is not None and self.engine.stamm_granulate is not None:
+            rollen_count = len(self.engine.stamm_rollen)
+            granulate_count = len(self.engine.stamm_granulate)
             total_count = rollen_count + granulate_count
             info_text = f"DB: {rollen_count} 🔵 Rollen, {granulate_count} 🟨 Granulate ({total_count} gesamt)"
+            if self.engine.partition.aktiv:
+                info_text += f" · 🏭 {self.engine.partition}"
         else:
             info_text = "Keine Arbeitstabelle"
-        
-        info_label = ttk.Label(header_frame, text=info_text, font=("Arial", 10))
-        info_label.grid(row=0, column=2, padx=(20, 0))
+        self.info_label.config(text=info_text)
     
     def create_scan_section(self):
         """Erstellt den Barcode-Scan-Bereich"""
@@ -285,11 +441,11 @@ class InventurApp:
         self.scan_entry.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
         
         # Scan-Button (falls Scanner kein Enter sendet)
-        scan_button = ttk.Button(scan_frame, text="Scannen", command=self.process_scan)
+        scan_button = ttk.Button(scan_frame, text="Scannen", command=self.scan_eingabe_abschliessen)
         scan_button.grid(row=0, column=1)
         
         # Enter-Binding
-        self.scan_entry.bind('<Return>', lambda e: self.process_scan())
+        self.scan_entry.bind('<Return>', lambda e: self.scan_eingabe_abschliessen())
         
         # Info-Label
         info_label = ttk.Label(scan_frame, 
@@ -297,6 +453,12 @@ class InventurApp:
                               font=("Arial", 9),
                               foreground="gray")
         info_label.grid(row=1, column=0, columnspan=2, pady=(5, 0))
+        
+        # Warnungen zum Scan (bereits gescannt, Etikett unlesbar) ohne blockierenden Dialog
+        self.warnung_var = tk.StringVar()
+        warnung_label = ttk.Label(scan_frame, textvariable=self.warnung_var, font=("Arial", 11, "bold"),
+                                  foreground="red", wraplength=900)
+        warnung_label.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
     
     def create_current_scan_section(self):
         """Erstellt den Bereich für den aktuellen Scan"""
@@ -479,28 +641,6 @@ class InventurApp:
             widget.destroy()
         self.input_widgets.clear()
     
-    def validiere_breite(self, breite_text):
-        """Validiert Breite-Eingabe (1-4 stellige Zahl)"""
-        try:
-            breite = int(breite_text.strip())
-            if 1 <= breite <= 9999:  # 1-4 stellig
-                return True, breite
-            else:
-                return False, "Breite muss zwischen 1 und 9999 mm liegen!"
-        except ValueError:
-            return False, "Breite muss eine gültige Zahl sein!"
-    
-    def validiere_gewicht(self, gewicht_text):
-        """Validiert Gewichts-Eingabe (positive Dezimalzahl)"""
-        try:
-            gewicht = float(gewicht_text.strip().replace(',', '.'))
-            if gewicht > 0:
-                return True, gewicht
-            else:
-                return False, "Zählmenge muss größer als 0 sein!"
-        except ValueError:
-            return False, "Zählmenge muss eine gültige Zahl sein!"
-    
     def create_list_section(self):
         """Erstellt die Liste der gescannten Artikel"""
         # List-Frame
@@ -517,6 +657,12 @@ class InventurApp:
         self.count_label = ttk.Label(count_frame, text="0 Artikel", font=("Arial", 12, "bold"))
         self.count_label.pack(side=tk.LEFT)
         
+        # Fortschritt: Durchsatz, erfasster Anteil der Arbeitstabelle und Restzeit
+        self.statistik_var = tk.StringVar()
+        statistik_label = ttk.Label(count_frame, textvariable=self.statistik_var, font=("Arial", 11))
+        statistik_label.pack(side=tk.RIGHT)
+        self.statistik_id = None
+        
         # Treeview für Artikelliste
         columns = ('Zeit', 'Charge', 'Material', 'Typ', 'Fach', 'Status')
         self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=15)
@@ -540,14 +686,21 @@ class InventurApp:
         self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Scrollbars
-        v_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        v_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
-        self.tree.configure(yscrollcommand=v_scrollbar.set)
+        self.v_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.v_scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        self.tree.configure(yscrollcommand=self.v_scrollbar.set)
         
         h_scrollbar = ttk.Scrollbar(list_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
         h_scrollbar.grid(row=2, column=0, sticky=(tk.W, tk.E))
         self.tree.configure(xscrollcommand=h_scrollbar.set)
         
+        # Zuordnung Treeview-Zeile ↔ Datensatz (für inkrementelle Updates und Löschen)
+        self.tree_records = {}
+        self.tree_items = {}
+        
+        # Virtualisierte Darstellung ab 'virtuelle_liste_ab' Einträgen (wird bei Bedarf aktiviert)
+        self.virtuelle_liste = None
+        
         # Kontextmenü
         self.tree.bind('<Button-3>', self.show_context_menu)
         self.tree.bind('<Double-1>', self.edit_entry)
@@ -561,142 +714,157 @@ class InventurApp:
         export_button = ttk.Button(button_frame, text="💾 Inventur exportieren", command=self.export_inventur)
         export_button.grid(row=0, column=0, padx=(0, 10))
         
+        # Batch-Import (Speicherauszug des Scanners)
+        import_button = ttk.Button(button_frame, text="📥 Batch-Import", command=self.batch_import)
+        import_button.grid(row=0, column=1, padx=(0, 10))
+        
+        # Soll/Ist-Abgleich gegen die Arbeitstabelle
+        abgleich_button = ttk.Button(button_frame, text="📊 Soll/Ist-Abgleich", command=self.abgleich_erstellen)
+        abgleich_button.grid(row=0, column=2, padx=(0, 10))
+        
         # Vollbild-Toggle
         fullscreen_button = ttk.Button(button_frame, text="🖥️ Vollbild", command=self.toggle_fullscreen)
-        fullscreen_button.grid(row=0, column=1, padx=(0, 10))
+        fullscreen_button.grid(row=0, column=3, padx=(0, 10))
         
         # Beenden-Button
         exit_button = ttk.Button(button_frame, text="❌ Programm beenden", command=self.quit_app)
-        exit_button.grid(row=0, column=2)
+        exit_button.grid(row=0, column=4)
     
     def create_status_bar(self):
         """Erstellt die Status-Leiste"""
         self.status_var = tk.StringVar()
         self.status_var.set("Bereit zum Scannen...")
         
-        status_bar = ttk.Label(self.root, textvariable=self.status_var, 
+        status_frame = ttk.Frame(self.root)
+        status_frame.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        status_frame.columnconfigure(0, weight=1)
+        
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, 
                               relief=tk.SUNKEN, anchor=tk.W, font=("Arial", 9))
-        status_bar.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        status_bar.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        
+        # Anzeige für ausstehende/fehlgeschlagene Schreibvorgänge
+        self.persistenz_var = tk.StringVar()
+        self.persistenz_var.set("💾 gespeichert")
+        self.persistenz_label = ttk.Label(status_frame, textvariable=self.persistenz_var,
+                                         relief=tk.SUNKEN, anchor=tk.E, font=("Arial", 9))
+        self.persistenz_label.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        
+        # Fortschritt des Hintergrundstarts (wird danach ausgeblendet)
+        self.start_progress = ttk.Progressbar(status_frame, mode='determinate', length=200, maximum=100)
+        self.start_progress.grid(row=0, column=2, sticky=(tk.W, tk.E))
+        
+        # Anzahl wartender Scans (leer, wenn die Warteschlange leer ist)
+        self.warteschlange_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.warteschlange_var, relief=tk.SUNKEN, anchor=tk.E,
+                  font=("Arial", 9, "bold")).grid(row=0, column=3, sticky=(tk.W, tk.E))
     
     def bind_shortcuts(self):
         """Bindet Tastenkürzel"""
         self.root.bind('<Control-z>', lambda e: self.undo_last_action())
         self.root.bind('<Control-Z>', lambda e: self.undo_last_action())
+        self.root.bind('<Control-y>', lambda e: self.redo_last_action())
+        self.root.bind('<Control-Y>', lambda e: self.redo_last_action())
         self.root.bind('<Control-s>', lambda e: self.manual_save())
         self.root.bind('<Control-S>', lambda e: self.manual_save())
         self.root.bind('<Escape>', lambda e: self.reset_scan())
         self.root.bind('<F11>', lambda e: self.toggle_fullscreen())
+        self.root.bind('<F9>', lambda e: self.diagnose_anzeigen())
+        self.root.protocol('WM_DELETE_WINDOW', self.quit_app)
         
         # Fokus immer zurück zum Scan-Feld
         self.root.bind('<FocusIn>', self.ensure_scan_focus)
     
-    def suche_charge(self, charge_nummer):
-        """Sucht Charge in beiden Tabellenblättern und gibt Typ zurück"""
-        # 1. Zuerst in Rollen suchen
-        if self.df_rollen is not None:
-            ergebnis_rolle = self.df_rollen[self.df_rollen['Charge'] == str(charge_nummer)]
-            if not ergebnis_rolle.empty:
-                return ('ROLLE', ergebnis_rolle.iloc[0].to_dict())
-        
-        # 2. Dann in Granulate suchen
-        if self.df_granulate is not None:
-            ergebnis_granulat = self.df_granulate[self.df_granulate['Charge'] == str(charge_nummer)]
-            if not ergebnis_granulat.empty:
-                return ('GRANULAT', ergebnis_granulat.iloc[0].to_dict())
-        
-        # 3. Nicht gefunden
-        return ('NICHT_GEFUNDEN', None)
-    
     def process_scan(self):
-        """Verarbeitet einen gescannten Barcode"""
-        charge = self.scan_var.get().strip()
+        """Verarbeitet einen gescannten Barcode (aus scan_var; normal über warteschlange_abarbeiten)"""
+        roh = self.scan_var.get()
         
-        if not charge:
+        if not roh.strip():
             self.status_var.set("Bitte Barcode eingeben oder scannen")
             return
         
+        # Während des Starts: Scan vormerken und nach dem Laden verarbeiten
+        if not self.bereit:
+            self.scan_var.set("")
+            self.scan_einreihen(roh)
+            return
+        
+        messung = self.engine.messung
+        
+        # Etiketteninhalt zerlegen (GS1 oder Regeln aus den Einstellungen), sonst ist alles die Charge
+        try:
+            with messung.phase('dekodieren'):
+                gelesen = self.engine.dekodierer.dekodieren(roh)
+        except EingabeFehler as e:
+            self.reset_scan()
+            self.warnung_anzeigen(f"Etikett nicht lesbar: {e}")
+            self.logger.warning(f"Etikett nicht lesbar: {roh!r} ({e})")
+            return
+        charge = gelesen['charge']
+        
         # Prüfe ob Charge bereits gescannt wurde
-        if self.is_already_scanned(charge):
-            messagebox.showwarning("Bereits gescannt", 
-                f"Die Ware mit Charge {charge} wurde bereits eingescannt!\n\n"
-                f"Bitte prüfen Sie die Liste der gescannten Artikel.")
+        with messung.phase('duplikat'):
+            bereits_gescannt = self.engine.is_already_scanned(charge)
+        if bereits_gescannt:
+            station = self.engine.fremde_station(charge)
             self.reset_scan()
+            if station:
+                self.warnung_anzeigen(f"Die Ware mit Charge {charge} wurde bereits an Station {station} eingescannt!")
+            else:
+                self.warnung_anzeigen(f"Die Ware mit Charge {charge} wurde bereits eingescannt! "
+                                      f"Bitte prüfen Sie die Liste der gescannten Artikel.")
+            self.logger.info(f"Doppelscan abgewiesen: {charge}")
             return
         
-        self.logger.info(f"Scan verarbeitet: {charge}")
+        self.logger.info(f"Scan verarbeitet: {charge}" + (f" (Etikett {gelesen['etikett']})" if gelesen['etikett'] else ""))
         
         # Suche mit neuer Typ-Erkennung
         try:
-            # Suche nach Charge als String (behält führende Nullen)
-            typ, data = self.suche_charge(charge)
-            
-            # Falls nicht gefunden, versuche auch ohne führende Nullen
-            if typ == 'NICHT_GEFUNDEN':
-                try:
-                    charge_int = str(int(charge))  # Entfernt führende Nullen
-                    typ, data = self.suche_charge(charge_int)
-                    if typ != 'NICHT_GEFUNDEN':
-                        charge = charge_int  # Verwende bereinigte Charge
-                except ValueError:
-                    pass
+            # Suche nach Charge als String (Index deckt auch die Variante ohne führende Nullen ab)
+            with messung.phase('suche'):
+                typ, data = self.engine.suche_charge(charge)
+            if typ != 'NICHT_GEFUNDEN':
+                charge = str(data['Charge']).strip()  # Verwende Charge laut Arbeitstabelle
+            # Charge eines anderen Werks/Lagerorts: wird erfasst, aber deutlich angezeigt
+            fremd = self.engine.fremde_partition(data)
             
             if typ == 'ROLLE':
                 # Rolle gefunden
-                self.show_found_rolle(data, charge)
+                with messung.phase('anzeige'):
+                    self.show_found_rolle(data, charge)
             elif typ == 'GRANULAT':
                 # Granulat gefunden
-                self.show_found_granulat(data, charge)
+                with messung.phase('anzeige'):
+                    self.show_found_granulat(data, charge, gelesen['zahlmenge'])
             else:
                 # Ware nicht gefunden
-                self.show_not_found_dialog(charge)
+                if self.engine.fremde_laedt():
+                    self.warnung_anzeigen(f"Charge {charge} nicht gefunden "
+                                          "(andere Werke/Lagerorte werden noch geladen)")
+                self.show_not_found_dialog(charge, gelesen['material'])
+            if fremd:
+                self.warnung_anzeigen(f"Charge {charge} gehört zu {fremd}, nicht zu {self.engine.partition}")
                 
         except Exception as e:
             messagebox.showerror("Fehler", f"Fehler bei der Suche: {e}")
             self.logger.error(f"Fehler bei Suche: {e}")
             self.reset_scan()
     
-    def is_already_scanned(self, charge):
-        """Prüft ob eine Charge bereits gescannt wurde"""
-        # Prüfe in allen Listen
-        all_lists = [
-            self.inventur_rollen_data,
-            self.inventur_granulat_data,
-            self.nicht_gefunden_rollen_data,
-            self.nicht_gefunden_granulat_data
-        ]
-        
-        for item_list in all_lists:
-            for item in item_list:
-                if str(item.get('charge', '')) == str(charge):
-                    return True
-        
-        return False
-    
     def show_found_rolle(self, item, charge):
         """Zeigt gefundene Rolle an (BLAU)"""
         self.current_type = 'ROLLE'
-        self.current_scan = {
-            'charge': charge,
-            'material': str(item.get('Material', '')),
-            'kurztext': str(item.get('Materialkurztext', '')),
-            'laenge': float(item.get('Länge m', 0)),
-            'breite_original': int(item.get('Breite mm', 0)),  # Original aus Arbeitstabelle
-            'flaeche': float(item.get('Frei verwendbar', 0)),
-            'fach_original': str(item.get('Fach', '') if pd.notna(item.get('Fach')) else ''),  # Original aus Arbeitstabelle
-            'status': 'gefunden',
-            'typ': 'ROLLE'
-        }
+        self.current_scan = RollenEintrag.aus_stammdaten(item, charge)
         
         # Ändere Hintergrundfarbe zu BLAU
         self.current_frame.config(text="🔵 ROLLE GESCANNT")
         
         # Aktualisiere Labels (OHNE Breite mm Anzeige!)
         self.charge_label.config(text=charge)
-        self.material_label.config(text=self.current_scan['material'])
-        self.kurztext_label.config(text=self.current_scan['kurztext'])
-        self.laenge_label.config(text=f"{self.current_scan['laenge']:.2f} m")
+        self.material_label.config(text=self.current_scan.material)
+        self.kurztext_label.config(text=self.current_scan.kurztext)
+        self.laenge_label.config(text=f"{self.current_scan.laenge:.2f} m")
         self.breite_label.config(text="")  # NICHT anzeigen!
-        self.flaeche_label.config(text=f"{self.current_scan['flaeche']:.2f} m²")
+        self.flaeche_label.config(text=f"{self.current_scan.flaeche:.2f} m²")
         
         # Zeige Current-Scan-Frame mit blauem Hintergrund
         self.current_frame.grid()
@@ -705,85 +873,77 @@ class InventurApp:
         self.create_rolle_inputs()
         
         # Status aktualisieren
-        self.status_var.set(f"🔵 Rolle gefunden: {self.current_scan['kurztext']}")
+        self.status_var.set(f"🔵 Rolle gefunden: {self.current_scan.kurztext}")
         
         # Scan-Feld leeren
         self.scan_var.set("")
     
-    def show_found_granulat(self, item, charge):
-        """Zeigt gefundenes Granulat an (GELB)"""
+    def show_found_granulat(self, item, charge, zahlmenge=None):
+        """Zeigt gefundenes Granulat an (GELB), zahlmenge: Nettogewicht vom Etikett als Vorgabe"""
         self.current_type = 'GRANULAT'
-        self.current_scan = {
-            'charge': charge,
-            'material': str(item.get('Material', '')),
-            'kurztext': str(item.get('Materialkurztext', '')),
-            'frei_verwendbar_kg': float(item.get('Frei verwendbar', 0)),  # Soll-Gewicht
-            'status': 'gefunden',
-            'typ': 'GRANULAT'
-        }
+        self.current_scan = GranulatEintrag.aus_stammdaten(item, charge)
         
         # Ändere Hintergrundfarbe zu GELB
         self.current_frame.config(text="🟨 GRANULAT GESCANNT")
         
         # Aktualisiere Labels (nur relevante für Granulat)
         self.charge_label.config(text=charge)
-        self.material_label.config(text=self.current_scan['material'])
-        self.kurztext_label.config(text=self.current_scan['kurztext'])
+        self.material_label.config(text=self.current_scan.material)
+        self.kurztext_label.config(text=self.current_scan.kurztext)
         self.laenge_label.config(text="")  # Nicht relevant für Granulat
         self.breite_label.config(text="")  # Nicht relevant für Granulat
-        self.flaeche_label.config(text=f"{self.current_scan['frei_verwendbar_kg']:.2f} KG")
+        self.flaeche_label.config(text=f"{self.current_scan.frei_verwendbar_kg:.2f} KG")
         
         # Zeige Current-Scan-Frame mit gelbem Hintergrund
         self.current_frame.grid()
         
         # Erstelle Granulat-Eingabefelder
         self.create_granulat_inputs()
+        if zahlmenge is not None:
+            self.zahlmenge_var.set(f"{zahlmenge:.3f}".rstrip('0').rstrip('.').replace('.', ','))
         
         # Status aktualisieren
-        self.status_var.set(f"🟨 Granulat gefunden: {self.current_scan['kurztext']}")
+        self.status_var.set(f"🟨 Granulat gefunden: {self.current_scan.kurztext}")
         
         # Scan-Feld leeren
         self.scan_var.set("")
     
-    def show_not_found_dialog(self, charge):
-        """Zeigt Dialog für nicht gefundene Ware (V2 mit Typ-Auswahl)"""
-        dialog = NotFoundDialog(self.root, charge)
-        
-        if dialog.result:
+    def show_not_found_dialog(self, charge, material=None):
+        """Zeigt Dialog für nicht gefundene Ware (V2 mit Typ-Auswahl), material: Vorgabe vom Etikett"""
+        # Beschädigtes oder nur teilweise gelesenes Etikett: passende Chargen zur Auswahl anbieten
+        vorschlaege = []
+        for typ, item, art, abstand in self.engine.vorschlaege(charge):
+            kurztext = item.get('Materialkurztext', '')
+            vorschlaege.append((str(item['Charge']).strip(), typ, kurztext if isinstance(kurztext, str) else '',
+                                vorschlag_text(art, abstand), self.engine.is_already_scanned(item['Charge'])))
+        dialog = NotFoundDialog(self.root, charge, vorschlaege, material)
+        
+        if dialog.vorschlag:
+            # Gewählte Charge wie einen normalen Scan verarbeiten (inkl. Duplikatprüfung)
+            self.logger.info(f"Vorschlag {dialog.vorschlag} für gelesene Charge {charge} gewählt")
+            self.scan_var.set(dialog.vorschlag)
+            self.process_scan()
+        elif dialog.result:
             # Setze aktuellen Scan mit manuellen Daten
-            self.current_scan = dialog.result.copy()
+            self.current_scan = InventurEintrag.aus_dict(dialog.result)
             self.current_type = dialog.result['typ']
             
-            # Füge Zeitstempel hinzu
-            self.current_scan['zeitstempel'] = datetime.now().strftime('%d.%m.%Y %H:%M:%S')
+            # Zeitstempel, Datenliste, Undo und Journal übernimmt der Kern
+            eintrag = self.engine.erfassen(self.current_scan)
+            typ_icon = "🔵" if self.current_type == 'ROLLE' else "🟨"
+            self.nach_aenderung()
             
-            # Speichere in entsprechende Liste basierend auf Typ
-            if self.current_type == 'ROLLE':
-                self.nicht_gefunden_rollen_data.append(self.current_scan.copy())
-                typ_icon = "🔵"
-            elif self.current_type == 'GRANULAT':
-                self.nicht_gefunden_granulat_data.append(self.current_scan.copy())
-                typ_icon = "🟨"
-            
-            # Zur Undo-Liste hinzufügen
-            self.undo_stack.append(('add', self.current_scan.copy(), self.current_type))
-            if len(self.undo_stack) > 50:
-                self.undo_stack.pop(0)
-            
-            # In Excel speichern (Auto-Save)
-            if self.config.get('auto_save', True):
-                self.save_to_excel()
-            
-            # Liste aktualisieren
-            self.update_list()
+            # Nur die neue Zeile einfügen
+            with self.engine.messung.phase('liste'):
+                self.liste_eintrag_einfuegen(eintrag)
+                self.update_count_label()
             
             # Status aktualisieren
-            total_rollen = len(self.inventur_rollen_data) + len(self.nicht_gefunden_rollen_data)
-            total_granulat = len(self.inventur_granulat_data) + len(self.nicht_gefunden_granulat_data)
+            total_rollen, total_granulat = self.engine.anzahl()
             total_scans = total_rollen + total_granulat
             
             self.status_var.set(f"{typ_icon} Nicht gefundene Ware gespeichert. Gesamt: {total_scans} ({total_rollen} Rollen, {total_granulat} Granulate)")
-            self.logger.info(f"{self.current_type} nicht gefunden gespeichert: {self.current_scan['charge']}")
+            self.logger.info(f"{self.current_type} nicht gefunden gespeichert: {self.current_scan.charge}")
             
             # Reset für nächsten Scan
             self.reset_scan()
@@ -796,55 +956,20 @@ class InventurApp:
         if not self.current_scan or not self.current_type:
             return
         
-        if self.current_type == 'ROLLE':
-            # Validierung für Rollen
-            fach = self.fach_var.get().strip()
-            if not fach:
-                messagebox.showwarning("Warnung", "⚠️ Fach (Lagerort) ist ein Pflichtfeld für Rollen!")
-                if 'fach_entry' in self.input_widgets:
-                    self.input_widgets['fach_entry'].focus_set()
-                return
-            
-            breite_text = self.breite_kontrolliert_var.get().strip()
-            if not breite_text:
-                messagebox.showwarning("Warnung", "⚠️ Breite kontrolliert ist ein Pflichtfeld!")
-                if 'breite_entry' in self.input_widgets:
-                    self.input_widgets['breite_entry'].focus_set()
-                return
-            
-            # Validiere Breite
-            valid, result = self.validiere_breite(breite_text)
-            if not valid:
-                messagebox.showerror("Fehler", f"⚠️ {result}")
-                if 'breite_entry' in self.input_widgets:
-                    self.input_widgets['breite_entry'].focus_set()
-                return
-            
-            # Füge Rollen-spezifische Daten hinzu
-            self.current_scan['fach_kontrolliert'] = fach
-            self.current_scan['breite_kontrolliert'] = result
-            self.current_scan['bemerkung'] = self.bemerkung_var.get().strip()
-            
-        elif self.current_type == 'GRANULAT':
-            # Validierung für Granulat
-            zahlmenge_text = self.zahlmenge_var.get().strip()
-            if not zahlmenge_text:
-                messagebox.showwarning("Warnung", "⚠️ Zählmenge ist ein Pflichtfeld!")
-                if 'zahlmenge_entry' in self.input_widgets:
-                    self.input_widgets['zahlmenge_entry'].focus_set()
-                return
-            
-            # Validiere Gewicht
-            valid, result = self.validiere_gewicht(zahlmenge_text)
-            if not valid:
-                messagebox.showerror("Fehler", f"⚠️ {result}")
-                if 'zahlmenge_entry' in self.input_widgets:
-                    self.input_widgets['zahlmenge_entry'].focus_set()
-                return
-            
-            # Füge Granulat-spezifische Daten hinzu
-            self.current_scan['zahlmenge_kg'] = result
-            self.current_scan['bemerkung'] = self.bemerkung_var.get().strip()
+        # Pflichtfelder und Werte prüft der Kern (Fach/Breite bei Rollen, Zählmenge bei Granulat)
+        try:
+            with self.engine.messung.phase('pruefung'):
+                eingaben_uebernehmen(self.current_scan,
+                                     fach=self.fach_var.get(),
+                                     breite=self.breite_kontrolliert_var.get(),
+                                     zahlmenge=self.zahlmenge_var.get(),
+                                     bemerkung=self.bemerkung_var.get())
+        except EingabeFehler as e:
+            # Kein Dialog: ein währenddessen gescannter nächster Artikel ginge sonst im Dialog verloren
+            self.warnung_anzeigen(str(e))
+            if f'{e.feld}_entry' in self.input_widgets:
+                self.input_widgets[f'{e.feld}_entry'].focus_set()
+            return
         
         # Speichere in Datenstrukturen
         self.save_scan_to_data()
@@ -857,42 +982,23 @@ class InventurApp:
         if not self.current_scan or not self.current_type:
             return
         
-        # Zeitstempel hinzufügen
-        self.current_scan['zeitstempel'] = datetime.now().strftime('%d.%m.%Y %H:%M:%S')
-        
-        # Zu entsprechender Liste hinzufügen basierend auf Typ und Status
-        if self.current_type == 'ROLLE':
-            if self.current_scan['status'] == 'gefunden':
-                self.inventur_rollen_data.append(self.current_scan.copy())
-            else:
-                self.nicht_gefunden_rollen_data.append(self.current_scan.copy())
-        elif self.current_type == 'GRANULAT':
-            if self.current_scan['status'] == 'gefunden':
-                self.inventur_granulat_data.append(self.current_scan.copy())
-            else:
-                self.nicht_gefunden_granulat_data.append(self.current_scan.copy())
-        
-        # Zur Undo-Liste hinzufügen
-        self.undo_stack.append(('add', self.current_scan.copy(), self.current_type))
-        if len(self.undo_stack) > 50:  # Begrenze Undo-Stack
-            self.undo_stack.pop(0)
-        
-        # In Excel speichern (Auto-Save)
-        if self.config.get('auto_save', True):
-            self.save_to_excel()
+        # Zeitstempel, Datenliste, Undo und Journal übernimmt der Kern (Excel gebündelt per Auto-Save)
+        eintrag = self.engine.erfassen(self.current_scan)
+        self.nach_aenderung()
         
-        # Liste aktualisieren
-        self.update_list()
+        # Nur die neue Zeile einfügen
+        with self.engine.messung.phase('liste'):
+            self.liste_eintrag_einfuegen(eintrag)
+            self.update_count_label()
         
         # Status aktualisieren
-        total_rollen = len(self.inventur_rollen_data) + len(self.nicht_gefunden_rollen_data)
-        total_granulat = len(self.inventur_granulat_data) + len(self.nicht_gefunden_granulat_data)
+        total_rollen, total_granulat = self.engine.anzahl()
         total_scans = total_rollen + total_granulat
         
         typ_icon = "🔵" if self.current_type == 'ROLLE' else "🟨"
         self.status_var.set(f"{typ_icon} Artikel gespeichert. Gesamt: {total_scans} ({total_rollen} Rollen, {total_granulat} Granulate)")
         
-        self.logger.info(f"{self.current_type} gespeichert: {self.current_scan['charge']}")
+        self.logger.info(f"{self.current_type} gespeichert: {self.current_scan.charge}")
     
     def reset_scan(self):
         """Setzt den aktuellen Scan zurück"""
@@ -914,6 +1020,14 @@ class InventurApp:
         self.scan_entry.focus_set()
         
         self.status_var.set("Bereit zum Scannen...")
+        
+        # Wartende Scans (Startphase oder während Maske/Dialog gescannt) nacheinander abarbeiten
+        if self.scan_warteschlange:
+            self.root.after_idle(self.warteschlange_abarbeiten)
+        
+        # Offene Arbeitsliste (Batch-Import) nachführen
+        if self.arbeitsliste is not None:
+            self.arbeitsliste.aktualisieren()
     
     def on_field_change(self, event=None):
         """Wird aufgerufen wenn Fach oder Bemerkung geändert wird"""
@@ -928,448 +1042,432 @@ class InventurApp:
             pass  # Wird durch save_current_scan() erledigt
     
     def update_list(self):
-        """Aktualisiert die Artikelliste mit neuer Struktur"""
-        # Lösche alle Einträge
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Baut die Artikelliste komplett neu auf (nur auf ausdrückliche Anforderung, z.B. nach dem Laden)"""
+        # Kombiniere alle Listen
+        all_items = self.engine.alle_eintraege()
+        
+        # Sortiere nach Zeitstempel (neueste zuerst, auch über Tagesgrenzen)
+        all_items.sort(key=zeit_schluessel, reverse=True)
+        
+        # Ab der konfigurierten Anzahl virtualisiert darstellen
+        if len(all_items) > self.config.get('virtuelle_liste_ab', 5000):
+            if self.virtuelle_liste is None:
+                self.tree.delete(*self.tree.get_children())
+                self.tree_items.clear()
+                self.virtuelle_liste = VirtuelleListe(self.tree, self.v_scrollbar,
+                                                      self.liste_werte, self.tree_records)
+                self.logger.info(f"Virtualisierte Artikelliste aktiviert ({len(all_items)} Einträge)")
+            self.virtuelle_liste.neu_aufbauen(all_items)
+            self.update_count_label()
+            return
         
-        # Kombiniere alle Listen mit Typ-Information
-        all_items = []
+        if self.virtuelle_liste is not None:
+            self.virtuelle_liste_beenden()
         
-        # Rollen - gefunden
-        for item in self.inventur_rollen_data:
-            all_items.append((item, 'Gefunden', 'ROLLE'))
+        # Lösche alle Einträge
+        self.tree.delete(*self.tree.get_children())
+        self.tree_records.clear()
+        self.tree_items.clear()
         
-        # Rollen - nicht gefunden
-        for item in self.nicht_gefunden_rollen_data:
-            all_items.append((item, 'Nicht gefunden', 'ROLLE'))
+        # Füge zur TreeView hinzu
+        for item_data in all_items:
+            self.liste_eintrag_einfuegen(item_data, 'end')
         
-        # Granulat - gefunden
-        for item in self.inventur_granulat_data:
-            all_items.append((item, 'Gefunden', 'GRANULAT'))
+        self.update_count_label()
+    
+    def virtuelle_liste_beenden(self):
+        """Schaltet zurück auf den normalen Treeview mit allen Zeilen"""
+        self.tree.delete(*self.tree.get_children())
+        self.tree_records.clear()
+        for sequenz in ('<Configure>', '<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.unbind(sequenz)
+        self.v_scrollbar.configure(command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.v_scrollbar.set)
+        self.virtuelle_liste = None
+    
+    def liste_werte(self, item_data):
+        """Gibt die Treeview-Spaltenwerte für einen Eintrag zurück"""
+        typ = item_data.typ
         
-        # Granulat - nicht gefunden
-        for item in self.nicht_gefunden_granulat_data:
-            all_items.append((item, 'Nicht gefunden', 'GRANULAT'))
+        # Typ-Icon
+        typ_icon = "🔵 Rolle" if typ == 'ROLLE' else "🟨 Granu"
         
-        # Sortiere nach Zeitstempel (neueste zuerst)
-        all_items.sort(key=lambda x: x[0]['zeitstempel'], reverse=True)
+        # Fach-Information (unterschiedlich je nach Typ)
+        if typ == 'ROLLE':
+            fach_info = item_data.fach_kontrolliert
+        else:
+            fach_info = '-'  # Granulat hat kein Fach
+        
+        # Status-Icon (🔄: Zeile der Arbeitstabelle hat sich nach dem Scan geändert)
+        status = '✅ Gefunden' if item_data.status == 'gefunden' else '⚠️ Nicht gefunden'
+        if self.engine.stammdaten_hinweis(item_data):
+            status += ' 🔄'
+        
+        return (
+            item_data.zeitstempel.split()[1],  # Nur Zeit anzeigen
+            item_data.charge,
+            item_data.material,
+            typ_icon,
+            fach_info,
+            status
+        )
+    
+    def liste_eintrag_einfuegen(self, item_data, position=0):
+        """Fügt nur die Zeile eines Eintrags ein (neue Scans oben)"""
+        if self.virtuelle_liste is not None:
+            self.virtuelle_liste.einfuegen(item_data, position)
+            return
         
-        # Füge zur TreeView hinzu
-        for item_data, status, typ in all_items:
-            # Typ-Icon
-            typ_icon = "🔵 Rolle" if typ == 'ROLLE' else "🟨 Granu"
-            
-            # Fach-Information (unterschiedlich je nach Typ)
-            if typ == 'ROLLE':
-                fach_info = item_data.get('fach_kontrolliert', item_data.get('fach', ''))
-            else:
-                fach_info = '-'  # Granulat hat kein Fach
-            
-            values = (
-                item_data['zeitstempel'].split()[1],  # Nur Zeit anzeigen
-                item_data['charge'],
-                item_data['material'],
-                typ_icon,
-                fach_info,
-                status
-            )
-            
-            item_id = self.tree.insert('', 'end', values=values)
-            
-            # Status-Icon setzen
-            if status == 'Nicht gefunden':
-                self.tree.set(item_id, 'Status', '⚠️ Nicht gefunden')
-            else:
-                self.tree.set(item_id, 'Status', '✅ Gefunden')
+        # Schwelle überschritten → einmalig in die virtualisierte Darstellung wechseln
+        if len(self.tree_items) >= self.config.get('virtuelle_liste_ab', 5000):
+            self.update_list()
+            return
         
-        # Anzahl aktualisieren
-        total_rollen = len(self.inventur_rollen_data) + len(self.nicht_gefunden_rollen_data)
-        total_granulat = len(self.inventur_granulat_data) + len(self.nicht_gefunden_granulat_data)
+        item_id = self.tree.insert('', position, values=self.liste_werte(item_data))
+        self.tree_records[item_id] = item_data
+        self.tree_items[id(item_data)] = item_id
+    
+    def liste_eintrag_einsortieren(self, item_data):
+        """Fügt die Zeile eines wieder hinzugefügten Eintrags (Rückgängig/Wiederholen) nach Zeitstempel ein"""
+        if self.virtuelle_liste is not None:
+            zeilen = self.virtuelle_liste.eintraege
+        else:
+            zeilen = [self.tree_records[item_id] for item_id in self.tree.get_children()]
+        self.liste_eintrag_einfuegen(item_data, einfuege_position(zeilen, item_data, neueste_zuerst=True))
+    
+    def liste_eintrag_aktualisieren(self, item_data):
+        """Aktualisiert nur die Spaltenwerte eines Eintrags (virtualisiert: beim nächsten Rendern)"""
+        item_id = self.tree_items.get(id(item_data))
+        if self.virtuelle_liste is None and item_id is not None:
+            self.tree.item(item_id, values=self.liste_werte(item_data))
+    
+    def liste_eintrag_entfernen(self, item_data):
+        """Entfernt nur die Zeile eines Eintrags"""
+        if self.virtuelle_liste is not None:
+            self.virtuelle_liste.entfernen(item_data)
+            return
+        
+        item_id = self.tree_items.pop(id(item_data), None)
+        if item_id is not None:
+            self.tree_records.pop(item_id, None)
+            self.tree.delete(item_id)
+    
+    def update_count_label(self):
+        """Aktualisiert die Artikel-Anzahl über der Liste"""
+        total_rollen, total_granulat = self.engine.anzahl()
         total = total_rollen + total_granulat
         
         self.count_label.config(text=f"{total} Artikel (🔵 {total_rollen} Rollen, 🟨 {total_granulat} Granulate)")
+        self.statistik_anzeigen()
     
-    def save_to_excel(self):
-        """Speichert Daten in separate Excel-Dateien für Rollen und Granulat"""
-        try:
-            # Speichere Rollen-Datei
-            self.save_rollen_excel()
-            
-            # Speichere Granulat-Datei
-            self.save_granulat_excel()
-            
-            self.logger.info("Excel-Dateien gespeichert")
-            
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Speichern der Excel-Dateien:\n{e}")
-            self.logger.error(f"Fehler beim Speichern: {e}")
-    
-    def save_rollen_excel(self):
-        """Speichert Rollen-Daten in Inventur_Rollen.xlsx"""
-        # Erstelle oder lade Workbook
-        if self.inventur_rollen_path.exists():
-            wb = load_workbook(self.inventur_rollen_path)
-        else:
-            wb = Workbook()
-            # Entferne Standard-Sheet
-            if 'Sheet' in wb.sheetnames:
-                wb.remove(wb['Sheet'])
-        
-        # Erstelle/aktualisiere Inventur-Sheet
-        if 'Inventur' in wb.sheetnames:
-            wb.remove(wb['Inventur'])
-        
-        ws_inventur = wb.create_sheet('Inventur')
-        
-        # Header für Rollen-Inventur (erweiterte Struktur)
-        headers = ['Datum/Uhrzeit', 'Charge', 'Material', 'Materialkurztext', 
-                  'Länge m', 'Fläche m²', 'Breite mm', 'Breite kontrolliert', 
-                  'Fach', 'Fach kontrolliert', 'Bemerkung']
-        ws_inventur.append(headers)
-        
-        # Daten für Rollen-Inventur
-        for item in self.inventur_rollen_data:
-            bemerkung = item.get('bemerkung', '')
-            if bemerkung == 'nan' or str(bemerkung).lower() == 'nan':
-                bemerkung = ''
-            
-            row = [
-                item['zeitstempel'],
-                item['charge'],
-                item['material'],
-                item['kurztext'],
-                item['laenge'],
-                item['flaeche'],
-                item.get('breite_original', ''),  # Original aus Arbeitstabelle
-                item.get('breite_kontrolliert', ''),  # Vom Nutzer eingegeben
-                item.get('fach_original', ''),  # Original aus Arbeitstabelle
-                item.get('fach_kontrolliert', ''),  # Vom Nutzer eingegeben
-                bemerkung
-            ]
-            ws_inventur.append(row)
+    def statistik_anzeigen(self):
+        """Zeigt Durchsatz, Abdeckung und Restzeit aus den laufenden Zählern an (auch alle 30 s, da der Durchsatz altert)"""
+        if self.statistik_id is not None:
+            self.root.after_cancel(self.statistik_id)
+        
+        werte = self.engine.statistik.auswertung()
+        rolle, granulat, gesamt = werte['ROLLE'], werte['GRANULAT'], werte['GESAMT']
+        
+        def prozent(wert):
+            return '-' if wert is None else f"{wert:.1f} %".replace('.', ',')
+        
+        self.statistik_var.set(
+            f"⚡ {gesamt['pro_minute']:.1f}/min (🔵 {rolle['pro_minute']:.1f} · 🟨 {granulat['pro_minute']:.1f})   "
+            f"📊 🔵 {prozent(rolle['abdeckung'])} · 🟨 {prozent(granulat['abdeckung'])}   "
+            f"⏳ Rest {dauer_text(gesamt['rest_minuten'])}")
+        self.statistik_id = self.root.after(30000, self.statistik_anzeigen)
+    
+    def nach_aenderung(self):
+        """Plant nach einer Änderung im Kern die gebündelte Excel-Speicherung (Auto-Save)"""
+        if self.config.get('auto_save', True):
+            self.excel_speichern_planen()
+    
+    def excel_speichern_planen(self):
+        """Plant eine gebündelte Excel-Speicherung (mehrere Scans → ein Schreibvorgang)"""
+        if self.excel_speichern_id is None:
+            intervall_ms = int(self.config.get('excel_speicher_intervall_sek', 30) * 1000)
+            self.excel_speichern_id = self.root.after(intervall_ms, self.excel_speichern)
+    
+    def excel_speichern(self):
+        """Reiht eine Excel-Speicherung in den Schreib-Thread ein"""
+        if not self.bereit:
+            # Noch nicht geladen: leere Listen würden die bestehende Inventur überschreiben
+            return
         
-        # Erstelle/aktualisiere Nicht_gefunden-Sheet
-        if 'Nicht_gefunden' in wb.sheetnames:
-            wb.remove(wb['Nicht_gefunden'])
+        if self.excel_speichern_id is not None:
+            self.root.after_cancel(self.excel_speichern_id)
+            self.excel_speichern_id = None
         
-        ws_nicht_gefunden = wb.create_sheet('Nicht_gefunden')
-        ws_nicht_gefunden.append(headers)
+        snapshot = self.engine.daten_snapshot()
+        with self.excel_lock:
+            # Wartet bereits ein Auftrag, schreibt dieser einfach die neuere Momentaufnahme
+            bereits_eingereiht = self.excel_auftrag is not None
+            self.excel_auftrag = snapshot
         
-        # Daten für Nicht_gefunden Rollen
-        for item in self.nicht_gefunden_rollen_data:
-            bemerkung = item.get('bemerkung', '')
-            if bemerkung == 'nan' or str(bemerkung).lower() == 'nan':
-                bemerkung = ''
-            
-            row = [
-                item['zeitstempel'],
-                item['charge'],
-                item['material'],
-                item['kurztext'],
-                item.get('laenge', ''),
-                item.get('flaeche', ''),
-                item.get('breite_original', ''),
-                item.get('breite_kontrolliert', ''),
-                item.get('fach_original', ''),
-                item.get('fach_kontrolliert', ''),
-                bemerkung
-            ]
-            ws_nicht_gefunden.append(row)
-        
-        # Formatiere Charge-Spalte als Text
-        from openpyxl.utils import get_column_letter
-        charge_col = get_column_letter(2)  # Spalte B
-        
-        # Inventur-Sheet
-        for row in range(2, len(self.inventur_rollen_data) + 2):
-            cell = ws_inventur[f'{charge_col}{row}']
-            cell.number_format = '@'
-        
-        # Nicht_gefunden-Sheet
-        for row in range(2, len(self.nicht_gefunden_rollen_data) + 2):
-            cell = ws_nicht_gefunden[f'{charge_col}{row}']
-            cell.number_format = '@'
-        
-        # Speichern
-        wb.save(self.inventur_rollen_path)
-    
-    def save_granulat_excel(self):
-        """Speichert Granulat-Daten in Inventur_Granulat.xlsx"""
-        # Erstelle oder lade Workbook
-        if self.inventur_granulat_path.exists():
-            wb = load_workbook(self.inventur_granulat_path)
+        if not bereits_eingereiht:
+            self.worker.einreihen('Excel speichern', self.excel_auftrag_ausfuehren, self.excel_gespeichert)
+        self.worker_status_aktualisieren()
+    
+    def excel_auftrag_ausfuehren(self):
+        """Schreibt die neueste Momentaufnahme (läuft im Schreib-Thread)"""
+        with self.excel_lock:
+            snapshot = self.excel_auftrag
+            self.excel_auftrag = None
+        self.engine.save_to_excel(snapshot)
+        return snapshot
+    
+    def excel_gespeichert(self, ok, ergebnis):
+        """Rückmeldung des Schreib-Threads: Journal kürzen oder Fehler melden"""
+        if ok:
+            self.engine.snapshot_gespeichert(ergebnis)
         else:
-            wb = Workbook()
-            # Entferne Standard-Sheet
-            if 'Sheet' in wb.sheetnames:
-                wb.remove(wb['Sheet'])
-        
-        # Erstelle/aktualisiere Inventur-Sheet
-        if 'Inventur' in wb.sheetnames:
-            wb.remove(wb['Inventur'])
-        
-        ws_inventur = wb.create_sheet('Inventur')
-        
-        # Header für Granulat-Inventur
-        headers = ['Datum/Uhrzeit', 'Charge', 'Material', 'Materialkurztext', 
-                  'Frei verwendbar (KG)', 'Zählmenge (KG)', 'Bemerkung']
-        ws_inventur.append(headers)
-        
-        # Daten für Granulat-Inventur
-        for item in self.inventur_granulat_data:
-            bemerkung = item.get('bemerkung', '')
-            if bemerkung == 'nan' or str(bemerkung).lower() == 'nan':
-                bemerkung = ''
+            # Journal bleibt erhalten, beim nächsten Speichern/Start wird erneut geschrieben
+            messagebox.showerror("Fehler", f"Fehler beim Speichern der Excel-Dateien:\n{ergebnis}")
+    
+    def worker_ergebnisse_pruefen(self):
+        """Holt Ergebnisse des Schreib-Threads ab (läuft per root.after im Tk-Thread)"""
+        while self.thread_meldungen:
+            messagebox.showerror(*self.thread_meldungen.popleft())
+        if not self.bereit:
+            self.start_worker.ergebnisse_verarbeiten()
+        self.worker.ergebnisse_verarbeiten()
+        if self.sync_worker is not None:
+            self.sync_worker.ergebnisse_verarbeiten()
+        if self.nachlade_worker is not None:
+            self.nachlade_worker.ergebnisse_verarbeiten()
+        if self.fremde_worker is not None:
+            self.fremde_worker.ergebnisse_verarbeiten()
+        self.worker_status_aktualisieren()
+        self.root.after(100, self.worker_ergebnisse_pruefen)
+    
+    def worker_status_aktualisieren(self):
+        """Zeigt ausstehende und fehlgeschlagene Schreibvorgänge in der Status-Leiste"""
+        if not hasattr(self, 'persistenz_var'):
+            return
+        teile = []
+        if self.worker.ausstehend > 0:
+            teile.append(f"💾 {self.worker.ausstehend} ausstehend")
+        if self.worker.fehlgeschlagen > 0:
+            teile.append(f"❌ {self.worker.fehlgeschlagen} fehlgeschlagen")
+        if not teile:
+            if self.engine.store is not None:
+                teile.append("💾 Datenbank" if self.engine.persistenz_offen() else "💾 gespeichert")
+            else:
+                teile.append("💾 im Journal" if self.engine.persistenz_offen() else "💾 gespeichert")
+        sync = self.engine.sync
+        if sync is not None:
+            if sync.online is False:
+                teile.append(f"📴 Sync offline ({len(sync.wartend)} wartend)")
+            elif sync.online:
+                teile.append(f"🔗 Sync ({len(self.engine.fremde_chargen)} fremde Chargen)")
+        self.persistenz_var.set(" | ".join(teile))
+    
+    def sync_starten(self):
+        """Reiht einen Abgleich in den Sync-Thread ein und plant den nächsten (Tk-Thread)"""
+        if not self.sync_laeuft:
+            self.sync_laeuft = True
+            sync = self.engine.sync
+            ausgang_stand, stapel, stand = sync.stapel()
             
-            row = [
-                item['zeitstempel'],
-                item['charge'],
-                item['material'],
-                item['kurztext'],
-                item.get('frei_verwendbar_kg', ''),  # Soll-Gewicht
-                item.get('zahlmenge_kg', ''),  # Ist-Gewicht
-                bemerkung
-            ]
-            ws_inventur.append(row)
-        
-        # Erstelle/aktualisiere Nicht_gefunden-Sheet
-        if 'Nicht_gefunden' in wb.sheetnames:
-            wb.remove(wb['Nicht_gefunden'])
-        
-        ws_nicht_gefunden = wb.create_sheet('Nicht_gefunden')
-        ws_nicht_gefunden.append(headers)
-        
-        # Daten für Nicht_gefunden Granulat
-        for item in self.nicht_gefunden_granulat_data:
-            bemerkung = item.get('bemerkung', '')
-            if bemerkung == 'nan' or str(bemerkung).lower() == 'nan':
-                bemerkung = ''
+            def fertig(ok, ergebnis):
+                self.sync_fertig(ok, ergebnis, ausgang_stand, len(stapel))
             
-            row = [
-                item['zeitstempel'],
-                item['charge'],
-                item['material'],
-                item['kurztext'],
-                item.get('frei_verwendbar_kg', ''),
-                item.get('zahlmenge_kg', ''),
-                bemerkung
-            ]
-            ws_nicht_gefunden.append(row)
-        
-        # Formatiere Charge-Spalte als Text
-        from openpyxl.utils import get_column_letter
-        charge_col = get_column_letter(2)  # Spalte B
-        
-        # Inventur-Sheet
-        for row in range(2, len(self.inventur_granulat_data) + 2):
-            cell = ws_inventur[f'{charge_col}{row}']
-            cell.number_format = '@'
+            self.sync_worker.einreihen('Sync', lambda: sync.abgleichen(stapel, stand), fertig)
         
-        # Nicht_gefunden-Sheet
-        for row in range(2, len(self.nicht_gefunden_granulat_data) + 2):
-            cell = ws_nicht_gefunden[f'{charge_col}{row}']
-            cell.number_format = '@'
-        
-        # Speichern
-        wb.save(self.inventur_granulat_path)
+        intervall_ms = int(self.config.get('sync_intervall_sek', 5) * 1000)
+        self.root.after(intervall_ms, self.sync_starten)
     
-    def load_existing_inventur(self):
-        """Lädt bestehende Inventur-Daten aus beiden V2-Dateien"""
-        total_loaded = 0
+    def sync_fertig(self, ok, ergebnis, ausgang_stand, anzahl):
+        """Rückmeldung des Sync-Threads: Ausgang kürzen und fremde Chargen übernehmen"""
+        self.sync_laeuft = False
+        sync = self.engine.sync
+        if not ok:
+            if sync.online is not False:
+                self.logger.warning(f"Sync-Server nicht erreichbar, Scans bleiben im Ausgang: {ergebnis}")
+            sync.online = False
+            return
         
-        # Lade Rollen-Inventur
-        total_loaded += self.load_existing_rollen()
+        if sync.online is False:
+            self.logger.info("Sync-Server wieder erreichbar")
+        sync.online = True
+        try:
+            self.engine.sync_bestaetigen(ausgang_stand, anzahl, ergebnis)
+        except Exception as e:
+            self.logger.error(f"Fehler beim Kürzen des Sync-Ausgangs: {e}")
+    
+    def arbeitstabelle_pruefen(self):
+        """Liest eine geänderte Arbeitstabelle im Nachlade-Thread und plant die nächste Prüfung (Tk-Thread)"""
+        if not self.nachladen_laeuft and self.engine.arbeitstabelle_geaendert():
+            self.nachladen_laeuft = True
+            self.logger.info("Arbeitstabelle wurde geändert, wird im Hintergrund neu gelesen")
+            self.nachlade_worker.einreihen('Arbeitstabelle nachladen', self.engine.arbeitstabelle_nachladen,
+                                           self.arbeitstabelle_nachgeladen)
+        
+        intervall_ms = int(self.config.get('arbeitstabelle_pruefen_sek', 5) * 1000)
+        self.root.after(intervall_ms, self.arbeitstabelle_pruefen)
+    
+    def fremde_vorladen(self):
+        """Lädt den Zweit-Index (übrige Werke/Lagerorte) im eigenen Thread, nach Start und neuer Arbeitstabelle"""
+        if self.fremde_worker is not None and self.engine.fremde_laedt():
+            self.fremde_worker.einreihen('Übrige Werke/Lagerorte laden', self.engine.fremde_stammdaten_vorladen,
+                                        self.fremde_vorgeladen)
+    
+    def fremde_vorgeladen(self, ok, ergebnis):
+        """Rückmeldung des Zweit-Index-Threads: übernehmen, sofern keine neuere Arbeitstabelle geladen ist"""
+        if not ok:
+            ergebnis = (self.engine.fremde_version, None)  # Fremde Chargen gelten dann als nicht gefunden
+        self.engine.fremde_stammdaten_uebernehmen(ergebnis)
+    
+    def arbeitstabelle_nachgeladen(self, ok, ergebnis):
+        """Rückmeldung des Nachlade-Threads: geänderte Chargen übernehmen und betroffene Scans markieren"""
+        self.nachladen_laeuft = False
+        if not ok:
+            # Bisherige Stammdaten bleiben aktiv, erneut gelesen wird erst bei der nächsten Änderung
+            self.logger.error(f"Fehler beim Nachladen der Arbeitstabelle: {ergebnis}")
+            self.warnung_anzeigen(f"Neue Arbeitstabelle nicht lesbar, bisherige bleibt aktiv: {ergebnis}")
+            return
+        if ergebnis is None:
+            return
         
-        # Lade Granulat-Inventur
-        total_loaded += self.load_existing_granulat()
+        daten, unterschiede = ergebnis
+        markiert = self.engine.stammdaten_aktualisieren(daten, unterschiede)
+        self.fremde_vorladen()
+        self.update_info_label()
+        self.statistik_anzeigen()
+        for item_data in markiert:
+            self.liste_eintrag_aktualisieren(item_data)
+        if self.virtuelle_liste is not None:
+            self.virtuelle_liste.rendern()
+        
+        self.status_var.set(f"🔄 Arbeitstabelle aktualisiert: {unterschiede_text(unterschiede)}")
+        if markiert:
+            self.warnung_anzeigen(f"Neue Arbeitstabelle: {len(markiert)} gescannte Einträge betroffen "
+                                  f"(🔄 in der Liste, Details per Rechtsklick)")
+    
+    def inventur_anzeigen(self, total_loaded, journal_count):
+        """Zeigt die beim Start geladene Inventur an (Ergebnis von engine.inventur_laden)"""
+        if journal_count > 0:
+            self.excel_speichern_planen()
         
         if total_loaded > 0:
             # Liste aktualisieren
             self.update_list()
             
-            total_rollen = len(self.inventur_rollen_data) + len(self.nicht_gefunden_rollen_data)
-            total_granulat = len(self.inventur_granulat_data) + len(self.nicht_gefunden_granulat_data)
-            
+            total_rollen, total_granulat = self.engine.anzahl()
             self.status_var.set(f"Bestehende Inventur geladen: {total_rollen} Rollen, {total_granulat} Granulate")
-            self.logger.info(f"Bestehende Inventur geladen: {total_rollen} Rollen, {total_granulat} Granulate")
-    
-    def load_existing_rollen(self):
-        """Lädt bestehende Rollen-Inventur"""
-        if not self.inventur_rollen_path.exists():
-            return 0
         
-        loaded_count = 0
-        try:
-            # Lade Rollen Inventur-Sheet
-            df_inventur = pd.read_excel(self.inventur_rollen_path, sheet_name='Inventur', dtype={'Charge': str})
-            for _, row in df_inventur.iterrows():
-                bemerkung = row.get('Bemerkung', '')
-                if pd.isna(bemerkung) or str(bemerkung).lower() == 'nan':
-                    bemerkung = ''
-                
-                item = {
-                    'zeitstempel': str(row.get('Datum/Uhrzeit', '')),
-                    'charge': str(row.get('Charge', '')),
-                    'material': str(row.get('Material', '')),
-                    'kurztext': str(row.get('Materialkurztext', '')),
-                    'laenge': float(row.get('Länge m', 0)),
-                    'flaeche': float(row.get('Fläche m²', 0)),
-                    'breite_original': int(row.get('Breite mm', 0)),
-                    'breite_kontrolliert': int(row.get('Breite kontrolliert', 0)),
-                    'fach_original': str(row.get('Fach', '')),
-                    'fach_kontrolliert': str(row.get('Fach kontrolliert', '')),
-                    'bemerkung': str(bemerkung),
-                    'status': 'gefunden',
-                    'typ': 'ROLLE'
-                }
-                self.inventur_rollen_data.append(item)
-                loaded_count += 1
-            
-            # Lade Rollen Nicht_gefunden-Sheet
-            try:
-                df_nicht_gefunden = pd.read_excel(self.inventur_rollen_path, sheet_name='Nicht_gefunden', dtype={'Charge': str})
-                for _, row in df_nicht_gefunden.iterrows():
-                    bemerkung = row.get('Bemerkung', '')
-                    if pd.isna(bemerkung) or str(bemerkung).lower() == 'nan':
-                        bemerkung = ''
-                    
-                    item = {
-                        'zeitstempel': str(row.get('Datum/Uhrzeit', '')),
-                        'charge': str(row.get('Charge', '')),
-                        'material': str(row.get('Material', '')),
-                        'kurztext': str(row.get('Materialkurztext', '')),
-                        'laenge': float(row.get('Länge m', 0)),
-                        'flaeche': float(row.get('Fläche m²', 0)),
-                        'breite_original': int(row.get('Breite mm', 0)),
-                        'breite_kontrolliert': int(row.get('Breite kontrolliert', 0)),
-                        'fach_original': str(row.get('Fach', '')),
-                        'fach_kontrolliert': str(row.get('Fach kontrolliert', '')),
-                        'bemerkung': str(bemerkung),
-                        'status': 'nicht_gefunden',
-                        'typ': 'ROLLE'
-                    }
-                    self.nicht_gefunden_rollen_data.append(item)
-                    loaded_count += 1
-            except:
-                pass  # Sheet existiert noch nicht
-                
-        except Exception as e:
-            self.logger.error(f"Fehler beim Laden der Rollen-Inventur: {e}")
+        # Ungültige Zellen gesammelt melden (Zeilen bleiben erhalten)
+        ladeprobleme = self.engine.ladeprobleme
+        if ladeprobleme:
+            anzeige = "\n".join(ladeprobleme[:10])
+            if len(ladeprobleme) > 10:
+                anzeige += f"\n... und {len(ladeprobleme) - 10} weitere (siehe Log-Datei)"
+            messagebox.showwarning("Inventur geladen mit Problemen", anzeige)
         
-        return loaded_count
+        return total_loaded
     
-    def load_existing_granulat(self):
-        """Lädt bestehende Granulat-Inventur"""
-        if not self.inventur_granulat_path.exists():
-            return 0
+    def export_inventur(self):
+        """Exportiert beide Inventur-Dateien als Backup (V2, im Schreib-Thread)"""
+        if not self.bereit:
+            self.status_var.set("Bitte warten, Inventur wird noch geladen...")
+            return
         
-        loaded_count = 0
-        try:
-            # Lade Granulat Inventur-Sheet
-            df_inventur = pd.read_excel(self.inventur_granulat_path, sheet_name='Inventur', dtype={'Charge': str})
-            for _, row in df_inventur.iterrows():
-                bemerkung = row.get('Bemerkung', '')
-                if pd.isna(bemerkung) or str(bemerkung).lower() == 'nan':
-                    bemerkung = ''
-                
-                item = {
-                    'zeitstempel': str(row.get('Datum/Uhrzeit', '')),
-                    'charge': str(row.get('Charge', '')),
-                    'material': str(row.get('Material', '')),
-                    'kurztext': str(row.get('Materialkurztext', '')),
-                    'frei_verwendbar_kg': float(row.get('Frei verwendbar (KG)', 0)),
-                    'zahlmenge_kg': float(row.get('Zählmenge (KG)', 0)),
-                    'bemerkung': str(bemerkung),
-                    'status': 'gefunden',
-                    'typ': 'GRANULAT'
-                }
-                self.inventur_granulat_data.append(item)
-                loaded_count += 1
-            
-            # Lade Granulat Nicht_gefunden-Sheet
-            try:
-                df_nicht_gefunden = pd.read_excel(self.inventur_granulat_path, sheet_name='Nicht_gefunden', dtype={'Charge': str})
-                for _, row in df_nicht_gefunden.iterrows():
-                    bemerkung = row.get('Bemerkung', '')
-                    if pd.isna(bemerkung) or str(bemerkung).lower() == 'nan':
-                        bemerkung = ''
-                    
-                    item = {
-                        'zeitstempel': str(row.get('Datum/Uhrzeit', '')),
-                        'charge': str(row.get('Charge', '')),
-                        'material': str(row.get('Material', '')),
-                        'kurztext': str(row.get('Materialkurztext', '')),
-                        'frei_verwendbar_kg': float(row.get('Frei verwendbar (KG)', 0)),
-                        'zahlmenge_kg': float(row.get('Zählmenge (KG)', 0)),
-                        'bemerkung': str(bemerkung),
-                        'status': 'nicht_gefunden',
-                        'typ': 'GRANULAT'
-                    }
-                    self.nicht_gefunden_granulat_data.append(item)
-                    loaded_count += 1
-            except:
-                pass  # Sheet existiert noch nicht
-                
-        except Exception as e:
-            self.logger.error(f"Fehler beim Laden der Granulat-Inventur: {e}")
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        return loaded_count
-    
-    def export_inventur(self):
-        """Exportiert beide Inventur-Dateien als Backup (V2)"""
-        try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            
-            # Erstelle Backup-Verzeichnis falls nicht vorhanden
-            backup_dir = self.data_dir / 'backups'
-            backup_dir.mkdir(exist_ok=True)
-            
-            # Backup-Dateinamen
-            rollen_backup = backup_dir / f"Inventur_Rollen_Backup_{timestamp}.xlsx"
-            granulat_backup = backup_dir / f"Inventur_Granulat_Backup_{timestamp}.xlsx"
-            
-            import shutil
-            backup_count = 0
-            
-            # Kopiere Rollen-Datei falls vorhanden
-            if self.inventur_rollen_path.exists():
-                shutil.copy2(self.inventur_rollen_path, rollen_backup)
-                backup_count += 1
-            else:
-                # Erstelle neue Rollen-Datei
-                self.save_rollen_excel()
-                if self.inventur_rollen_path.exists():
-                    shutil.copy2(self.inventur_rollen_path, rollen_backup)
-                    backup_count += 1
-            
-            # Kopiere Granulat-Datei falls vorhanden
-            if self.inventur_granulat_path.exists():
-                shutil.copy2(self.inventur_granulat_path, granulat_backup)
-                backup_count += 1
-            else:
-                # Erstelle neue Granulat-Datei
-                self.save_granulat_excel()
-                if self.inventur_granulat_path.exists():
-                    shutil.copy2(self.inventur_granulat_path, granulat_backup)
-                    backup_count += 1
-            
-            if backup_count > 0:
+        # Offene Journal-Einträge bzw. fehlende Dateien zuerst schreiben (läuft vor dem Kopieren)
+        if (self.engine.persistenz_offen() or not self.engine.inventur_rollen_path.exists()
+                or not self.engine.inventur_granulat_path.exists()):
+            self.excel_speichern()
+        
+        def fertig(ok, ergebnis):
+            if not ok:
+                messagebox.showerror("Fehler", f"Fehler beim Export:\n{ergebnis}")
+                self.logger.error(f"Fehler beim Export: {ergebnis}")
+            elif ergebnis:
                 backup_message = f"Backup erfolgreich erstellt:\n\n"
-                if rollen_backup.exists():
-                    backup_message += f"🔵 Rollen: {rollen_backup.name}\n"
-                if granulat_backup.exists():
-                    backup_message += f"🟨 Granulat: {granulat_backup.name}\n"
-                backup_message += f"\nSpeicherort: {backup_dir}"
+                if 'ROLLE' in ergebnis:
+                    backup_message += f"🔵 Rollen: {ergebnis['ROLLE'].name}\n"
+                if 'GRANULAT' in ergebnis:
+                    backup_message += f"🟨 Granulat: {ergebnis['GRANULAT'].name}\n"
+                backup_message += f"\nSpeicherort: {self.engine.backup_dir}"
                 
                 messagebox.showinfo("Export erfolgreich", backup_message)
-                self.logger.info(f"V2 Backup erstellt: {backup_count} Dateien")
             else:
                 messagebox.showwarning("Warnung", "Keine Inventur-Daten zum Exportieren gefunden.")
-                
+        
+        self.worker.einreihen('Export', lambda: self.engine.backup_erstellen(timestamp), fertig)
+        self.worker_status_aktualisieren()
+        self.status_var.set("Export läuft im Hintergrund...")
+    
+    def abgleich_erstellen(self):
+        """Erstellt den Soll/Ist-Abgleich als Excel-Bericht (im Schreib-Thread)"""
+        if not self.bereit:
+            self.status_var.set("Bitte warten, Inventur wird noch geladen...")
+            return
+        
+        # Momentaufnahme im Tk-Thread, der Schreib-Thread liest die Listen nicht direkt
+        eintraege = self.engine.alle_eintraege()
+        
+        def fertig(ok, ergebnis):
+            if not ok:
+                messagebox.showerror("Fehler", f"Fehler beim Soll/Ist-Abgleich:\n{ergebnis}")
+                return
+            pfad, berichte = ergebnis
+            self.status_var.set(f"📊 Soll/Ist-Abgleich erstellt: {pfad.name}")
+            messagebox.showinfo("Soll/Ist-Abgleich",
+                                f"{abgleich_zusammenfassung(berichte)}\n\nBericht: {pfad.name}\nSpeicherort: {pfad.parent}")
+        
+        self.worker.einreihen('Abgleich', lambda: self.engine.abgleich_erstellen(eintraege), fertig)
+        self.worker_status_aktualisieren()
+        self.status_var.set("Soll/Ist-Abgleich läuft im Hintergrund...")
+    
+    def batch_import(self):
+        """Importiert einen Speicherauszug des Scanners (Text/CSV) in einem Durchgang"""
+        if not self.bereit:
+            self.status_var.set("Bitte warten, Inventur wird noch geladen...")
+            return
+        if self.current_scan is not None:
+            messagebox.showwarning("Warnung", "Bitte zuerst den aktuellen Scan speichern oder abbrechen.")
+            return
+        if self.engine.fremde_laedt():
+            # Sonst landen Chargen anderer Werke/Lagerorte als "nicht gefunden" in der Arbeitsliste
+            messagebox.showinfo("Batch-Import", "Andere Werke/Lagerorte werden noch geladen.\n"
+                                "Bitte in einigen Sekunden erneut versuchen.")
+            return
+        
+        pfad = filedialog.askopenfilename(
+            title="Scanner-Speicherauszug wählen",
+            filetypes=[("Scanner-Auszug", "*.txt *.csv"), ("Alle Dateien", "*.*")]
+        )
+        if not pfad:
+            return
+        
+        try:
+            df = self.engine.batch_lesen(pfad)
         except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler beim Export:\n{e}")
-            self.logger.error(f"Fehler beim Export: {e}")
+            messagebox.showerror("Fehler", f"Fehler beim Lesen des Speicherauszugs:\n{e}")
+            self.logger.error(f"Fehler beim Batch-Import {pfad}: {e}")
+            return
+        
+        fertige, offene = self.engine.batch_eintraege_erstellen(df)
+        if fertige:
+            self.eintraege_uebernehmen(fertige)
+        
+        zusammenfassung = batch_zusammenfassung(df, fertige, offene)
+        self.logger.info(f"Batch-Import {pfad}: " + zusammenfassung.replace('\n\n', '; ').replace('\n', ', '))
+        self.status_var.set(f"📥 Batch-Import: {len(fertige)} übernommen, {len(offene)} in der Arbeitsliste")
+        messagebox.showinfo("Batch-Import", zusammenfassung)
+        
+        if offene:
+            if self.arbeitsliste is not None:
+                self.arbeitsliste.schliessen()
+            self.arbeitsliste = ArbeitslisteFenster(self, offene)
+    
+    def eintraege_uebernehmen(self, eintraege):
+        """Übernimmt mehrere fertige Einträge: ein Schreibvorgang, eine Excel-Speicherung am Ende"""
+        self.engine.eintraege_uebernehmen(eintraege)
+        self.update_list()
+        self.excel_speichern()
     
     def show_context_menu(self, event):
         """Zeigt Kontextmenü für Listeneinträge"""
@@ -1379,6 +1477,10 @@ class InventurApp:
         
         context_menu = tk.Menu(self.root, tearoff=0)
         context_menu.add_command(label="🗑️ Löschen", command=lambda: self.delete_entry(item))
+        hinweis = self.engine.stammdaten_hinweis(self.tree_records.get(item))
+        if hinweis:
+            context_menu.add_separator()
+            context_menu.add_command(label=f"🔄 {hinweis}", state=tk.DISABLED)
         # Bearbeitungsfunktion temporär entfernt
         # context_menu.add_command(label="✏️ Bearbeiten", command=lambda: self.edit_entry())
         
@@ -1393,23 +1495,16 @@ class InventurApp:
                                   "Möchten Sie diesen Eintrag wirklich löschen?"):
             return
         
-        # Finde Eintrag in Daten
-        values = self.tree.item(item_id, 'values')
-        if len(values) >= 2:
-            charge = values[1]  # Charge ist in Spalte 1
-            
-            # Entferne aus allen Listen
-            self.inventur_rollen_data = [item for item in self.inventur_rollen_data if item['charge'] != charge]
-            self.nicht_gefunden_rollen_data = [item for item in self.nicht_gefunden_rollen_data if item['charge'] != charge]
-            self.inventur_granulat_data = [item for item in self.inventur_granulat_data if item['charge'] != charge]
-            self.nicht_gefunden_granulat_data = [item for item in self.nicht_gefunden_granulat_data if item['charge'] != charge]
+        # Finde Eintrag über die Zuordnung Treeview-Zeile → Datensatz
+        item_data = self.tree_records.get(item_id)
+        if item_data is not None:
+            # Aus allen Listen entfernen und ins Journal schreiben (Kern), danach nur die Zeilen entfernen
+            for entfernt in self.engine.loeschen(item_data.charge):
+                self.liste_eintrag_entfernen(entfernt)
+            self.nach_aenderung()
+            self.update_count_label()
             
-            # Speichere und aktualisiere
-            self.save_to_excel()
-            self.update_list()
-            
-            self.status_var.set("Eintrag gelöscht")
-            self.logger.info(f"Eintrag gelöscht: {charge}")
+            self.status_var.set("Eintrag gelöscht (Strg+Z macht es rückgängig)")
     
     def edit_entry(self):
         """Bearbeitet einen Eintrag (temporär deaktiviert)"""
@@ -1420,40 +1515,67 @@ class InventurApp:
     #     """Findet einen Eintrag anhand der Charge in allen Listen"""
     #     pass
     
+    def verlaufsschritt_anzeigen(self, ergebnis):
+        """Überträgt einen rückgängig gemachten/wiederholten Schritt in die Liste"""
+        aktion, eintraege, hinzugefuegt, entfernte, uebersprungen = ergebnis
+        for entfernt in entfernte:
+            self.liste_eintrag_entfernen(entfernt)
+        for eintrag in hinzugefuegt:
+            self.liste_eintrag_einsortieren(eintrag)
+        self.nach_aenderung()
+        self.update_count_label()
+        
+        if uebersprungen:
+            self.warnung_anzeigen(f"{len(uebersprungen)} Einträge übersprungen (bereits erfasst bzw. entfernt): "
+                                  f"{', '.join(eintrag.charge for eintrag in uebersprungen[:5])}"
+                                  + (" ..." if len(uebersprungen) > 5 else ""))
+        angewendet = len(eintraege) - len(uebersprungen)
+        if len(eintraege) == 1:
+            typ_icon = "🔵" if eintraege[0].typ == 'ROLLE' else "🟨"
+            text = f"{typ_icon} {'Löschen' if aktion == 'delete' else 'Eintrag'}: {eintraege[0].charge}"
+            return text + (" (übersprungen)" if uebersprungen else "")
+        return (f"{'📥 Batch-Import' if aktion == 'import' else '📋 Einträge'}: {angewendet} "
+                + (f"von {len(eintraege)} " if uebersprungen else "") + "Einträge")
+    
     def undo_last_action(self):
         """Macht die letzte Aktion rückgängig (V2)"""
-        if not self.undo_stack:
+        ergebnis = self.engine.rueckgaengig()
+        if ergebnis is None:
             self.status_var.set("Nichts zum Rückgängigmachen")
             return
-        
-        action, data, typ = self.undo_stack.pop()
-        
-        if action == 'add':
-            # Entferne letzten Eintrag basierend auf Typ
-            charge = data['charge']
-            
-            if typ == 'ROLLE':
-                if data['status'] == 'gefunden':
-                    self.inventur_rollen_data = [item for item in self.inventur_rollen_data if item['charge'] != charge]
-                else:
-                    self.nicht_gefunden_rollen_data = [item for item in self.nicht_gefunden_rollen_data if item['charge'] != charge]
-            elif typ == 'GRANULAT':
-                if data['status'] == 'gefunden':
-                    self.inventur_granulat_data = [item for item in self.inventur_granulat_data if item['charge'] != charge]
-                else:
-                    self.nicht_gefunden_granulat_data = [item for item in self.nicht_gefunden_granulat_data if item['charge'] != charge]
-            
-            self.save_to_excel()
-            self.update_list()
-            
-            typ_icon = "🔵" if typ == 'ROLLE' else "🟨"
-            self.status_var.set(f"{typ_icon} Eintrag rückgängig gemacht: {charge}")
-            self.logger.info(f"Undo {typ}: {charge}")
+        self.status_var.set(f"{self.verlaufsschritt_anzeigen(ergebnis)} rückgängig gemacht")
+    
+    def redo_last_action(self):
+        """Wiederholt die zuletzt rückgängig gemachte Aktion"""
+        ergebnis = self.engine.wiederholen()
+        if ergebnis is None:
+            self.status_var.set("Nichts zum Wiederholen")
+            return
+        self.status_var.set(f"{self.verlaufsschritt_anzeigen(ergebnis)} wiederholt")
     
     def manual_save(self):
         """Manuelles Speichern"""
-        self.save_to_excel()
-        self.status_var.set("Manuell gespeichert")
+        if not self.bereit:
+            self.status_var.set("Bitte warten, Inventur wird noch geladen...")
+            return
+        
+        fehler_vorher = self.worker.fehlgeschlagen
+        self.excel_speichern()
+        self.status_var.set("Speichern läuft...")
+        
+        def fertig(ok, ergebnis):
+            # Läuft nach der Rückmeldung des eingereihten Speicherauftrags
+            if self.worker.fehlgeschlagen == fehler_vorher:
+                self.status_var.set("Manuell gespeichert")
+        
+        self.worker.einreihen('Manuell speichern', lambda: None, fertig)
+    
+    def diagnose_anzeigen(self):
+        """Öffnet das Diagnose-Fenster mit den Scan-Laufzeiten (bzw. holt es nach vorne)"""
+        if self.diagnose is not None:
+            self.diagnose.fenster.lift()
+            return
+        self.diagnose = DiagnoseFenster(self)
     
     def toggle_fullscreen(self):
         """Schaltet Vollbild-Modus um"""
@@ -1473,6 +1595,21 @@ class InventurApp:
     def quit_app(self):
         """Beendet die Anwendung"""
         if messagebox.askyesno("Beenden", "Möchten Sie das Programm wirklich beenden?"):
+            # Offene Journal-Einträge in die Excel-Dateien übernehmen und auf den Schreib-Thread warten
+            if self.engine.persistenz_offen():
+                self.excel_speichern()
+            self.status_var.set("Speichere...")
+            self.root.update_idletasks()
+            self.worker.beenden()
+            if self.sync_worker is not None:
+                # Nicht auf das Netzwerk warten: Unbestätigte Scans bleiben im Ausgang
+                self.sync_worker.stoppen()
+            if self.nachlade_worker is not None:
+                # Ein laufendes Nachladen wird verworfen, die Arbeitstabelle wird beim Start ohnehin gelesen
+                self.nachlade_worker.stoppen()
+            if self.fremde_worker is not None:
+                self.fremde_worker.stoppen()
+            self.engine.schliessen()
             self.logger.info("Programm beendet")
             self.root.quit()
     
@@ -1481,23 +1618,426 @@ class InventurApp:
         self.root.mainloop()
 
 
+class ScannerEingabe:
+    """Erkennt Scanner-Eingaben (Tastatur-Emulation) am Tastenabstand und gibt sie als ganzen Scan weiter
+    
+    Der Scanner tippt Charge + ENTER schneller als ein Mensch. Tasten, die dichter als max_abstand_ms
+    (Zeitstempel der Tastatur-Ereignisse, stimmt auch nach einer Blockade der Oberfläche) aufeinander folgen
+    und mit ENTER enden, werden abgefangen – egal welches Feld oder welcher Dialog den Fokus hat – und an
+    abgeben(text, widget) übergeben. Gibt abgeben False zurück, landet die Eingabe doch im Feld.
+    Langsames Tippen von Hand bleibt unverändert.
+    """
+
+    TAG = 'ScannerEingabe'
+    ENTER = ('Return', 'KP_Enter')
+    STEUERUNG = 0x0004  # Strg gedrückt (Tastenkürzel sind nie Scanner-Eingaben)
+
+    def __init__(self, root, abgeben, max_abstand_ms=50, min_laenge=4):
+        self.root = root
+        self.abgeben = abgeben
+        self.max_abstand_ms = max_abstand_ms
+        self.min_laenge = min_laenge
+        self.zeichen = []  # abgefangene Zeichen des laufenden Scans
+        self.widget = None  # Widget, in dem der Scan begann
+        self.erstes = None  # (widget, zeichen) der letzten durchgelassenen Taste, evtl. Anfang eines Scans
+        self.letzte_zeit = None
+        self.freigabe = None  # after-Auftrag: Scan ohne ENTER an das Feld zurückgeben
+        
+        # Bindtag vor der Klassenbindung (sonst fügt das Eingabefeld das Zeichen schon ein), für jedes
+        # Widget, das den Fokus bekommt – auch in später geöffneten Dialogen
+        root.bind_class(self.TAG, '<KeyPress>', self.taste)
+        root.bind_all('<FocusIn>', self.anmelden, add='+')
+
+    def anmelden(self, event):
+        """Setzt das Bindtag an die erste Stelle des fokussierten Widgets"""
+        widget = event.widget
+        if hasattr(widget, 'bindtags') and self.TAG not in widget.bindtags():
+            widget.bindtags((self.TAG,) + widget.bindtags())
+
+    def taste(self, event):
+        """Tastendruck: durchlassen, abfangen oder Scan abschließen ("break" verhindert die Verarbeitung im Feld)"""
+        zeit = event.time
+        schnell = self.letzte_zeit is not None and 0 <= zeit - self.letzte_zeit <= self.max_abstand_ms
+        self.letzte_zeit = zeit
+        
+        if event.keysym in self.ENTER:
+            if self.zeichen and schnell and len(self.zeichen) >= self.min_laenge:
+                text, widget = ''.join(self.zeichen), self.widget
+                self.leeren()
+                if self.abgeben(text, widget):
+                    return "break"
+                self.zurueckgeben(widget, text)
+                return None
+            self.freigeben()
+            return None
+        
+        if not event.char or not event.char.isprintable() or event.state & self.STEUERUNG:
+            # Umschalttaste (Scanner senden sie für Großbuchstaben) unterbricht keinen Scan
+            if not event.keysym.startswith(('Shift', 'Caps')):
+                self.freigeben()
+            return None
+        
+        if self.zeichen:
+            if schnell:
+                self.zeichen.append(event.char)
+                self.freigabe_planen()
+                return "break"
+            self.freigeben()
+        elif schnell and self.erstes is not None and self.erstes[0] is event.widget:
+            # Zweite schnelle Taste: ein Scan beginnt, das schon eingefügte erste Zeichen zurückholen
+            widget, erstes = self.erstes
+            self.zuruecknehmen(widget, erstes)
+            self.widget, self.zeichen, self.erstes = widget, [erstes, event.char], None
+            self.freigabe_planen()
+            return "break"
+        
+        self.erstes = (event.widget, event.char)
+        return None
+
+    def freigabe_planen(self):
+        """Endet die schnelle Folge ohne ENTER, gehören die Zeichen doch in das Feld"""
+        if self.freigabe is not None:
+            self.root.after_cancel(self.freigabe)
+        self.freigabe = self.root.after(max(200, 4 * self.max_abstand_ms), self.freigeben)
+
+    def freigeben(self):
+        """Gibt abgefangene Zeichen an das Feld zurück (war doch kein Scan)"""
+        if self.zeichen:
+            self.zurueckgeben(self.widget, ''.join(self.zeichen))
+        self.leeren()
+
+    def leeren(self):
+        """Verwirft den laufenden Scan"""
+        if self.freigabe is not None:
+            self.root.after_cancel(self.freigabe)
+            self.freigabe = None
+        self.zeichen = []
+        self.widget = None
+        self.erstes = None
+
+    @staticmethod
+    def zuruecknehmen(widget, zeichen):
+        """Entfernt das zuletzt eingefügte Zeichen vor der Schreibmarke eines Eingabefelds"""
+        if isinstance(widget, tk.Entry) and widget.winfo_exists():
+            position = widget.index(tk.INSERT)
+            if position > 0 and widget.get()[position - 1] == zeichen:
+                widget.delete(position - 1)
+
+    @staticmethod
+    def zurueckgeben(widget, text):
+        """Fügt Text an der Schreibmarke eines Eingabefelds ein"""
+        if isinstance(widget, tk.Entry) and widget.winfo_exists():
+            widget.insert(tk.INSERT, text)
+
+
+class VirtuelleListe:
+    """Virtualisierte Artikelliste: der Treeview enthält nur die sichtbaren Zeilen, der Rest bleibt im Speicher"""
+    
+    def __init__(self, tree, scrollbar, werte_funktion, tree_records):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.werte_funktion = werte_funktion
+        self.tree_records = tree_records  # Gemeinsame Zuordnung Treeview-Zeile → Datensatz
+        self.eintraege = []  # Neueste zuerst
+        self.offset = 0
+        self.sichtbar = int(str(tree.cget('height')))
+        self.zeilen = []  # Wiederverwendete Treeview-Zeilen des sichtbaren Fensters
+        
+        # Treeview scrollt nicht mehr selbst, die Scrollbar steuert das Fenster
+        self.tree.configure(yscrollcommand='')
+        self.scrollbar.configure(command=self.yview)
+        self.tree.bind('<Configure>', self.on_configure)
+        self.tree.bind('<MouseWheel>', self.on_mausrad)
+        self.tree.bind('<Button-4>', lambda e: self.scrollen(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scrollen(3))
+    
+    def neu_aufbauen(self, eintraege):
+        """Übernimmt die komplette (sortierte) Eintragsliste"""
+        self.eintraege = eintraege
+        self.offset = 0
+        self.rendern()
+    
+    def einfuegen(self, item_data, position=0):
+        """Fügt einen Eintrag ein und zeichnet nur das sichtbare Fenster neu"""
+        if position == 'end':
+            self.eintraege.append(item_data)
+        else:
+            self.eintraege.insert(position, item_data)
+        self.rendern()
+    
+    def entfernen(self, item_data):
+        """Entfernt einen Eintrag (Identitätsvergleich, nicht Inhaltsvergleich)"""
+        for i, eintrag in enumerate(self.eintraege):
+            if eintrag is item_data:
+                del self.eintraege[i]
+                break
+        self.rendern()
+    
+    def rendern(self):
+        """Zeigt die Einträge ab offset in den vorhandenen Treeview-Zeilen an"""
+        # Auswahl über den Datensatz merken, da die Zeilen wiederverwendet werden
+        ausgewaehlt = {id(self.tree_records[i]) for i in self.tree.selection() if i in self.tree_records}
+        
+        self.offset = max(0, min(self.offset, len(self.eintraege) - self.sichtbar))
+        fenster = self.eintraege[self.offset:self.offset + self.sichtbar]
+        
+        # Zeilenanzahl an das Fenster anpassen
+        while len(self.zeilen) < len(fenster):
+            self.zeilen.append(self.tree.insert('', 'end'))
+        while len(self.zeilen) > len(fenster):
+            self.tree.delete(self.zeilen.pop())
+        
+        self.tree_records.clear()
+        neue_auswahl = []
+        for item_id, item_data in zip(self.zeilen, fenster):
+            self.tree.item(item_id, values=self.werte_funktion(item_data))
+            self.tree_records[item_id] = item_data
+            if id(item_data) in ausgewaehlt:
+                neue_auswahl.append(item_id)
+        self.tree.selection_set(neue_auswahl)
+        
+        # Scrollbar auf das sichtbare Fenster setzen
+        gesamt = max(len(self.eintraege), 1)
+        self.scrollbar.set(self.offset / gesamt, min(1.0, (self.offset + self.sichtbar) / gesamt))
+    
+    def scrollen(self, zeilen):
+        """Verschiebt das sichtbare Fenster um die angegebene Zeilenanzahl"""
+        self.offset += zeilen
+        self.rendern()
+    
+    def yview(self, *args):
+        """Scrollbar-Befehl (moveto / scroll units / scroll pages)"""
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.eintraege))
+            self.rendern()
+        elif args[0] == 'scroll':
+            schritte = int(args[1])
+            self.scrollen(schritte * self.sichtbar if args[2] == 'pages' else schritte)
+    
+    def on_mausrad(self, event):
+        """Mausrad unter Windows (delta in Vielfachen von 120)"""
+        self.scrollen(-3 * int(event.delta / 120))
+        return 'break'
+    
+    def on_configure(self, event):
+        """Passt die Anzahl sichtbarer Zeilen an die Fensterhöhe an"""
+        zeilenhoehe = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        sichtbar = max(1, (event.height - 25) // zeilenhoehe)
+        if sichtbar != self.sichtbar:
+            self.sichtbar = sichtbar
+            self.rendern()
+
+
 # EditItemDialog temporär entfernt für Überarbeitung
 # class EditItemDialog:
 #     pass
 
 
+class ArbeitslisteFenster:
+    """Nicht-modale Arbeitsliste eines Batch-Imports: Chargen, die noch Fach/Breite/Zählmenge bzw. Stammdaten brauchen"""
+    
+    def __init__(self, app, offene):
+        self.app = app
+        self.offene = offene
+        self.warteschlange = []  # beim Abarbeiten noch ausstehende Chargen
+        
+        self.fenster = tk.Toplevel(app.root)
+        self.fenster.geometry("750x450")
+        self.fenster.transient(app.root)
+        self.fenster.protocol('WM_DELETE_WINDOW', self.schliessen)
+        
+        self.create_widgets()
+        self.aktualisieren()
+    
+    def create_widgets(self):
+        """Erstellt Liste und Buttons"""
+        main_frame = ttk.Frame(self.fenster, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(main_frame, text="Doppelklick übernimmt die Charge in die Scan-Maske.",
+                  font=("Arial", 10)).pack(anchor=tk.W, pady=(0, 10))
+        
+        columns = ('Charge', 'Typ', 'Material', 'Kurztext', 'Fehlt')
+        self.tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=15)
+        for col, breite in zip(columns, (130, 90, 100, 220, 180)):
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=breite)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind('<Double-1>', lambda e: self.bearbeiten())
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="✏️ Bearbeiten", command=self.bearbeiten).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="▶ Alle abarbeiten", command=self.alle_abarbeiten).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="Schließen", command=self.schliessen).pack(side=tk.RIGHT)
+    
+    def aktualisieren(self):
+        """Entfernt erledigte Chargen und arbeitet ggf. die nächste ab (nach jedem Scan)"""
+        self.offene = [eintrag for eintrag in self.offene if not self.app.engine.is_already_scanned(eintrag['charge'])]
+        self.tree.delete(*self.tree.get_children())
+        for eintrag in self.offene:
+            self.tree.insert('', 'end', iid=eintrag['charge'], values=(
+                eintrag['charge'], eintrag['typ'], eintrag['material'], eintrag['kurztext'], eintrag['fehlt']))
+        self.fenster.title(f"📥 Arbeitsliste Batch-Import - {len(self.offene)} offen")
+        
+        if self.warteschlange and self.app.current_scan is None:
+            self.app.root.after_idle(self.naechste)
+    
+    def bearbeiten(self, charge=None):
+        """Übernimmt eine Charge in die Scan-Maske und trägt Werte aus dem Auszug vor"""
+        if charge is None:
+            auswahl = self.tree.selection()
+            if not auswahl:
+                return
+            charge = auswahl[0]
+        if self.app.current_scan is not None:
+            messagebox.showwarning("Warnung", "Bitte zuerst den aktuellen Scan speichern oder abbrechen.",
+                                   parent=self.fenster)
+            return
+        
+        eintrag = next((e for e in self.offene if e['charge'] == charge), None)
+        if eintrag is None:
+            return
+        self.app.scan_var.set(charge)
+        self.app.process_scan()
+        
+        # Teilweise im Auszug vorhandene Werte vorbelegen
+        if self.app.current_scan is not None:
+            vorgaben = eintrag['vorgaben']
+            if self.app.current_type == 'ROLLE':
+                self.app.fach_var.set(vorgaben['Fach'])
+                self.app.breite_kontrolliert_var.set(vorgaben['Breite'])
+            else:
+                self.app.zahlmenge_var.set(vorgaben['Zählmenge'])
+            self.app.bemerkung_var.set(vorgaben['Bemerkung'])
+    
+    def alle_abarbeiten(self):
+        """Führt nacheinander durch alle offenen Chargen (Esc überspringt eine Charge)"""
+        self.warteschlange = [eintrag['charge'] for eintrag in self.offene]
+        if self.app.current_scan is None:
+            self.naechste()
+    
+    def naechste(self):
+        """Übernimmt die nächste noch offene Charge der Warteschlange"""
+        if self.app.current_scan is not None:
+            return
+        offen = {eintrag['charge'] for eintrag in self.offene}
+        while self.warteschlange:
+            charge = self.warteschlange.pop(0)
+            if charge in offen:
+                self.bearbeiten(charge)
+                return
+    
+    def schliessen(self):
+        """Schließt die Arbeitsliste"""
+        self.warteschlange = []
+        self.fenster.destroy()
+        if self.app.arbeitsliste is self:
+            self.app.arbeitsliste = None
+
+
+class DiagnoseFenster:
+    """Nicht-modales Fenster mit den Laufzeiten je Scan-Phase (p50/p95/p99), aktualisiert sich jede Sekunde"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.aktualisieren_id = None
+        
+        self.fenster = tk.Toplevel(app.root)
+        self.fenster.title("⏱️ Diagnose - Laufzeiten je Scan")
+        self.fenster.geometry("700x330")
+        self.fenster.transient(app.root)
+        self.fenster.protocol('WM_DELETE_WINDOW', self.schliessen)
+        
+        self.create_widgets()
+        self.aktualisieren()
+    
+    def create_widgets(self):
+        """Erstellt Tabelle und Buttons"""
+        main_frame = ttk.Frame(self.fenster, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.hinweis_var = tk.StringVar()
+        ttk.Label(main_frame, textvariable=self.hinweis_var, font=("Arial", 10)).pack(anchor=tk.W, pady=(0, 10))
+        
+        columns = ('Phase', 'Anzahl', 'Mittel', 'p50', 'p95', 'p99', 'Max')
+        self.tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=len(ScanMessung.PHASEN))
+        for col, breite in zip(columns, (180, 70, 80, 80, 80, 80, 80)):
+            self.tree.heading(col, text=col if col in ('Phase', 'Anzahl') else f"{col} (ms)")
+            self.tree.column(col, width=breite, anchor=tk.W if col == 'Phase' else tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        self.schalter = ttk.Button(button_frame, command=self.umschalten)
+        self.schalter.pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="💾 Als CSV speichern", command=self.csv_speichern).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="🔄 Zurücksetzen", command=self.zuruecksetzen).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(button_frame, text="Schließen", command=self.schliessen).pack(side=tk.RIGHT)
+    
+    def aktualisieren(self):
+        """Zeigt die aktuelle Auswertung an"""
+        messung = self.app.engine.messung
+        self.tree.delete(*self.tree.get_children())
+        if messung.aktiv:
+            self.hinweis_var.set(f"Letzte {messung.werte['suche'].maxlen} Werte je Phase, Zeiten in Millisekunden.")
+            self.schalter.config(text="⏸ Messung ausschalten")
+            for zeile in messung.auswertung():
+                werte = [zeile[spalte] for spalte in ('mittel', 'p50', 'p95', 'p99', 'max')]
+                self.tree.insert('', 'end', values=(zeile['bezeichnung'], zeile['anzahl'],
+                                                    *('-' if wert is None else f"{wert:.2f}" for wert in werte)))
+        else:
+            self.hinweis_var.set("Messung ist ausgeschaltet (latenz_messung in den Einstellungen).")
+            self.schalter.config(text="▶ Messung einschalten")
+        self.aktualisieren_id = self.fenster.after(1000, self.aktualisieren)
+    
+    def umschalten(self):
+        """Schaltet die Messung für diese Sitzung ein bzw. aus"""
+        self.app.engine.messung_einschalten(not self.app.engine.messung.aktiv)
+        self.fenster.after_cancel(self.aktualisieren_id)
+        self.aktualisieren()
+    
+    def csv_speichern(self):
+        """Schreibt die Auswertung als CSV in den Datenordner"""
+        if not self.app.engine.messung.aktiv:
+            messagebox.showwarning("Diagnose", "Die Messung ist ausgeschaltet.", parent=self.fenster)
+            return
+        try:
+            pfad = self.app.engine.messung_speichern()
+        except OSError as e:
+            messagebox.showerror("Fehler", f"CSV konnte nicht gespeichert werden:\n{e}", parent=self.fenster)
+            return
+        messagebox.showinfo("Diagnose", f"Gespeichert:\n{pfad}", parent=self.fenster)
+    
+    def zuruecksetzen(self):
+        """Verwirft die bisherigen Messwerte"""
+        if self.app.engine.messung.aktiv:
+            self.app.engine.messung.zuruecksetzen()
+    
+    def schliessen(self):
+        """Schließt das Fenster (die Messung läuft weiter)"""
+        if self.aktualisieren_id is not None:
+            self.fenster.after_cancel(self.aktualisieren_id)
+        self.fenster.destroy()
+        if self.app.diagnose is self:
+            self.app.diagnose = None
+
+
 class NotFoundDialog:
     """Dialog für nicht gefundene Waren (V2 mit Typ-Auswahl)"""
     
-    def __init__(self, parent, charge):
+    def __init__(self, parent, charge, vorschlaege=(), material=None):
         self.result = None
+        self.material = material or ''  # Material-Nummer vom Etikett (z.B. GS1-AI 240)
+        self.vorschlag = None  # Gewählte Charge aus den Vorschlägen
+        self.vorschlaege = vorschlaege
         self.selected_type = None
         self.input_widgets = {}
         
         # Dialog-Fenster
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("⚠️ Ware nicht gefunden - Typ wählen")
-        self.dialog.geometry("550x750")  # Einheitliche Größe für alle Felder
+        self.dialog.geometry("550x750" if not vorschlaege else "550x950")  # Einheitliche Größe für alle Felder
         self.dialog.resizable(True, True)
         self.dialog.transient(parent)
         self.dialog.grab_set()
@@ -1522,6 +2062,9 @@ class NotFoundDialog:
                                foreground="red")
         title_label.pack(pady=(0, 15))
         
+        if self.vorschlaege:
+            self.create_vorschlag_liste(main_frame)
+        
         # Info
         info_label = ttk.Label(main_frame, 
                               text="Wählen Sie zuerst den Warentyp:",
@@ -1552,7 +2095,7 @@ class NotFoundDialog:
         
         # Basis-Eingabefelder
         self.charge_var = tk.StringVar(value=charge)
-        self.material_var = tk.StringVar()
+        self.material_var = tk.StringVar(value=self.material)
         self.kurztext_var = tk.StringVar()
         self.bemerkung_var = tk.StringVar()
         
@@ -1586,6 +2129,39 @@ class NotFoundDialog:
         # Initial: Rolle-Felder anzeigen
         self.on_type_change()
     
+    def create_vorschlag_liste(self, parent):
+        """Liste ähnlicher Chargen (Pfeiltasten + Enter oder Doppelklick übernimmt)"""
+        vorschlag_frame = ttk.LabelFrame(parent, text="Meinten Sie? (Etikett beschädigt oder unvollständig)",
+                                         padding="10")
+        vorschlag_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        self.vorschlag_liste = tk.Listbox(vorschlag_frame, height=len(self.vorschlaege), font=("Consolas", 10),
+                                          activestyle='dotbox', exportselection=False)
+        for charge, typ, kurztext, hinweis, gescannt in self.vorschlaege:
+            typ_icon = "🔵" if typ == 'ROLLE' else "🟨"
+            zeile = f"{charge:<14} {typ_icon} {kurztext[:28]:<28} ({hinweis})"
+            self.vorschlag_liste.insert(tk.END, zeile + (" – bereits gescannt" if gescannt else ""))
+        self.vorschlag_liste.pack(fill=tk.X)
+        self.vorschlag_liste.selection_set(0)
+        self.vorschlag_liste.activate(0)
+        
+        self.vorschlag_liste.bind('<Double-Button-1>', self.vorschlag_uebernehmen)
+        self.vorschlag_liste.bind('<Return>', self.vorschlag_uebernehmen)
+        ttk.Button(vorschlag_frame, text="✔ Vorschlag übernehmen",
+                   command=self.vorschlag_uebernehmen).pack(anchor=tk.E, pady=(8, 0))
+        
+        # Scanner-Bediener arbeiten mit der Tastatur: Auswahl sofort mit Pfeiltasten möglich
+        self.dialog.after_idle(self.vorschlag_liste.focus_set)
+    
+    def vorschlag_uebernehmen(self, event=None):
+        """Übernimmt die markierte Charge aus den Vorschlägen"""
+        auswahl = self.vorschlag_liste.curselection()
+        if auswahl:
+            self.vorschlag = self.vorschlaege[auswahl[0]][0]
+            self.dialog.destroy()
+        # Enter nicht zusätzlich an "Speichern" des Dialogs weitergeben
+        return "break"
+    
     def create_base_fields(self, parent):
         """Erstellt die Basis-Eingabefelder"""
         base_frame = ttk.LabelFrame(parent, text="Grunddaten", padding="10")
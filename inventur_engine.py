@@ -0,0 +1,2981 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+INVENTUR-KERN OHNE OBERFLÄCHE
+=============================
+
+Laden der Arbeitstabelle, Charge-Suche, Validierung, Erfassen/Löschen/Rückgängig,
+Journal/Datenbank und Excel-Export als reine Python-Schnittstelle (InventurEngine).
+Wird von inventur_app.py (Tk-Oberfläche) genutzt und läuft auch ohne Display,
+z.B. für Benchmarks oder auf dem Linux-Build-Rechner.
+
+Aufruf ohne Oberfläche: python inventur_engine.py [--daten data] {info,suchen,erfassen,loeschen,import,export,abgleich} ...
+"""
+
+import argparse
+import bisect
+import contextlib
+import csv
+import hashlib
+import json
+import logging
+import math
+import os
+import pickle
+import queue
+import re
+import shutil
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter, deque
+from datetime import datetime
+from operator import attrgetter
+from pathlib import Path
+from urllib.parse import quote
+
+
+class LazyModul:
+    """Platzhalter für ein schweres Modul, das erst beim ersten Zugriff importiert wird"""
+
+    def __init__(self, importieren):
+        self._importieren = importieren
+        self._modul = None
+
+    def laden(self):
+        """Importiert das Modul (einmalig) und gibt es zurück"""
+        if self._modul is None:
+            self._modul = self._importieren()
+        return self._modul
+
+    def __getattr__(self, name):
+        return getattr(self.laden(), name)
+
+
+def _pandas_importieren():
+    import pandas
+    return pandas
+
+
+def _openpyxl_importieren():
+    import openpyxl
+    return openpyxl
+
+
+# pandas/openpyxl erst im Hintergrund laden, damit das Fenster sofort erscheint
+pd = LazyModul(_pandas_importieren)
+openpyxl = LazyModul(_openpyxl_importieren)
+
+
+def module_laden():
+    """Importiert die schweren Module (läuft im Start-Thread) und liefert die Dauer in ms"""
+    start = time.perf_counter()
+    pd.laden()
+    openpyxl.laden()
+    return (time.perf_counter() - start) * 1000
+
+
+class ArbeitstabelleFehler(Exception):
+    """Arbeitstabelle unbrauchbar (Meldung wird dem Benutzer angezeigt)"""
+
+
+def charge_schluessel(charge):
+    """Normalisiert eine Charge: ohne Leerzeichen, numerische Chargen ohne führende Nullen"""
+    charge = str(charge).strip()
+    if charge.isdigit():
+        return charge.lstrip('0') or '0'
+    return charge
+
+
+# Spalten der Arbeitstabelle, die das Programm tatsächlich braucht (Charge immer zuerst)
+SPALTEN_ROLLEN = ('Charge', 'Material', 'Materialkurztext', 'Länge m', 'Breite mm', 'Frei verwendbar', 'Fach')
+SPALTEN_GRANULATE = ('Charge', 'Material', 'Materialkurztext', 'Frei verwendbar')
+SPALTEN_UMBENENNEN = {'Materialnummer': 'Material', 'LOrt': 'Lagerort'}
+# Zusätzliche Spalten der Zeilen anderer Werke/Lagerorte (Zweit-Index bei aktiver Partition)
+SPALTEN_PARTITION = ('Werk', 'Lagerort')
+
+
+class StammdatenBlatt:
+    """Schlanke Ablage eines Tabellenblatts: nur benötigte Spalten, Zeilen als Tupel"""
+
+    def __init__(self, spalten):
+        self.spalten = list(spalten)
+        self.zeilen = []
+        # Beim Nachladen entfallene Zeilen (Zeilennummern im Charge-Index bleiben so gültig)
+        self.entfernt = set()
+
+    def datensatz(self, zeile):
+        """Gibt eine Zeile als Dict (Spaltenname → Wert) zurück"""
+        return dict(zip(self.spalten, self.zeilen[zeile]))
+
+    def zeile_entfernen(self, zeile):
+        """Markiert eine Zeile als entfallen"""
+        self.entfernt.add(zeile)
+
+    def gueltige_zeilen(self):
+        """Alle Zeilen ohne die entfallenen"""
+        if not self.entfernt:
+            return self.zeilen
+        return [werte for zeile, werte in enumerate(self.zeilen) if zeile not in self.entfernt]
+
+    def __len__(self):
+        return len(self.zeilen) - len(self.entfernt)
+
+
+class Partition:
+    """Werk/Lagerort, den eine Station zählt: nur diese Zeilen der Arbeitstabelle werden geladen (leer = alle)"""
+
+    def __init__(self, werk=None, lagerort=None):
+        self.werke = self._auswahl(werk)
+        self.lagerorte = self._auswahl(lagerort)
+        self.text = " / ".join(f"{name} {', '.join(sorted(map(str, werte)))}"
+                               for name, werte in (('Werk', self._liste(werk)), ('Lagerort', self._liste(lagerort)))
+                               if werte)
+        # (Werk, Lagerort) wie in der Zelle → gehört dazu; je Datei gibt es nur wenige verschiedene Paare
+        self._passt = {}
+
+    @staticmethod
+    def _liste(werte):
+        """Einzelwert oder Liste aus der Konfiguration als Liste ohne leere Werte"""
+        if werte is None:
+            return []
+        if not isinstance(werte, (list, tuple, set)):
+            werte = [werte]
+        return [wert for wert in werte if str(wert).strip()]
+
+    @classmethod
+    def _auswahl(cls, werte):
+        """Normalisierte Werte wie bei Chargen (Excel speichert z.B. Lagerort 0101 teils als Zahl 101)"""
+        return frozenset(map(charge_schluessel, cls._liste(werte)))
+
+    @property
+    def aktiv(self):
+        return bool(self.werke or self.lagerorte)
+
+    def passt(self, werk, lagerort):
+        """True, wenn eine Zeile mit diesem Werk/Lagerort zur Partition gehört"""
+        ergebnis = self._passt.get((werk, lagerort))
+        if ergebnis is None:
+            ergebnis = ((not self.werke or charge_schluessel(werk) in self.werke)
+                        and (not self.lagerorte or charge_schluessel(lagerort) in self.lagerorte))
+            self._passt[(werk, lagerort)] = ergebnis
+        return ergebnis
+
+    def kennung(self, rest=False):
+        """Namensteil der Cache-Datei, z.B. W1701_L101 bzw. W1701_L101.rest für die übrigen Zeilen"""
+        teile = [kuerzel + '+'.join(sorted(werte)) for kuerzel, werte in (('W', self.werke), ('L', self.lagerorte))
+                 if werte]
+        kennung = re.sub(r'[^\w+-]', '-', '_'.join(teile))
+        return kennung + '.rest' if rest else kennung
+
+    def __str__(self):
+        return self.text or "alle Werke/Lagerorte"
+
+
+def zellwert(wert):
+    """Leere Zellen wie bei pandas als NaN, ganzzahlige Floats als int"""
+    if wert is None:
+        return float('nan')
+    if isinstance(wert, float) and wert.is_integer():
+        return int(wert)
+    return wert
+
+
+def zelltext(wert):
+    """Zellwert für Meldungen: leere Zellen als "leer", Kommazahlen mit Dezimalkomma"""
+    if wert != wert or wert is None:
+        return "leer"
+    if isinstance(wert, float):
+        return f"{wert:g}".replace('.', ',')
+    return str(wert)
+
+
+def arbeitstabelle_streamen(pfad, partition=None):
+    """Liest beide Tabellenblätter in einem Durchgang (openpyxl read-only) und baut dabei den Charge-Index auf
+    
+    Liefert (blatt_rollen, blatt_granulate, charge_index, fremde). Bei aktiver Partition enthalten Blätter
+    und Index nur deren Zeilen; fremde ist dann (blatt_rollen, blatt_granulate, charge_index) der übrigen
+    Zeilen mit den zusätzlichen Spalten Werk und Lagerort, sonst None.
+    """
+    filtern = partition is not None and partition.aktiv
+    wb = openpyxl.load_workbook(pfad, read_only=True, data_only=True)
+    try:
+        # Prüfe ob beide Tabellenblätter vorhanden sind
+        if 'Rollen' not in wb.sheetnames or 'Granulate' not in wb.sheetnames:
+            raise ArbeitstabelleFehler(
+                f"⚠️ FEHLER: Arbeitstabelle.xlsx muss zwei Tabellenblätter haben:\n"
+                f"- 'Rollen'\n"
+                f"- 'Granulate'\n\n"
+                f"Gefundene Blätter: {', '.join(wb.sheetnames)}\n\n"
+                f"Bitte überprüfen Sie die Datei.")
+        
+        charge_index = ChargeIndex()
+        fremd_index = ChargeIndex() if filtern else None
+        blaetter = []
+        fremd_blaetter = []
+        # Reihenfolge wie bei der bisherigen Suche: Rollen vor Granulaten, erste Zeile gewinnt
+        for typ, name, benoetigt in (('ROLLE', 'Rollen', SPALTEN_ROLLEN),
+                                     ('GRANULAT', 'Granulate', SPALTEN_GRANULATE)):
+            ws = wb[name]
+            ws.reset_dimensions()  # Dimensionsangaben mancher Exporte sind unzuverlässig
+            zeilen = ws.iter_rows(values_only=True)
+            
+            # Kopfzeile: nur die benötigten Spalten übernehmen ("Materialnummer" → "Material", "LOrt" → "Lagerort")
+            kopf = [SPALTEN_UMBENENNEN.get(str(k), str(k)) for k in next(zeilen, ())]
+            positionen = [kopf.index(spalte) for spalte in benoetigt if spalte in kopf]
+            blatt = StammdatenBlatt(spalte for spalte in benoetigt if spalte in kopf)
+            blaetter.append(blatt)
+            fremd_blatt = StammdatenBlatt(blatt.spalten + list(SPALTEN_PARTITION))
+            fremd_blaetter.append(fremd_blatt)
+            if 'Charge' not in kopf:
+                continue
+            
+            if filtern:
+                for spalte, auswahl in (('Werk', partition.werke), ('Lagerort', partition.lagerorte)):
+                    if auswahl and spalte not in kopf:
+                        raise ArbeitstabelleFehler(
+                            f"Tabellenblatt '{name}' hat keine Spalte '{spalte}' - "
+                            f"Auswahl {partition} nicht möglich.")
+                # Fehlende Spalte (nur Werk oder nur Lagerort ausgewählt) → Position hinter der Zeile, Wert None
+                werk_pos, lagerort_pos = (kopf.index(spalte) if spalte in kopf else len(kopf)
+                                          for spalte in SPALTEN_PARTITION)
+            
+            charge_pos = positionen[0]
+            for werte in zeilen:
+                # Zeilen ohne Charge können nie gefunden werden (auch Leerzeilen am Ende)
+                if charge_pos >= len(werte) or werte[charge_pos] is None:
+                    continue
+                zeile = tuple(zellwert(werte[pos]) if pos < len(werte) else float('nan') for pos in positionen)
+                zeile = (str(zeile[0]),) + zeile[1:]
+                if filtern:
+                    werk = werte[werk_pos] if werk_pos < len(werte) else None
+                    lagerort = werte[lagerort_pos] if lagerort_pos < len(werte) else None
+                    if not partition.passt(werk, lagerort):
+                        fremd_index.hinzufuegen(typ, len(fremd_blatt.zeilen), zeile[0])
+                        fremd_blatt.zeilen.append(zeile + (zellwert(werk), zellwert(lagerort)))
+                        continue
+                charge_index.hinzufuegen(typ, len(blatt.zeilen), zeile[0])
+                blatt.zeilen.append(zeile)
+    finally:
+        wb.close()
+    
+    charge_index.sortierung_aufbauen()
+    fremde = None
+    if filtern:
+        fremd_index.sortierung_aufbauen()
+        fremde = (fremd_blaetter[0], fremd_blaetter[1], fremd_index)
+    
+    return blaetter[0], blaetter[1], charge_index, fremde
+
+
+def _werte_gleich(alt, neu):
+    """Vergleicht zwei Zellwerte, leere Zellen (NaN) sind untereinander gleich"""
+    return alt == neu or (alt != alt and neu != neu)
+
+
+def zeilen_unterschiede(alt, neu):
+    """Abweichende Spalten zweier Datensätze (Dicts) als {Spalte: (alt, neu)}"""
+    leer = float('nan')
+    return {spalte: (alt.get(spalte, leer), neu.get(spalte, leer)) for spalte in dict.fromkeys([*alt, *neu])
+            if not _werte_gleich(alt.get(spalte, leer), neu.get(spalte, leer))}
+
+
+def stammdaten_vergleichen(alt, neu):
+    """Vergleicht zwei Stände der Arbeitstabelle über die Charge (darf in einem eigenen Thread laufen)
+    
+    alt und neu sind (stamm_rollen, stamm_granulate, charge_index). Liefert eine Liste von
+    (Art, Charge, Typ, Zeile) mit Art 'neu', 'geaendert' oder 'entfernt'; Typ und Zeile (Tupel) gehören
+    zum neuen Stand, bei 'entfernt' ist Zeile None.
+    """
+    alt_blaetter = {'ROLLE': alt[0], 'GRANULAT': alt[1]}
+    neu_blaetter = {'ROLLE': neu[0], 'GRANULAT': neu[1]}
+    alt_exakt = alt[2].exakt
+    unterschiede = []
+    
+    for charge, (typ, zeile) in neu[2].exakt.items():
+        neu_blatt = neu_blaetter[typ]
+        werte = neu_blatt.zeilen[zeile]
+        vorher = alt_exakt.get(charge)
+        if vorher is None:
+            unterschiede.append(('neu', charge, typ, werte))
+            continue
+        
+        alt_blatt = alt_blaetter[vorher[0]]
+        alt_werte = alt_blatt.zeilen[vorher[1]]
+        if vorher[0] == typ and alt_blatt.spalten == neu_blatt.spalten:
+            gleich = alt_werte == werte or all(map(_werte_gleich, alt_werte, werte))
+        else:
+            gleich = vorher[0] == typ and not zeilen_unterschiede(alt_blatt.datensatz(vorher[1]),
+                                                                  neu_blatt.datensatz(zeile))
+        if not gleich:
+            unterschiede.append(('geaendert', charge, typ, werte))
+    
+    neu_exakt = neu[2].exakt
+    unterschiede.extend(('entfernt', charge, typ, None)
+                        for charge, (typ, _) in alt_exakt.items() if charge not in neu_exakt)
+    return unterschiede
+
+
+def unterschiede_text(unterschiede):
+    """Kurzfassung eines Stammdaten-Vergleichs (z.B. 3 neu, 1 geändert, 0 entfernt)"""
+    anzahl = Counter(art for art, *_ in unterschiede)
+    return f"{anzahl['neu']} neu, {anzahl['geaendert']} geändert, {anzahl['entfernt']} entfernt"
+
+
+class InventurEintrag:
+    """Inventur-Eintrag mit festen Feldern (__slots__ statt dict, spart Speicher je Scan)"""
+
+    __slots__ = ('zeitstempel', 'charge', 'material', 'kurztext', 'bemerkung', 'status')
+    TYP = None
+    FELDER = __slots__
+
+    def __init__(self, **werte):
+        # Fehlende Felder leer wie bisher beim Excel-Export (item.get(feld, ''))
+        for feld in self.FELDER:
+            setattr(self, feld, werte.get(feld, ''))
+
+    @property
+    def typ(self):
+        return self.TYP
+
+    @staticmethod
+    def aus_dict(daten):
+        """Erzeugt den passenden Eintrag (Rolle/Granulat) aus einem Dict (Journal, Datenbank, Dialog)"""
+        klasse = RollenEintrag if daten.get('typ') == 'ROLLE' else GranulatEintrag
+        return klasse(**daten)
+
+    def als_dict(self):
+        """Gibt den Eintrag als Dict zurück (für Journal und Datenbank)"""
+        daten = {feld: getattr(self, feld) for feld in self.FELDER}
+        daten['typ'] = self.TYP
+        return daten
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.als_dict()!r})"
+
+
+class RollenEintrag(InventurEintrag):
+    """Eintrag für eine Rolle"""
+
+    __slots__ = ('laenge', 'flaeche', 'breite_original', 'breite_kontrolliert', 'fach_original', 'fach_kontrolliert')
+    TYP = 'ROLLE'
+    FELDER = InventurEintrag.FELDER + __slots__
+
+    @classmethod
+    def aus_stammdaten(cls, item, charge):
+        """Neuer Scan aus einer Zeile der Arbeitstabelle (Breite/Fach kontrolliert noch offen)"""
+        return cls(
+            charge=charge,
+            material=str(item.get('Material', '')),
+            kurztext=str(item.get('Materialkurztext', '')),
+            laenge=float(item.get('Länge m', 0)),
+            breite_original=int(item.get('Breite mm', 0)),  # Original aus Arbeitstabelle
+            flaeche=float(item.get('Frei verwendbar', 0)),
+            fach_original=str(item.get('Fach', '') if pd.notna(item.get('Fach')) else ''),  # Original aus Arbeitstabelle
+            status='gefunden'
+        )
+
+
+class GranulatEintrag(InventurEintrag):
+    """Eintrag für ein Granulat"""
+
+    __slots__ = ('frei_verwendbar_kg', 'zahlmenge_kg')
+    TYP = 'GRANULAT'
+    FELDER = InventurEintrag.FELDER + __slots__
+
+    @classmethod
+    def aus_stammdaten(cls, item, charge):
+        """Neuer Scan aus einer Zeile der Arbeitstabelle (Zählmenge noch offen)"""
+        return cls(
+            charge=charge,
+            material=str(item.get('Material', '')),
+            kurztext=str(item.get('Materialkurztext', '')),
+            frei_verwendbar_kg=float(item.get('Frei verwendbar', 0)),  # Soll-Gewicht
+            status='gefunden'
+        )
+
+
+# Spalten der Inventur-Dateien: (Excel-Spalte, Schlüssel im Eintrag, Art)
+INVENTUR_SPALTEN_ROLLEN = (
+    ('Datum/Uhrzeit', 'zeitstempel', 'text'),
+    ('Charge', 'charge', 'text'),
+    ('Material', 'material', 'text'),
+    ('Materialkurztext', 'kurztext', 'text'),
+    ('Länge m', 'laenge', 'float'),
+    ('Fläche m²', 'flaeche', 'float'),
+    ('Breite mm', 'breite_original', 'int'),
+    ('Breite kontrolliert', 'breite_kontrolliert', 'int'),
+    ('Fach', 'fach_original', 'text'),
+    ('Fach kontrolliert', 'fach_kontrolliert', 'text'),
+    ('Bemerkung', 'bemerkung', 'text'),
+)
+INVENTUR_SPALTEN_GRANULAT = (
+    ('Datum/Uhrzeit', 'zeitstempel', 'text'),
+    ('Charge', 'charge', 'text'),
+    ('Material', 'material', 'text'),
+    ('Materialkurztext', 'kurztext', 'text'),
+    ('Frei verwendbar (KG)', 'frei_verwendbar_kg', 'float'),
+    ('Zählmenge (KG)', 'zahlmenge_kg', 'float'),
+    ('Bemerkung', 'bemerkung', 'text'),
+)
+
+
+def inventur_blatt_umwandeln(df, spalten, typ, status):
+    """Wandelt ein Inventur-Tabellenblatt spaltenweise in Einträge um
+    
+    Liefert (eintraege, probleme). probleme enthält (Excel-Zeile, Charge, Spalte, Wert) je ungültiger
+    Zahl; die Zeile wird mit 0 übernommen, damit sie beim nächsten Speichern nicht verloren geht.
+    """
+    anzahl = len(df)
+    chargen = df['Charge'] if 'Charge' in df.columns else None
+    schluessel = []
+    spalten_werte = []
+    probleme = []
+    
+    for spalte, name, art in spalten:
+        if spalte in df.columns:
+            roh = df[spalte]
+        else:
+            roh = pd.Series([None] * anzahl, index=df.index, dtype=object)
+        
+        if art == 'text':
+            # Leere Zellen (und früher gespeichertes "nan") als leerer Text
+            werte = roh.fillna('').astype(str)
+            werte = werte.where(werte.str.lower() != 'nan', '')
+        else:
+            werte = pd.to_numeric(roh, errors='coerce')
+            # Leere Zahlenfelder sind bei Kommazahlen erlaubt (NaN), bei Ganzzahlen nicht
+            ungueltig = werte.isna() & roh.notna() if art == 'float' else werte.isna()
+            if ungueltig.any():
+                for position in ungueltig.to_numpy().nonzero()[0]:
+                    charge = chargen.iloc[position] if chargen is not None else ''
+                    probleme.append((int(position) + 2, charge, spalte, roh.iloc[position]))
+                werte = werte.where(~ungueltig, 0)
+            werte = werte.astype('int64' if art == 'int' else 'float64')
+        
+        schluessel.append(name)
+        spalten_werte.append(werte.tolist())
+    
+    klasse = RollenEintrag if typ == 'ROLLE' else GranulatEintrag
+    eintraege = [klasse(**dict(zip(schluessel, zeile)), status=status) for zeile in zip(*spalten_werte)]
+    return eintraege, probleme
+
+
+class ChargeIndex:
+    """Hash-Index über die Chargen beider Tabellenblätter (O(1)-Suche statt DataFrame-Maske)
+    
+    Für beschädigte oder nur teilweise gelesene Etiketten zusätzlich sortierte Chargen (vorwärts und
+    rückwärts) für die Suche nach Anfang/Ende per bisect und nach ähnlichen Chargen (Editierabstand).
+    """
+
+    # Kürzere Bruchstücke passen auf zu viele Chargen
+    MIN_TEIL = 4
+    # Abstand 2 nur bei kleinem Zeichenvorrat (Ziffern): die Varianten wachsen mit (Länge · Zeichen)²
+    MAX_ZEICHEN_ABSTAND_2 = 12
+    # Beim Entfernen gesuchte führende Nullen über die Länge der entfernten Charge hinaus
+    MAX_NULLEN = 10
+
+    def __init__(self):
+        # Exakte Charge → (Typ, Zeile); Variante ohne führende Nullen → (Typ, Zeile)
+        self.exakt = {}
+        self.varianten = {}
+        # Sortierte Chargen bzw. umgedrehte Chargen und vorkommende Zeichen (None, solange nicht aufgebaut)
+        self.sortiert = None
+        self.rueckwaerts = None
+        self.zeichen = None
+
+    @classmethod
+    def aus_dataframes(cls, df_rollen, df_granulate):
+        """Baut den Index einmalig aus den Arbeitstabellen-DataFrames auf"""
+        index = cls()
+        # Reihenfolge wie bei der bisherigen Suche: Rollen vor Granulaten, erste Zeile gewinnt
+        for typ, df in (('ROLLE', df_rollen), ('GRANULAT', df_granulate)):
+            if df is None or 'Charge' not in df.columns:
+                continue
+            for zeile, charge in enumerate(df['Charge']):
+                index.hinzufuegen(typ, zeile, charge)
+        index.sortierung_aufbauen()
+        return index
+
+    def sortierung_aufbauen(self):
+        """Sortiert alle Chargen einmalig für die Teil- und Ähnlichkeitssuche"""
+        self.sortiert = sorted(self.exakt)
+        self.rueckwaerts = sorted(charge[::-1] for charge in self.exakt)
+        self.zeichen = ''.join(sorted(set(''.join(self.exakt))))
+
+    def hinzufuegen(self, typ, zeile, charge):
+        """Nimmt eine Charge auf (bestehende Einträge haben Vorrang)"""
+        charge = str(charge).strip()
+        if self.sortiert is not None and charge not in self.exakt:
+            bisect.insort(self.sortiert, charge)
+            bisect.insort(self.rueckwaerts, charge[::-1])
+            self.zeichen = ''.join(sorted(set(self.zeichen + charge)))
+        self.exakt.setdefault(charge, (typ, zeile))
+        self.varianten.setdefault(charge_schluessel(charge), (typ, zeile))
+
+    def entfernen(self, charge):
+        """Nimmt eine Charge heraus und gibt (Typ, Zeile) oder None zurück
+        
+        Zeigte die Variante ohne führende Nullen auf diese Charge, übernimmt sie eine verbleibende Charge
+        mit demselben Schlüssel (wieder Rollen vor Granulaten, erste Zeile gewinnt).
+        """
+        charge = str(charge).strip()
+        treffer = self.exakt.pop(charge, None)
+        if treffer is None:
+            return None
+        if self.sortiert is not None:
+            del self.sortiert[bisect.bisect_left(self.sortiert, charge)]
+            del self.rueckwaerts[bisect.bisect_left(self.rueckwaerts, charge[::-1])]
+        
+        schluessel = charge_schluessel(charge)
+        if self.varianten.get(schluessel) == treffer:
+            del self.varianten[schluessel]
+            # Gleicher Schlüssel nur bei numerischen Chargen mit anderer Anzahl führender Nullen
+            if schluessel.isdigit():
+                kandidaten = (schluessel.rjust(laenge, '0')
+                              for laenge in range(len(schluessel), len(charge) + self.MAX_NULLEN))
+                gleiche = [self.exakt[kandidat] for kandidat in kandidaten if kandidat in self.exakt]
+                if gleiche:
+                    self.varianten[schluessel] = min(gleiche, key=lambda t: (t[0] != 'ROLLE', t[1]))
+        return treffer
+
+    def suche(self, charge):
+        """Gibt (Typ, Zeile) oder None zurück"""
+        charge = str(charge).strip()
+        treffer = self.exakt.get(charge)
+        if treffer is None:
+            # Fallback: Variante ohne führende Nullen (Scan oder Arbeitstabelle)
+            treffer = self.varianten.get(charge_schluessel(charge))
+        return treffer
+
+    @staticmethod
+    def _mit_anfang(sortiert, teil, anzahl):
+        """Bis zu anzahl Einträge der sortierten Liste, die mit teil beginnen (bisect, O(log n + anzahl))"""
+        start = bisect.bisect_left(sortiert, teil)
+        return [wert for wert in sortiert[start:start + anzahl] if wert.startswith(teil)]
+
+    def _varianten(self, wort):
+        """Alle Zeichenketten mit Editierabstand 1 zu wort (nur aus Zeichen, die in Chargen vorkommen)"""
+        varianten = set()
+        for i in range(len(wort) + 1):
+            vorne, hinten = wort[:i], wort[i:]
+            if hinten:
+                varianten.add(vorne + hinten[1:])
+            for zeichen in self.zeichen:
+                varianten.add(vorne + zeichen + hinten)
+                if hinten:
+                    varianten.add(vorne + zeichen + hinten[1:])
+        varianten.discard(wort)
+        return varianten
+
+    def _aehnliche(self, muster, max_abstand, anzahl):
+        """Chargen mit Editierabstand <= max_abstand als {Charge: Abstand}
+        
+        Statt jede Charge mit dem Muster zu vergleichen, werden die Varianten des Musters erzeugt und im
+        Hash-Index nachgeschlagen (unabhängig von der Größe der Arbeitstabelle). Abstand 2 nur, wenn
+        Abstand 1 noch nicht genug Vorschläge liefert.
+        """
+        exakt = self.exakt
+        treffer = {muster: 0} if muster in exakt else {}
+        if max_abstand < 1:
+            return treffer
+        
+        nachbarn = self._varianten(muster)
+        treffer.update((charge, 1) for charge in nachbarn if charge in exakt)
+        if max_abstand < 2 or len(treffer) >= anzahl or len(self.zeichen) > self.MAX_ZEICHEN_ABSTAND_2:
+            return treffer
+        
+        for nachbar in nachbarn:
+            for charge in self._varianten(nachbar):
+                if charge in exakt and charge not in treffer:
+                    treffer[charge] = 2
+        return treffer
+
+    def vorschlaege(self, teil, max_abstand=2, anzahl=8):
+        """Rangliste möglicher Chargen für ein beschädigtes oder unvollständiges Etikett
+        
+        Liefert bis zu anzahl (Charge, Typ, Zeile, Art, Abstand), Art ist 'anfang', 'ende' oder 'aehnlich'.
+        Abstand: fehlende Zeichen bei Anfang/Ende, sonst Editierabstand; kleinerer Abstand zuerst.
+        """
+        teil = str(teil).strip()
+        if len(teil) < self.MIN_TEIL:
+            return []
+        if self.sortiert is None:
+            self.sortierung_aufbauen()
+        
+        kandidaten = {}
+        for charge in self._mit_anfang(self.sortiert, teil, anzahl):
+            kandidaten[charge] = ('anfang', len(charge) - len(teil))
+        for umgedreht in self._mit_anfang(self.rueckwaerts, teil[::-1], anzahl):
+            kandidaten.setdefault(umgedreht[::-1], ('ende', len(umgedreht) - len(teil)))
+        # Erlaubter Abstand wächst mit der Länge: bei kurzen Bruchstücken wäre sonst fast alles ähnlich
+        erlaubt = min(max_abstand, len(teil) // 4)
+        fehlend = anzahl - sum(1 for _, abstand in kandidaten.values() if abstand <= erlaubt)
+        for charge, abstand in self._aehnliche(teil, erlaubt, fehlend).items():
+            if charge not in kandidaten or abstand < kandidaten[charge][1]:
+                kandidaten[charge] = ('aehnlich', abstand)
+        
+        # Bei gleichem Abstand ist ein gelesener Anfang/Schluss wahrscheinlicher als ein Lesefehler
+        rang = {'anfang': 0, 'ende': 1, 'aehnlich': 2}
+        rangliste = sorted(kandidaten.items(), key=lambda k: (k[1][1], rang[k[1][0]], k[0]))[:anzahl]
+        return [(charge, *self.exakt[charge], art, abstand) for charge, (art, abstand) in rangliste]
+
+    def __len__(self):
+        return len(self.exakt)
+
+
+# GS1-Datenbezeichner (AI) → (feste Datenlänge, Höchstlänge); feste Länge None = variabel, endet mit FNC1
+# Gewichte/Maße 31nn-36nn: vierstellig, die letzte Ziffer gibt die Nachkommastellen an
+GS1_AI = {
+    '00': (18, 18), '01': (14, 14), '02': (14, 14), '10': (None, 20), '11': (6, 6), '12': (6, 6),
+    '13': (6, 6), '15': (6, 6), '16': (6, 6), '17': (6, 6), '20': (2, 2), '21': (None, 20), '22': (None, 20),
+    '30': (None, 8), '37': (None, 8), '240': (None, 30), '241': (None, 30), '250': (None, 30),
+    '251': (None, 30), '400': (None, 30), '401': (None, 30), '403': (None, 30),
+    **{f'41{i}': (13, 13) for i in range(8)},
+    **{f'{i:02d}': (None, 90) for i in range(90, 100)},
+    **{f'{i}{n}': (6, 6) for i in range(310, 370) for n in range(10)},
+}
+# Symbologie-Kennungen (ISO/IEC 15424), die einen GS1-Inhalt ankündigen: GS1-128, DataMatrix, QR, DataBar
+GS1_KENNUNGEN = (']C1', ']d2', ']Q3', ']e0')
+GS1_TRENNZEICHEN = '\x1d'  # FNC1 innerhalb der Daten (ASCII GS)
+SYMBOLOGIE_KENNUNG = re.compile(r'^\][A-Za-z][0-9]')
+GS1_KLARSCHRIFT = re.compile(r'\((\d{2,4})\)([^(]*)')
+
+
+def gs1_zerlegen(daten, trennzeichen=(GS1_TRENNZEICHEN,)):
+    """Zerlegt GS1-Elementstrings in {AI: Wert}; EingabeFehler bei unbekanntem AI oder falscher Länge
+    
+    Versteht die Scanner-Ausgabe (AIs direkt hintereinander, FNC1 als GS nach variablen Feldern) und die
+    Klarschrift mit Klammern wie "(10)4327915312(3103)012500".
+    """
+    if daten.startswith('('):
+        return {ai: wert for ai, wert in GS1_KLARSCHRIFT.findall(daten)}
+    for zeichen in trennzeichen:
+        daten = daten.replace(zeichen, GS1_TRENNZEICHEN)
+    
+    werte = {}
+    pos = 0
+    while pos < len(daten):
+        if daten[pos] == GS1_TRENNZEICHEN:
+            pos += 1
+            continue
+        ai = next((daten[pos:pos + n] for n in (2, 3, 4) if daten[pos:pos + n] in GS1_AI), None)
+        if ai is None:
+            raise EingabeFehler('charge', f"GS1-Etikett: unbekannter Datenbezeichner bei '{daten[pos:pos + 4]}'")
+        fest, hoechstens = GS1_AI[ai]
+        start = pos + len(ai)
+        if fest is not None:
+            ende = start + fest
+        else:
+            ende = daten.find(GS1_TRENNZEICHEN, start)
+            ende = len(daten) if ende < 0 else ende
+        wert = daten[start:ende]
+        if len(wert) > hoechstens or (fest is not None and len(wert) != fest):
+            raise EingabeFehler('charge', f"GS1-Etikett: Länge von ({ai}) passt nicht: '{wert}'")
+        werte[ai] = wert
+        pos = ende
+    return werte
+
+
+def gs1_etikett(roh, regel):
+    """Etikettenart 'gs1': Charge, Material und Nettogewicht aus den in der Regel genannten AIs
+    
+    Nur Inhalte mit GS1-Kennung, FNC1 oder Klarschrift-Klammern; eine reine Chargennummer wie
+    "1012345678" würde sonst als (10) + "12345678" gelesen ("ohne_kennung": true erzwingt es).
+    """
+    trennzeichen = regel.get('trennzeichen', [GS1_TRENNZEICHEN])
+    if roh.startswith(GS1_KENNUNGEN):
+        daten = roh[3:]
+    elif roh.startswith('(') or any(zeichen in roh for zeichen in trennzeichen) or regel.get('ohne_kennung'):
+        daten = roh
+    else:
+        return None
+    
+    werte = gs1_zerlegen(daten.lstrip(GS1_TRENNZEICHEN), trennzeichen)
+    ergebnis = {'charge': werte.get(regel.get('charge', '10')), 'material': werte.get(regel.get('material', '240'))}
+    # Gewicht z.B. "310" → erster AI 3100-3109, die letzte Ziffer sind die Nachkommastellen
+    gewicht_ai = regel.get('gewicht', '310')
+    for ai, wert in werte.items():
+        if len(ai) == 4 and ai[:3] == gewicht_ai:
+            ergebnis['zahlmenge'] = int(wert) / 10 ** int(ai[3])
+            break
+    return ergebnis
+
+
+def regex_etikett(roh, regel):
+    """Etikettenart 'regex': benannte Gruppen charge, material und zahlmenge (Dezimalkomma erlaubt)"""
+    treffer = re.fullmatch(regel['muster'], roh)
+    if treffer is None:
+        return None
+    ergebnis = {feld: wert for feld, wert in treffer.groupdict().items() if wert}
+    if 'zahlmenge' in ergebnis:
+        ergebnis['zahlmenge'] = float(ergebnis['zahlmenge'].replace(',', '.'))
+    return ergebnis
+
+
+# Etikettenarten: weitere Formate als Funktion (roh, regel) → Felder oder None (passt nicht) eintragen
+ETIKETT_FORMATE = {'gs1': gs1_etikett, 'regex': regex_etikett}
+STANDARD_ETIKETTEN = [{'name': 'GS1', 'format': 'gs1', 'charge': '10', 'material': '240', 'gewicht': '310'}]
+
+
+class ScanDekodierer:
+    """Zerlegt den gelesenen Barcode vor der Suche nach den Etiketten-Regeln aus der Konfiguration
+    
+    Die Regeln werden der Reihe nach probiert, die erste mit Charge gewinnt. Passt keine, ist der
+    ganze Inhalt die Charge (bisheriges Verhalten).
+    """
+
+    def __init__(self, regeln=None):
+        self.regeln = [regel for regel in (STANDARD_ETIKETTEN if regeln is None else regeln)
+                       if regel.get('aktiv', True)]
+        unbekannt = {regel.get('format') for regel in self.regeln} - set(ETIKETT_FORMATE)
+        if unbekannt:
+            raise ValueError(f"Unbekanntes Etikettenformat: {', '.join(map(str, unbekannt))}")
+        for regel in self.regeln:
+            if regel['format'] == 'regex':
+                re.compile(regel['muster'])  # Fehler im Muster schon beim Start melden
+
+    def dekodieren(self, roh):
+        """Gibt {'charge', 'material', 'zahlmenge', 'etikett'} zurück (fehlende Angaben None)"""
+        roh = str(roh).strip()
+        ohne_charge = None
+        for regel in self.regeln:
+            felder = ETIKETT_FORMATE[regel['format']](roh, regel)
+            if felder is None:
+                continue
+            name = regel.get('name', regel['format'])
+            if felder.get('charge'):
+                return {'charge': felder['charge'].strip(), 'material': felder.get('material'),
+                        'zahlmenge': felder.get('zahlmenge'), 'etikett': name}
+            ohne_charge = ohne_charge or name
+        if ohne_charge:
+            raise EingabeFehler('charge', f"Etikett '{ohne_charge}' enthält keine Charge")
+        
+        # Kennung anderer Symbologien (z.B. "]C0" reines Code 128) gehört nicht zur Charge
+        if SYMBOLOGIE_KENNUNG.match(roh):
+            roh = roh[3:]
+        return {'charge': roh, 'material': None, 'zahlmenge': None, 'etikett': None}
+
+
+# Spalten eines Scanner-Speicherauszugs (CSV); Erkennung über den Anfang des Spaltennamens
+BATCH_SPALTEN = (('charge', 'Charge'), ('fach', 'Fach'), ('breite', 'Breite'),
+                 ('zählmenge', 'Zählmenge'), ('zaehlmenge', 'Zählmenge'), ('zahlmenge', 'Zählmenge'),
+                 ('bemerkung', 'Bemerkung'))
+
+
+def scan_datei_lesen(pfad):
+    """Liest einen Scanner-Speicherauszug: Textdatei (eine Charge je Zeile) oder CSV mit Spalte 'Charge'"""
+    with open(pfad, 'r', encoding='utf-8-sig', errors='replace') as f:
+        zeilen = f.read().splitlines()
+    
+    if zeilen and 'charge' in zeilen[0].lower():
+        # CSV mit Kopfzeile, Trennzeichen (; , Tab) wird erkannt
+        df = pd.read_csv(pfad, sep=None, engine='python', dtype=str, encoding='utf-8-sig',
+                         keep_default_na=False)
+        umbenennen = {}
+        for spalte in df.columns:
+            name = str(spalte).strip().lower()
+            for anfang, ziel in BATCH_SPALTEN:
+                if name.startswith(anfang) and ziel not in umbenennen.values():
+                    umbenennen[spalte] = ziel
+                    break
+        df = df.rename(columns=umbenennen)
+        df = df[[spalte for spalte in df.columns if spalte in umbenennen.values()]]
+    else:
+        # Reiner Auszug: erstes Feld jeder Zeile ist die Charge
+        chargen = [zeile.replace(';', '\t').replace(',', '\t').split('\t')[0] for zeile in zeilen]
+        df = pd.DataFrame({'Charge': chargen}, dtype=str)
+    
+    df['Charge'] = df['Charge'].fillna('').str.strip()
+    return df[df['Charge'] != ''].reset_index(drop=True)
+
+
+def chargen_normalisieren(chargen):
+    """charge_schluessel für eine ganze Series mit pandas-Stringoperationen (mit pyarrow in Arrow-Kerneln)"""
+    text = chargen.astype(str).str.strip()
+    ohne_nullen = text.str.lstrip('0')
+    return text.mask(text.str.isdigit(), ohne_nullen.mask(ohne_nullen == '', '0'))
+
+
+def chargen_klassifizieren(df, charge_index, bereits_gescannt=()):
+    """Ordnet alle Chargen eines Auszugs in einem Durchgang zu (Spalten Schluessel, Typ, Zeile, Klasse)
+
+    Klasse ist 'ROLLE', 'GRANULAT', 'DUPLIKAT' (schon gescannt oder mehrfach im Auszug) oder 'NICHT_GEFUNDEN'.
+    """
+    df = df.copy()
+    charge = df['Charge'].astype(str).str.strip()
+    df['Schluessel'] = chargen_normalisieren(charge)
+    
+    # Exakte Charge, sonst Variante ohne führende Nullen (wie ChargeIndex.suche)
+    treffer = charge.map(charge_index.exakt)
+    treffer = treffer.where(treffer.notna(), df['Schluessel'].map(charge_index.varianten))
+    gefunden = treffer.notna()
+    df['Typ'] = None
+    df['Zeile'] = -1
+    if gefunden.any():
+        typ_zeile = pd.DataFrame(treffer[gefunden].tolist(), index=treffer[gefunden].index, columns=['Typ', 'Zeile'])
+        df.loc[gefunden, 'Typ'] = typ_zeile['Typ']
+        df.loc[gefunden, 'Zeile'] = typ_zeile['Zeile']
+    
+    df['Klasse'] = df['Typ'].fillna('NICHT_GEFUNDEN')
+    duplikat = df['Schluessel'].isin(list(bereits_gescannt)) | df['Schluessel'].duplicated()
+    df.loc[duplikat, 'Klasse'] = 'DUPLIKAT'
+    return df
+
+
+def eintraege_tabelle(eintraege, typ):
+    """DataFrame der Einträge eines Typs (eine Spalte je Feld, ohne Zeilen-Objekte in pandas)"""
+    klasse = RollenEintrag if typ == 'ROLLE' else GranulatEintrag
+    auswahl = [eintrag for eintrag in eintraege if eintrag.typ == typ]
+    return pd.DataFrame(list(map(attrgetter(*klasse.FELDER), auswahl)), columns=list(klasse.FELDER))
+
+
+def _abgleich_typ(blatt, eintraege, typ):
+    """Verknüpft Arbeitstabelle und Scans eines Typs über die normalisierte Charge (ein Outer-Join)"""
+    soll = pd.DataFrame(blatt.gueltige_zeilen(), columns=blatt.spalten)
+    soll['Schluessel'] = chargen_normalisieren(soll['Charge'])
+    soll = soll.drop_duplicates('Schluessel')  # erste Zeile gewinnt wie im Charge-Index
+    
+    ist = eintraege_tabelle(eintraege, typ)
+    ist['Schluessel'] = chargen_normalisieren(ist['charge'])
+    
+    abgleich = soll.merge(ist, on='Schluessel', how='outer', indicator=True)
+    abgleich.insert(0, 'Typ', typ)
+    return abgleich
+
+
+def _abweichungen(abgleich, soll_spalte, ist_spalte, grenze, spalten):
+    """Zugeordnete Zeilen, deren Ist-Wert um mehr als die Grenze (Series oder Zahl) vom Soll abweicht"""
+    soll = pd.to_numeric(abgleich[soll_spalte], errors='coerce')
+    ist = pd.to_numeric(abgleich[ist_spalte], errors='coerce')
+    differenz = ist - soll
+    auffaellig = (abgleich['_merge'] == 'both') & differenz.notna() & (differenz.abs() > grenze)
+    
+    ergebnis = abgleich.loc[auffaellig, list(spalten)].rename(columns=ABGLEICH_SPALTEN)
+    ergebnis['Soll'] = soll[auffaellig]
+    ergebnis['Ist'] = ist[auffaellig]
+    ergebnis['Abweichung'] = differenz[auffaellig]
+    ergebnis['Abweichung %'] = (differenz[auffaellig] / soll[auffaellig].where(soll[auffaellig] != 0) * 100).round(1)
+    return ergebnis.sort_values('Abweichung', key=lambda s: s.abs(), ascending=False)
+
+
+# Spaltennamen der Scans im Abgleich-Bericht
+ABGLEICH_SPALTEN = {'charge': 'Charge (Scan)', 'fach_kontrolliert': 'Fach kontrolliert', 'status': 'Status',
+                    'zeitstempel': 'Datum/Uhrzeit', 'material': 'Material (Scan)',
+                    'kurztext': 'Materialkurztext (Scan)', 'bemerkung': 'Bemerkung'}
+
+
+def abgleich_berechnen(stamm_rollen, stamm_granulate, eintraege,
+                       toleranz_breite_mm=0, toleranz_gewicht_kg=0, toleranz_gewicht_prozent=0):
+    """Soll/Ist-Abgleich von Arbeitstabelle und Scans, spaltenweise ohne Schleife über die Zeilen
+    
+    Liefert {Blattname: DataFrame} mit Zusammenfassung, Nicht_gescannt, Zusaetzlich, Breite_Abweichung
+    und Gewicht_Abweichung. Ein Gewicht weicht ab, wenn die Differenz größer ist als die kg-Toleranz
+    und größer als die Prozent-Toleranz bezogen auf das Soll-Gewicht.
+    """
+    rollen = _abgleich_typ(stamm_rollen, eintraege, 'ROLLE')
+    granulate = _abgleich_typ(stamm_granulate, eintraege, 'GRANULAT')
+    
+    # Arbeitstabelle ohne Scan bzw. Scans ohne Zeile in der Arbeitstabelle
+    nicht_gescannt = pd.concat([
+        abgleich.loc[abgleich['_merge'] == 'left_only', ['Typ'] + blatt.spalten]
+        for abgleich, blatt in ((rollen, stamm_rollen), (granulate, stamm_granulate))
+    ], ignore_index=True)
+    zusatz_spalten = ['Typ', 'charge', 'material', 'kurztext', 'status', 'zeitstempel', 'bemerkung']
+    zusaetzlich = pd.concat([
+        abgleich.loc[abgleich['_merge'] == 'right_only', zusatz_spalten]
+        for abgleich in (rollen, granulate)
+    ], ignore_index=True).rename(columns=ABGLEICH_SPALTEN)
+    
+    breite = _abweichungen(rollen, 'Breite mm', 'breite_kontrolliert', toleranz_breite_mm,
+                           ('Typ', 'Charge', 'Material', 'Materialkurztext', 'fach_kontrolliert', 'zeitstempel'))
+    soll_gewicht = pd.to_numeric(granulate['Frei verwendbar'], errors='coerce').abs()
+    gewicht_grenze = (soll_gewicht * toleranz_gewicht_prozent / 100).clip(lower=toleranz_gewicht_kg).fillna(toleranz_gewicht_kg)
+    gewicht = _abweichungen(granulate, 'Frei verwendbar', 'zahlmenge_kg', gewicht_grenze,
+                            ('Typ', 'Charge', 'Material', 'Materialkurztext', 'zeitstempel'))
+    
+    def zaehlen(df, typ):
+        return int((df['Typ'] == typ).sum())
+    
+    zusammenfassung = pd.DataFrame([
+        ('Arbeitstabelle (Soll)', len(stamm_rollen), len(stamm_granulate)),
+        ('Gescannt (Ist)', int(rollen['charge'].notna().sum()), int(granulate['charge'].notna().sum())),
+        ('Zugeordnet', int((rollen['_merge'] == 'both').sum()), int((granulate['_merge'] == 'both').sum())),
+        ('Nicht gescannt', zaehlen(nicht_gescannt, 'ROLLE'), zaehlen(nicht_gescannt, 'GRANULAT')),
+        ('Zusätzlich (nicht in Arbeitstabelle)', zaehlen(zusaetzlich, 'ROLLE'), zaehlen(zusaetzlich, 'GRANULAT')),
+        ('Breite abweichend', len(breite), None),
+        ('Gewicht abweichend', None, len(gewicht)),
+        ('Toleranz Breite (mm)', toleranz_breite_mm, None),
+        ('Toleranz Gewicht (kg / %)', None, f"{toleranz_gewicht_kg} / {toleranz_gewicht_prozent}"),
+    ], columns=['Kennzahl', 'Rollen', 'Granulate'], dtype=object)
+    
+    return {
+        'Zusammenfassung': zusammenfassung,
+        'Nicht_gescannt': nicht_gescannt,
+        'Zusaetzlich': zusaetzlich,
+        'Breite_Abweichung': breite,
+        'Gewicht_Abweichung': gewicht,
+    }
+
+
+def abgleich_zusammenfassung(berichte):
+    """Kurzfassung eines Soll/Ist-Abgleichs (Dialog bzw. Konsole)"""
+    return (f"❓ Nicht gescannt: {len(berichte['Nicht_gescannt'])}\n"
+            f"➕ Zusätzlich (nicht in Arbeitstabelle): {len(berichte['Zusaetzlich'])}\n"
+            f"📏 Breite abweichend: {len(berichte['Breite_Abweichung'])}\n"
+            f"⚖️ Gewicht abweichend: {len(berichte['Gewicht_Abweichung'])}")
+
+
+class MasterdatenCache:
+    """Binärer Cache der Arbeitstabelle (Stammdaten-Blätter und Charge-Index per Pickle) neben der Excel-Datei"""
+
+    VERSION = 4
+
+    def __init__(self, quelle, kennung=''):
+        self.quelle = Path(quelle)
+        # Je Partition (Werk/Lagerort) und für deren übrige Zeilen eine eigene Datei
+        name = f"{self.quelle.stem}.{kennung}" if kennung else self.quelle.stem
+        self.pfad = self.quelle.with_name(name + '.cache.pkl')
+
+    def schluessel(self):
+        """Cache-Schlüssel aus Pfad, Größe, Änderungszeit und Inhalts-Hash der Quelldatei"""
+        stat = self.quelle.stat()
+        sha = hashlib.sha256()
+        with open(self.quelle, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        return {
+            'version': self.VERSION,
+            'pfad': str(self.quelle.resolve()),
+            'groesse': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': sha.hexdigest()
+        }
+
+    def laden(self, schluessel):
+        """Gibt die gecachten Daten zurück oder None, wenn der Cache fehlt oder veraltet ist"""
+        if not self.pfad.exists():
+            return None
+        with open(self.pfad, 'rb') as f:
+            inhalt = pickle.load(f)
+        if inhalt.get('schluessel') != schluessel:
+            return None
+        return inhalt['daten']
+
+    def speichern(self, schluessel, daten):
+        """Schreibt den Cache atomar (temporäre Datei, dann ersetzen)"""
+        temp_pfad = self.pfad.with_suffix('.tmp')
+        with open(temp_pfad, 'wb') as f:
+            pickle.dump({'schluessel': schluessel, 'daten': daten}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_pfad, self.pfad)
+
+
+class ScanJournal:
+    """Append-only Journal (JSON Lines) für Scans und Löschungen zwischen zwei Excel-Speicherungen"""
+
+    def __init__(self, pfad):
+        self.pfad = Path(pfad)
+        self.datei = None
+        # Laufende Nummern: alle Einträge bis 'entfernt' stehen bereits in den Excel-Dateien
+        self.geschrieben = 0
+        self.entfernt = 0
+
+    def anhaengen(self, aktion, daten):
+        """Hängt einen Eintrag an und schreibt ihn sofort auf die Platte (konstante Zeit)"""
+        self.mehrere_anhaengen([(aktion, daten)])
+
+    def mehrere_anhaengen(self, eintraege):
+        """Hängt mehrere (Aktion, Daten) an und schreibt sie mit einem einzigen fsync auf die Platte"""
+        if not eintraege:
+            return
+        if self.datei is None:
+            self.datei = open(self.pfad, 'a', encoding='utf-8')
+        zeilen = [json.dumps({'aktion': aktion, 'daten': daten}, ensure_ascii=False, default=str) + '\n'
+                  for aktion, daten in eintraege]
+        self.datei.writelines(zeilen)
+        self.datei.flush()
+        os.fsync(self.datei.fileno())
+        self.geschrieben += len(zeilen)
+
+    def lesen(self):
+        """Liest alle Einträge; eine beim Absturz abgeschnittene letzte Zeile wird ignoriert"""
+        if not self.pfad.exists():
+            return []
+        eintraege = []
+        with open(self.pfad, 'r', encoding='utf-8') as f:
+            for zeile in f:
+                try:
+                    eintrag = json.loads(zeile)
+                    eintraege.append((eintrag['aktion'], eintrag['daten']))
+                except (ValueError, KeyError):
+                    break
+        self.geschrieben = len(eintraege)
+        self.entfernt = 0
+        return eintraege
+
+    def offen(self):
+        """True, wenn Einträge noch nicht in die Excel-Dateien übernommen wurden"""
+        return self.geschrieben > self.entfernt
+
+    def entfernen_bis(self, stand):
+        """Entfernt alle Einträge bis zum Stand einer erfolgreich geschriebenen Momentaufnahme"""
+        if stand <= self.entfernt:
+            return
+        self.schliessen()
+        behalten = self.geschrieben - stand
+        if behalten == 0:
+            with open(self.pfad, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            # Selten: während des Schreibens kamen neue Einträge hinzu → nur diese behalten
+            with open(self.pfad, 'r', encoding='utf-8') as f:
+                zeilen = f.readlines()[-behalten:]
+            temp_pfad = self.pfad.with_suffix('.tmp')
+            with open(temp_pfad, 'w', encoding='utf-8') as f:
+                f.writelines(zeilen)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_pfad, self.pfad)
+        self.entfernt = stand
+
+    def schliessen(self):
+        """Schließt die Journal-Datei"""
+        if self.datei is not None:
+            self.datei.close()
+            self.datei = None
+
+
+class SqliteInventurStore:
+    """Eingebettete SQLite-Datenbank für die Inventur-Einträge (WAL, indiziert, transaktional)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS eintraege (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            charge TEXT NOT NULL,
+            schluessel TEXT NOT NULL,
+            typ TEXT NOT NULL,
+            status TEXT NOT NULL,
+            fach TEXT,
+            zeitstempel TEXT,
+            zeit TEXT,
+            daten TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_eintraege_charge ON eintraege (charge);
+        CREATE INDEX IF NOT EXISTS idx_eintraege_schluessel ON eintraege (schluessel);
+        CREATE INDEX IF NOT EXISTS idx_eintraege_typ_status ON eintraege (typ, status);
+        CREATE INDEX IF NOT EXISTS idx_eintraege_status ON eintraege (status);
+        CREATE INDEX IF NOT EXISTS idx_eintraege_fach ON eintraege (fach);
+        CREATE INDEX IF NOT EXISTS idx_eintraege_zeit ON eintraege (zeit);
+    """
+
+    def __init__(self, pfad):
+        self.pfad = Path(pfad)
+        # Hauptverbindung: beim Start lädt der Start-Thread, danach nutzt sie nur der Tk-Thread (nie gleichzeitig)
+        self.verbindung = self.verbinden(check_same_thread=False)
+        with self.verbindung:
+            self.verbindung.executescript(self.SCHEMA)
+        # Änderungszähler, um offene Excel-Exporte zu erkennen
+        self.aenderungen = 0
+        self.exportiert = 0
+
+    def verbinden(self, check_same_thread=True):
+        """Öffnet eine Verbindung im WAL-Modus (jeder Thread braucht eine eigene)"""
+        verbindung = sqlite3.connect(self.pfad, check_same_thread=check_same_thread)
+        verbindung.execute('PRAGMA journal_mode=WAL')
+        verbindung.execute('PRAGMA synchronous=FULL')
+        return verbindung
+
+    def _zeile(self, item):
+        """Wandelt einen Eintrag in eine Tabellenzeile um"""
+        try:
+            zeit = datetime.strptime(item.zeitstempel, '%d.%m.%Y %H:%M:%S').isoformat()
+        except (TypeError, ValueError):
+            zeit = None
+        return (
+            str(item.charge),
+            charge_schluessel(item.charge),
+            item.typ,
+            item.status,
+            str(getattr(item, 'fach_kontrolliert', '')),
+            item.zeitstempel,
+            zeit,
+            json.dumps(item.als_dict(), ensure_ascii=False, default=str)
+        )
+
+    EINFUEGEN = ('INSERT INTO eintraege (charge, schluessel, typ, status, fach, zeitstempel, zeit, daten) '
+                 'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+
+    def mehrere_hinzufuegen(self, items):
+        """Fügt Einträge in einer einzigen Transaktion ein"""
+        with self.verbindung:
+            self.verbindung.executemany(self.EINFUEGEN, [self._zeile(item) for item in items])
+        self.aenderungen += 1
+
+    def _loeschen(self, charge, typ=None, status=None):
+        """SQL und Parameter zum Löschen einer Charge (optional nur für Typ/Status)"""
+        sql = 'DELETE FROM eintraege WHERE charge = ?'
+        parameter = [str(charge)]
+        if typ is not None:
+            sql += ' AND typ = ?'
+            parameter.append(typ)
+        if status is not None:
+            sql += " AND status = 'gefunden'" if status == 'gefunden' else " AND status != 'gefunden'"
+        return sql, parameter
+
+    def entfernen(self, charge, typ=None, status=None):
+        """Löscht eine Charge (optional nur für Typ/Status) in einer Transaktion"""
+        with self.verbindung:
+            self.verbindung.execute(*self._loeschen(charge, typ, status))
+        self.aenderungen += 1
+
+    def anwenden(self, aktion, daten):
+        """Wendet eine Journal-Aktion ('add'/'delete') auf die Datenbank an"""
+        self.mehrere_anwenden([(aktion, daten)])
+
+    def mehrere_anwenden(self, aktionen):
+        """Wendet mehrere Journal-Aktionen in einer einzigen Transaktion an"""
+        with self.verbindung:
+            for aktion, daten in aktionen:
+                if aktion == 'add':
+                    self.verbindung.execute(self.EINFUEGEN, self._zeile(daten))
+                elif aktion == 'delete':
+                    self.verbindung.execute(*self._loeschen(daten['charge'], daten.get('typ'), daten.get('status')))
+        self.aenderungen += 1
+
+    def eintraege(self, typ=None, status=None, verbindung=None):
+        """Liefert die Einträge nach Zeitstempel, gleich alte in Erfassungsreihenfolge (Generator, streamt aus der Datenbank)"""
+        sql = 'SELECT daten FROM eintraege'
+        bedingungen = []
+        parameter = []
+        if typ is not None:
+            bedingungen.append('typ = ?')
+            parameter.append(typ)
+        if status is not None:
+            bedingungen.append('status = ?')
+            parameter.append(status)
+        if bedingungen:
+            sql += ' WHERE ' + ' AND '.join(bedingungen)
+        sql += ' ORDER BY zeit, id'  # wieder hinzugefügte Einträge (Rückgängig) an ihrer Stelle
+        for (daten,) in (verbindung or self.verbindung).execute(sql, parameter):
+            yield InventurEintrag.aus_dict(json.loads(daten))
+
+    def anzahl(self):
+        """Anzahl gespeicherter Einträge"""
+        return self.verbindung.execute('SELECT COUNT(*) FROM eintraege').fetchone()[0]
+
+    def schliessen(self):
+        """Schließt die Hauptverbindung"""
+        self.verbindung.close()
+
+
+class UndoVerlauf:
+    """Rückgängig/Wiederholen-Verlauf in SQLite: unbegrenzt viele Schritte, übersteht Neustarts
+    
+    Ein Schritt ist ('add' | 'import' | 'delete', Einträge). Im Speicher liegt nur die Verbindung,
+    rückgängig gemachte Schritte sind markiert und fallen beim nächsten neuen Schritt weg.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS verlauf (
+            id INTEGER PRIMARY KEY,
+            aktion TEXT NOT NULL,
+            eintraege TEXT NOT NULL,
+            rueckgaengig INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_verlauf_rueckgaengig ON verlauf (rueckgaengig, id);
+        CREATE TABLE IF NOT EXISTS inventur (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            pfade TEXT NOT NULL,
+            erstellt TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, pfad):
+        self.pfad = Path(pfad)
+        # Beim Start ordnet der Start-Thread den Verlauf zu, danach nutzt ihn nur der Tk-Thread (nie gleichzeitig)
+        self.verbindung = sqlite3.connect(self.pfad, check_same_thread=False)
+        self.verbindung.execute('PRAGMA journal_mode=WAL')
+        self.verbindung.execute('PRAGMA synchronous=NORMAL')
+        with self.verbindung:
+            self.verbindung.executescript(self.SCHEMA)
+
+    def zuordnen(self, pfade, neu):
+        """Bindet den Verlauf an eine Inventur (ihre Ausgabedateien und den Zeitpunkt ihres Beginns)
+        
+        Bei einer neuen Inventur (neu=True) oder anderen Ausgabedateien werden alle Schritte verworfen.
+        Gibt die Anzahl verworfener Schritte zurück.
+        """
+        pfade = json.dumps(sorted(str(Path(pfad).resolve()) for pfad in pfade))
+        zeile = self.verbindung.execute('SELECT pfade FROM inventur').fetchone()
+        if not neu and zeile is not None and zeile[0] == pfade:
+            return 0
+        
+        # Verlauf ohne Zuordnung (ältere Version) gehört zur vorhandenen Inventur und bleibt erhalten
+        verwerfen = neu or zeile is not None
+        with self.verbindung:
+            verworfen = self.verbindung.execute('DELETE FROM verlauf').rowcount if verwerfen else 0
+            self.verbindung.execute('INSERT OR REPLACE INTO inventur (id, pfade, erstellt) VALUES (1, ?, ?)',
+                                    (pfade, datetime.now().isoformat(timespec='seconds')))
+        return verworfen
+
+    def merken(self, aktion, eintraege):
+        """Legt einen neuen Schritt an; noch wiederholbare Schritte werden verworfen"""
+        daten = json.dumps([eintrag.als_dict() for eintrag in eintraege], ensure_ascii=False, default=str)
+        with self.verbindung:
+            self.verbindung.execute('DELETE FROM verlauf WHERE rueckgaengig = 1')
+            self.verbindung.execute('INSERT INTO verlauf (aktion, eintraege) VALUES (?, ?)', (aktion, daten))
+
+    def _schritt(self, rueckgaengig, reihenfolge):
+        zeile = self.verbindung.execute(
+            f'SELECT id, aktion, eintraege FROM verlauf WHERE rueckgaengig = ? ORDER BY id {reihenfolge} LIMIT 1',
+            (rueckgaengig,)).fetchone()
+        if zeile is None:
+            return None
+        schritt_id, aktion, daten = zeile
+        return schritt_id, aktion, [InventurEintrag.aus_dict(eintrag) for eintrag in json.loads(daten)]
+
+    def letzter(self):
+        """Letzter noch nicht rückgängig gemachter Schritt als (id, aktion, eintraege) oder None"""
+        return self._schritt(0, 'DESC')
+
+    def naechster_wiederholbarer(self):
+        """Ältester rückgängig gemachter Schritt (wird als nächster wiederholt) oder None"""
+        return self._schritt(1, 'ASC')
+
+    def markieren(self, schritt_id, rueckgaengig):
+        """Markiert einen Schritt als rückgängig gemacht bzw. wiederholt"""
+        with self.verbindung:
+            self.verbindung.execute('UPDATE verlauf SET rueckgaengig = ? WHERE id = ?', (int(rueckgaengig), schritt_id))
+
+    def anzahl(self):
+        """Gibt (rückgängig machbare, wiederholbare) Schritte zurück"""
+        zaehler = dict(self.verbindung.execute('SELECT rueckgaengig, COUNT(*) FROM verlauf GROUP BY rueckgaengig'))
+        return zaehler.get(0, 0), zaehler.get(1, 0)
+
+    def schliessen(self):
+        """Schließt die Verbindung"""
+        self.verbindung.close()
+
+
+class SyncClient:
+    """Abgleich mit dem zentralen Sync-Server (HTTP/JSON); der Ausgang ist zugleich Offline-Warteschlange"""
+
+    STAPEL = 500  # maximale Anzahl Scans je Übertragung
+
+    def __init__(self, server, station, ausgang_pfad, timeout=5):
+        self.server = server.rstrip('/')
+        self.station = station
+        self.timeout = timeout
+        # Noch nicht bestätigte Scans überstehen Verbindungsabbrüche und Neustarts
+        self.ausgang = ScanJournal(ausgang_pfad)
+        self.wartend = [daten for _, daten in self.ausgang.lesen()]
+        self.stand = 0  # Server-Stand der zuletzt abgeholten fremden Änderungen
+        self.online = None
+
+    def vormerken(self, aktion, charge, typ=None, status=None):
+        """Merkt eine lokale Änderung für die nächste Übertragung vor (Tk-Thread)"""
+        self.mehrere_vormerken([(aktion, charge, typ, status)])
+
+    def mehrere_vormerken(self, aenderungen):
+        """Merkt mehrere (Aktion, Charge, Typ, Status) auf einmal vor (ein Schreibvorgang im Ausgang)"""
+        scans = [{'id': uuid.uuid4().hex, 'aktion': aktion, 'charge': str(charge), 'typ': typ, 'status': status}
+                 for aktion, charge, typ, status in aenderungen]
+        self.ausgang.mehrere_anhaengen([(daten['aktion'], daten) for daten in scans])
+        self.wartend.extend(scans)
+
+    def stapel(self):
+        """Nächster Stapel für den Sync-Thread: (Ausgang-Stand nach Bestätigung, Scans, Server-Stand)"""
+        stapel = self.wartend[:self.STAPEL]
+        return self.ausgang.entfernt + len(stapel), stapel, self.stand
+
+    def abgleichen(self, stapel, stand):
+        """Sendet einen Stapel und holt fremde Änderungen ab (läuft im Sync-Thread)"""
+        if stapel:
+            self._anfrage('/scans', {'station': self.station, 'scans': stapel})
+        return self._anfrage(f"/aenderungen?seit={stand}&station={quote(self.station)}")
+
+    def bestaetigen(self, ausgang_stand, anzahl, antwort):
+        """Entfernt gesendete Scans aus dem Ausgang und merkt sich den Server-Stand (Tk-Thread)"""
+        self.ausgang.entfernen_bis(ausgang_stand)
+        del self.wartend[:anzahl]
+        self.stand = antwort['stand']
+        return antwort['aenderungen']
+
+    def _anfrage(self, pfad, daten=None):
+        """GET (ohne Daten) oder POST (JSON) an den Server, gibt die JSON-Antwort zurück"""
+        anfrage = urllib.request.Request(self.server + pfad)
+        if daten is not None:
+            anfrage.data = json.dumps(daten, ensure_ascii=False).encode('utf-8')
+            anfrage.add_header('Content-Type', 'application/json; charset=utf-8')
+        with urllib.request.urlopen(anfrage, timeout=self.timeout) as antwort:
+            return json.loads(antwort.read().decode('utf-8'))
+
+    def schliessen(self):
+        """Schließt die Ausgangsdatei"""
+        self.ausgang.schliessen()
+
+
+class PersistenzWorker:
+    """Eigener Schreib-Thread für Excel-Arbeit, damit der Tk-Mainloop nie blockiert"""
+
+    def __init__(self, logger, name='PersistenzWorker'):
+        self.logger = logger
+        self.auftraege = queue.Queue()
+        self.ergebnisse = queue.Queue()
+        self.ausstehend = 0
+        self.fehlgeschlagen = 0
+        self.thread = threading.Thread(target=self._lauf, name=name, daemon=True)
+        self.thread.start()
+
+    def einreihen(self, name, funktion, callback=None):
+        """Reiht einen Auftrag ein; callback(ok, ergebnis) läuft später im Tk-Thread"""
+        self.ausstehend += 1
+        self.auftraege.put((name, funktion, callback))
+
+    def _lauf(self):
+        """Arbeitet die Aufträge nacheinander ab (läuft im Schreib-Thread)"""
+        while True:
+            auftrag = self.auftraege.get()
+            if auftrag is None:
+                break
+            name, funktion, callback = auftrag
+            try:
+                ergebnis = funktion()
+                self.ergebnisse.put((name, callback, True, ergebnis))
+            except Exception as e:
+                self.logger.error(f"Fehler im Schreib-Thread ({name}): {e}")
+                self.ergebnisse.put((name, callback, False, e))
+
+    def ergebnisse_verarbeiten(self):
+        """Ruft die Callbacks fertiger Aufträge auf (nur aus dem Tk-Thread aufrufen)"""
+        while True:
+            try:
+                name, callback, ok, ergebnis = self.ergebnisse.get_nowait()
+            except queue.Empty:
+                break
+            self.ausstehend -= 1
+            if not ok:
+                self.fehlgeschlagen += 1
+            if callback:
+                callback(ok, ergebnis)
+
+    def stoppen(self):
+        """Beendet den Thread nach den bereits eingereihten Aufträgen, ohne zu warten"""
+        self.auftraege.put(None)
+
+    def beenden(self):
+        """Wartet, bis alle Aufträge geschrieben sind, und beendet den Thread"""
+        self.stoppen()
+        self.thread.join()
+        self.ergebnisse_verarbeiten()
+
+
+class _Zeitspanne:
+    """Misst die Dauer eines with-Blocks und hängt sie (ms) an das Fenster einer Phase an"""
+
+    __slots__ = ('werte', 'start')
+
+    def __init__(self, werte):
+        self.werte = werte
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.werte.append((time.perf_counter() - self.start) * 1000)
+
+
+def perzentil(sortiert, prozent):
+    """Perzentil (Nearest-Rank) einer sortierten, nicht leeren Liste"""
+    return sortiert[max(0, math.ceil(prozent / 100 * len(sortiert)) - 1)]
+
+
+class ScanMessung:
+    """Laufzeiten der Phasen eines Scans, je Phase die letzten 'fenster' Werte (rollierend)"""
+
+    aktiv = True
+    PHASEN = (('dekodieren', 'Barcode zerlegen'), ('duplikat', 'Duplikatprüfung'), ('suche', 'Suche'), ('anzeige', 'Eingabemaske'),
+              ('pruefung', 'Eingaben prüfen'), ('speichern', 'Speichern'), ('liste', 'Liste aktualisieren'))
+
+    def __init__(self, fenster=1000):
+        # deque.append ist threadsicher, Phasen dürfen auch im Schreib-Thread gemessen werden
+        self.werte = {phase: deque(maxlen=fenster) for phase, _ in self.PHASEN}
+
+    def phase(self, name):
+        """Kontextmanager: with messung.phase('suche'): ..."""
+        return _Zeitspanne(self.werte[name])
+
+    def zuruecksetzen(self):
+        """Verwirft alle Messwerte"""
+        for werte in self.werte.values():
+            werte.clear()
+
+    def auswertung(self):
+        """Je Phase ein Dict mit anzahl sowie mittel, p50, p95, p99 und max in ms (None ohne Messwerte)"""
+        zeilen = []
+        for phase, bezeichnung in self.PHASEN:
+            werte = sorted(self.werte[phase])
+            zeile = {'phase': phase, 'bezeichnung': bezeichnung, 'anzahl': len(werte),
+                     'mittel': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+            if werte:
+                zeile.update(mittel=sum(werte) / len(werte), p50=perzentil(werte, 50), p95=perzentil(werte, 95),
+                             p99=perzentil(werte, 99), max=werte[-1])
+            zeilen.append(zeile)
+        return zeilen
+
+    def csv_schreiben(self, pfad):
+        """Schreibt die Auswertung als CSV (Semikolon, Dezimalkomma wie im deutschen Excel)"""
+        spalten = ('phase', 'bezeichnung', 'anzahl', 'mittel', 'p50', 'p95', 'p99', 'max')
+        with open(pfad, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow([spalte if spalte in ('phase', 'bezeichnung', 'anzahl') else f"{spalte}_ms"
+                             for spalte in spalten])
+            for zeile in self.auswertung():
+                writer.writerow([f"{zeile[spalte]:.3f}".replace('.', ',') if isinstance(zeile[spalte], float)
+                                 else ('' if zeile[spalte] is None else zeile[spalte]) for spalte in spalten])
+
+
+class KeineMessung:
+    """Ausgeschaltete Messung: phase() liefert immer denselben leeren Kontextmanager"""
+
+    aktiv = False
+    _LEER = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._LEER
+
+
+KEINE_MESSUNG = KeineMessung()
+
+
+def zeit_schluessel(eintrag):
+    """Sortierbarer Zeitpunkt eines Eintrags ('JJJJ-MM-TTThh:mm:ss' aus 'TT.MM.JJJJ hh:mm:ss', '' wenn ungültig)"""
+    zeit = eintrag.zeitstempel
+    if not isinstance(zeit, str) or len(zeit) != 19 or zeit[2] != '.' or zeit[5] != '.':
+        return ''
+    return f"{zeit[6:10]}-{zeit[3:5]}-{zeit[0:2]}T{zeit[11:]}"
+
+
+def einfuege_position(eintraege, eintrag, neueste_zuerst=False):
+    """Position eines Eintrags in einer nach Zeitpunkt sortierten Liste (hinter gleich alten, binäre Suche)"""
+    zeit = zeit_schluessel(eintrag)
+    links, rechts = 0, len(eintraege)
+    while links < rechts:
+        mitte = (links + rechts) // 2
+        vergleich = zeit_schluessel(eintraege[mitte])
+        if (vergleich >= zeit) if neueste_zuerst else (vergleich <= zeit):
+            links = mitte + 1
+        else:
+            rechts = mitte
+    return links
+
+
+class EintragListe:
+    """Datenliste in Einfügereihenfolge, Entfernen eines Eintrags in O(1) (dict über die Objekt-Identität)"""
+
+    __slots__ = ('_eintraege',)
+
+    def __init__(self, eintraege=()):
+        self._eintraege = {id(eintrag): eintrag for eintrag in eintraege}
+
+    def append(self, eintrag):
+        self._eintraege[id(eintrag)] = eintrag
+
+    def extend(self, eintraege):
+        for eintrag in eintraege:
+            self._eintraege[id(eintrag)] = eintrag
+
+    def einsortieren(self, eintrag):
+        """Fügt einen Eintrag nach seinem Zeitpunkt ein (neuester: O(1) angehängt, älterer z.B. nach Rückgängig: O(n))"""
+        if not self._eintraege or zeit_schluessel(next(reversed(self._eintraege.values()))) <= zeit_schluessel(eintrag):
+            self._eintraege[id(eintrag)] = eintrag
+            return
+        eintraege = list(self._eintraege.values())
+        eintraege.insert(einfuege_position(eintraege, eintrag), eintrag)
+        self._eintraege = {id(item): item for item in eintraege}
+
+    def entfernen(self, eintrag):
+        """Entfernt genau dieses Objekt (True, wenn es enthalten war)"""
+        return self._eintraege.pop(id(eintrag), None) is not None
+
+    def __iter__(self):
+        return iter(self._eintraege.values())
+
+    def __len__(self):
+        return len(self._eintraege)
+
+
+class InventurStatistik:
+    """Laufende Zähler für Fortschritt und Durchsatz, nachgeführt bei jedem Erfassen, Löschen und Rückgängig"""
+
+    TYPEN = ('ROLLE', 'GRANULAT')
+
+    def __init__(self, fenster_min=15):
+        self.fenster_sek = fenster_min * 60
+        self.soll = dict.fromkeys(self.TYPEN, 0)  # Zeilen der Arbeitstabelle je Typ
+        self.gesamt = Counter()  # Einträge je Typ
+        self.gefunden = Counter()  # davon aus der Arbeitstabelle
+        self.zaehlt = None  # Optional: zählt ein gefundener Eintrag für die Abdeckung (z.B. nur eigene Partition)?
+        self.scans = deque()  # (Zeitpunkt, Typ) der Scans dieser Sitzung im Fenster
+        self.im_fenster = Counter()
+
+    def anpassen(self, item, anzahl):
+        """Zählt einen Eintrag hinzu (anzahl=1) bzw. weg (anzahl=-1)"""
+        self.gesamt[item.typ] += anzahl
+        if item.status == 'gefunden' and (self.zaehlt is None or self.zaehlt(item)):
+            self.gefunden[item.typ] += anzahl
+
+    def neu_aufbauen(self, eintraege):
+        """Zähler komplett aus allen Einträgen (nach dem Laden)"""
+        self.gesamt = Counter()
+        self.gefunden = Counter()
+        for item in eintraege:
+            self.anpassen(item, 1)
+
+    def scans_zaehlen(self, eintraege, jetzt=None):
+        """Merkt neu erfasste Einträge für den Durchsatz"""
+        jetzt = time.monotonic() if jetzt is None else jetzt
+        for item in eintraege:
+            self.scans.append((jetzt, item.typ))
+            self.im_fenster[item.typ] += 1
+
+    def auswertung(self, jetzt=None):
+        """Durchsatz (Scans/min), Abdeckung der Arbeitstabelle (%) und Restzeit (min) je Typ und gesamt"""
+        jetzt = time.monotonic() if jetzt is None else jetzt
+        while self.scans and self.scans[0][0] < jetzt - self.fenster_sek:
+            _, typ = self.scans.popleft()
+            self.im_fenster[typ] -= 1
+        
+        # Zeitraum seit dem ältesten Scan im Fenster, mindestens eine Minute (kein Ausreißer beim ersten Scan)
+        minuten = max(1.0, (jetzt - self.scans[0][0]) / 60) if self.scans else None
+        
+        def werte(soll, gefunden, scans):
+            offen = max(0, soll - gefunden)
+            rate = scans / minuten if minuten else 0.0
+            return {'soll': soll, 'gefunden': gefunden, 'offen': offen, 'pro_minute': rate,
+                    'abdeckung': min(100.0, gefunden / soll * 100) if soll else None,
+                    'rest_minuten': offen / rate if rate else None}
+        
+        ergebnis = {typ: werte(self.soll[typ], self.gefunden[typ], self.im_fenster[typ]) for typ in self.TYPEN}
+        ergebnis['GESAMT'] = werte(sum(self.soll.values()), sum(self.gefunden[typ] for typ in self.TYPEN),
+                                   len(self.scans))
+        return ergebnis
+
+
+def dauer_text(minuten):
+    """Restzeit lesbar: '3 h 20 min', '45 min' bzw. '-' ohne Schätzung"""
+    if minuten is None:
+        return '-'
+    minuten = round(minuten)
+    if minuten < 60:
+        return f"{minuten} min"
+    return f"{minuten // 60} h {minuten % 60:02d} min"
+
+
+def vorschlag_text(art, abstand):
+    """Kurzer Hinweis zu einem Chargen-Vorschlag, z.B. 'Anfang, 2 Zeichen fehlen'"""
+    if art == 'aehnlich':
+        return f"{abstand} Zeichen abweichend"
+    teil = 'Anfang' if art == 'anfang' else 'Ende'
+    if abstand == 0:
+        return teil
+    return f"{teil}, {abstand} Zeichen {'fehlt' if abstand == 1 else 'fehlen'}"
+
+
+class EingabeFehler(ValueError):
+    """Fehlende oder ungültige Eingabe zu einem Scan (feld: 'charge', 'fach', 'breite' oder 'zahlmenge')"""
+
+    def __init__(self, feld, meldung, pflichtfeld=False):
+        super().__init__(meldung)
+        self.feld = feld
+        self.pflichtfeld = pflichtfeld
+
+
+def validiere_breite(breite_text):
+    """Validiert Breite-Eingabe (1-4 stellige Zahl)"""
+    try:
+        breite = int(breite_text.strip())
+        if 1 <= breite <= 9999:  # 1-4 stellig
+            return True, breite
+        else:
+            return False, "Breite muss zwischen 1 und 9999 mm liegen!"
+    except ValueError:
+        return False, "Breite muss eine gültige Zahl sein!"
+
+
+def validiere_gewicht(gewicht_text):
+    """Validiert Gewichts-Eingabe (positive Dezimalzahl)"""
+    try:
+        gewicht = float(gewicht_text.strip().replace(',', '.'))
+        if gewicht > 0:
+            return True, gewicht
+        else:
+            return False, "Zählmenge muss größer als 0 sein!"
+    except ValueError:
+        return False, "Zählmenge muss eine gültige Zahl sein!"
+
+
+def eingaben_uebernehmen(eintrag, fach='', breite='', zahlmenge='', bemerkung=''):
+    """Prüft die Eingaben zu einem gefundenen Scan und trägt sie ein (EingabeFehler beim ersten Problem)"""
+    if eintrag.typ == 'ROLLE':
+        fach = fach.strip()
+        if not fach:
+            raise EingabeFehler('fach', "Fach (Lagerort) ist ein Pflichtfeld für Rollen!", pflichtfeld=True)
+        if not breite.strip():
+            raise EingabeFehler('breite', "Breite kontrolliert ist ein Pflichtfeld!", pflichtfeld=True)
+        gueltig, ergebnis = validiere_breite(breite)
+        if not gueltig:
+            raise EingabeFehler('breite', ergebnis)
+        eintrag.fach_kontrolliert = fach
+        eintrag.breite_kontrolliert = ergebnis
+    else:
+        if not zahlmenge.strip():
+            raise EingabeFehler('zahlmenge', "Zählmenge ist ein Pflichtfeld!", pflichtfeld=True)
+        gueltig, ergebnis = validiere_gewicht(zahlmenge)
+        if not gueltig:
+            raise EingabeFehler('zahlmenge', ergebnis)
+        eintrag.zahlmenge_kg = ergebnis
+    eintrag.bemerkung = bemerkung.strip()
+
+
+def batch_zusammenfassung(df, fertige, offene):
+    """Text mit dem Ergebnis eines Batch-Imports (Dialog bzw. Konsole)"""
+    anzahl = df['Klasse'].value_counts()
+    fremd = int(df['Fremd'].sum()) if 'Fremd' in df.columns else 0
+    return (f"{len(df)} Chargen im Auszug\n\n"
+            f"🔵 Rollen gefunden: {anzahl.get('ROLLE', 0)}\n"
+            f"🟨 Granulate gefunden: {anzahl.get('GRANULAT', 0)}\n"
+            + (f"🏭 davon anderes Werk/Lagerort: {fremd}\n" if fremd else "") +
+            f"⚠️ Duplikate (übersprungen): {anzahl.get('DUPLIKAT', 0)}\n"
+            f"❓ Nicht gefunden: {anzahl.get('NICHT_GEFUNDEN', 0)}\n\n"
+            f"Direkt übernommen: {len(fertige)}\n"
+            f"Arbeitsliste (Eingaben fehlen): {len(offene)}")
+
+
+class InventurEngine:
+    """Inventur ohne Oberfläche: Stammdaten, Suche, Erfassen/Löschen/Rückgängig, Journal/Datenbank, Excel
+    
+    Meldungen für den Benutzer gehen an melden(titel, text); ohne Oberfläche werden sie nur geloggt.
+    Zeitgesteuertes Speichern und Threads bleiben Sache des Aufrufers (Tk-Oberfläche oder CLI).
+    """
+
+    def __init__(self, data_dir, config=None, logger=None, melden=None):
+        self.data_dir = Path(data_dir)
+        self.config = config if config is not None else {}
+        self.logger = logger or logging.getLogger(__name__)
+        self.melden = melden
+        
+        self.arbeitstabelle_path = self.data_dir / 'Arbeitstabelle.xlsx'
+        self.inventur_rollen_path = self.data_dir / 'Inventur_Rollen.xlsx'
+        self.inventur_granulat_path = self.data_dir / 'Inventur_Granulat.xlsx'
+        self.journal_path = self.data_dir / 'Inventur_Journal.jsonl'
+        self.datenbank_path = self.data_dir / 'Inventur.db'
+        self.sync_ausgang_path = self.data_dir / 'Sync_Ausgang.jsonl'
+        self.verlauf_path = self.data_dir / 'Inventur_Verlauf.db'
+        self.backup_dir = self.data_dir / 'backups'
+        self.data_dir.mkdir(exist_ok=True)
+        self.backup_dir.mkdir(exist_ok=True)
+        
+        # Stammdaten der Arbeitstabelle (Blätter und Charge-Index)
+        self.stamm_rollen = None
+        self.stamm_granulate = None
+        self.charge_index = ChargeIndex()
+        
+        # Werk/Lagerort dieser Station: nur deren Zeilen im Speicher, die übrigen erst beim ersten Bedarf
+        self.partition = Partition(self.config.get('partition_werk'), self.config.get('partition_lagerort'))
+        self.fremde_daten = None
+        # Ohne Oberfläche wird der Zweit-Index beim ersten Bedarf geladen; die Oberfläche lädt ihn vorab
+        # im Hintergrund (fremde_synchron=False), bis dahin gelten fremde Chargen als nicht gefunden
+        self.fremde_synchron = True
+        self.fremde_version = 0  # zählt bei jeder neuen Arbeitstabelle hoch (veraltetes Vorladen verwerfen)
+        
+        # Stand (Größe, Änderungszeit) der geladenen bzw. zuletzt geprüften Arbeitstabelle fürs Nachladen
+        self.arbeitstabelle_geladen = None
+        self.arbeitstabelle_pruefstand = None
+        # Einträge, deren Zeile sich beim Nachladen geändert hat oder entfallen ist: id → (Eintrag, Hinweis)
+        self.stammdaten_hinweise = {}
+        
+        # Separate Listen für Inventur-Daten
+        self.inventur_rollen_data = EintragListe()
+        self.inventur_granulat_data = EintragListe()
+        self.nicht_gefunden_rollen_data = EintragListe()
+        self.nicht_gefunden_granulat_data = EintragListe()
+        
+        # Gescannte Chargen (normalisiert wie im Charge-Index) → Einträge, für O(1)-Duplikatprüfung und Löschen
+        self.gescannte_chargen = {}
+        self.fremde_chargen = {}  # Charge (normalisiert) → {Station: Anzahl}
+        
+        self.ladeprobleme = []  # Meldungen zu ungültigen Zellen beim Laden der Inventur
+        
+        # Fortschritt und Durchsatz (laufende Zähler statt Auszählen der Listen)
+        self.statistik = InventurStatistik(self.config.get('statistik_fenster_min', 15))
+        if self.partition.aktiv:
+            # Scans aus anderen Werken/Lagerorten erhöhen die Abdeckung der eigenen Partition nicht
+            self.statistik.zaehlt = self.in_partition
+        
+        # Journal für Scans seit der letzten Excel-Speicherung
+        self.journal = ScanJournal(self.journal_path)
+        
+        # Rückgängig/Wiederholen über Neustarts hinweg
+        self.verlauf = UndoVerlauf(self.verlauf_path)
+        
+        # Laufzeiten je Scan-Phase (ausgeschaltet ein leeres Objekt ohne Messung)
+        self.messung = KEINE_MESSUNG
+        self.messung_einschalten(self.config.get('latenz_messung', False))
+        
+        # Barcode-Inhalt → Charge (+ Gewicht, Material) je Etikettenart; fehlerhafte Regeln → nur Standard
+        try:
+            self.dekodierer = ScanDekodierer(self.config.get('etiketten'))
+        except (ValueError, KeyError, re.error) as e:
+            self.dekodierer = ScanDekodierer()
+            self.fehler_melden(f"Etiketten-Regeln in den Einstellungen fehlerhaft, nur GS1-Standard aktiv:\n{e}")
+            self.logger.error(f"Fehler in den Etiketten-Regeln: {e}")
+        
+        # Optionale SQLite-Datenbank als Speicher (Excel-Dateien werden dann daraus exportiert)
+        self.store = None
+        if self.config.get('speicher_backend', 'excel') == 'sqlite':
+            try:
+                self.store = SqliteInventurStore(self.datenbank_path)
+                self.logger.info(f"SQLite-Speicher aktiv: {self.datenbank_path}")
+            except Exception as e:
+                self.fehler_melden(f"Datenbank konnte nicht geöffnet werden, verwende Excel-Speicher:\n{e}")
+                self.logger.error(f"Fehler beim Öffnen der Datenbank: {e}")
+        
+        # Optionaler Abgleich mit anderen Stationen über den Sync-Server
+        self.sync = None
+        if self.config.get('sync_server'):
+            station = self.config.get('sync_station') or socket.gethostname()
+            try:
+                self.sync = SyncClient(self.config['sync_server'], station, self.sync_ausgang_path)
+                self.logger.info(f"Sync aktiv: {self.config['sync_server']} als Station {station} "
+                                 f"({len(self.sync.wartend)} Scans im Ausgang)")
+            except Exception as e:
+                self.fehler_melden(f"Sync konnte nicht gestartet werden:\n{e}")
+                self.logger.error(f"Fehler beim Starten des Sync: {e}")
+    
+    def messung_einschalten(self, aktiv):
+        """Schaltet die Laufzeitmessung der Scan-Phasen ein bzw. aus (Messwerte beginnen neu)"""
+        if aktiv and not self.messung.aktiv:
+            self.messung = ScanMessung(self.config.get('latenz_fenster', 1000))
+        elif not aktiv:
+            self.messung = KEINE_MESSUNG
+    
+    def messung_speichern(self, pfad=None):
+        """Schreibt die Auswertung der Laufzeitmessung als CSV in den Datenordner und gibt den Pfad zurück"""
+        pfad = Path(pfad) if pfad else self.data_dir / f"Latenz_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        self.messung.csv_schreiben(pfad)
+        self.logger.info(f"Laufzeitmessung gespeichert: {pfad.name}")
+        return pfad
+    
+    def fehler_melden(self, text):
+        """Gibt eine Fehlermeldung an die Oberfläche weiter (falls vorhanden)"""
+        if self.melden is not None:
+            self.melden("Fehler", text)
+    
+    # --- Arbeitstabelle und Suche ---
+    
+    def arbeitstabelle_daten_laden(self):
+        """Lädt die Arbeitstabelle mit zwei Tabellenblättern (darf in einem eigenen Thread laufen)
+        
+        Liefert (stamm_rollen, stamm_granulate, charge_index) oder None, wenn die Datei fehlt.
+        """
+        # Stand vor dem Lesen: eine Änderung während des Lesens wird beim nächsten Prüfen erkannt
+        self.arbeitstabelle_geladen = self.arbeitstabelle_stand()
+        if self.arbeitstabelle_geladen is None:
+            return None
+        
+        start = time.perf_counter()
+        cache = MasterdatenCache(self.arbeitstabelle_path, self.partition.kennung())
+        cache_schluessel = None
+        daten = None
+        
+        # Warmer Pfad: unveränderte Arbeitstabelle aus dem Binär-Cache laden
+        try:
+            cache_schluessel = cache.schluessel()
+            daten = cache.laden(cache_schluessel)
+        except Exception as e:
+            self.logger.warning(f"Cache der Arbeitstabelle nicht lesbar: {e}")
+        
+        if daten is not None:
+            stamm_rollen, stamm_granulate, charge_index = daten
+            quelle = "Cache"
+        else:
+            # Kalter Pfad: ein Durchgang durch die Excel-Datei, Index wird dabei aufgebaut
+            stamm_rollen, stamm_granulate, charge_index, fremde = arbeitstabelle_streamen(
+                self.arbeitstabelle_path, self.partition)
+            quelle = "Excel"
+            
+            # Cache für den nächsten Start schreiben; übrige Werke/Lagerorte nur in ihre eigene Datei
+            if cache_schluessel is not None:
+                try:
+                    cache.speichern(cache_schluessel, (stamm_rollen, stamm_granulate, charge_index))
+                    if fremde is not None:
+                        MasterdatenCache(self.arbeitstabelle_path, self.partition.kennung(rest=True)).speichern(
+                            cache_schluessel, fremde)
+                except Exception as e:
+                    self.logger.warning(f"Cache der Arbeitstabelle nicht geschrieben: {e}")
+        
+        # Prüfe erforderliche Spalten für Rollen
+        required_rollen_columns = ['Charge', 'Material', 'Materialkurztext', 'Länge m', 'Breite mm', 'Frei verwendbar']
+        missing_rollen = [col for col in required_rollen_columns if col not in stamm_rollen.spalten]
+        
+        # Prüfe erforderliche Spalten für Granulate
+        required_granulate_columns = ['Charge', 'Material', 'Materialkurztext', 'Frei verwendbar']
+        missing_granulate = [col for col in required_granulate_columns if col not in stamm_granulate.spalten]
+        
+        if missing_rollen or missing_granulate:
+            error_msg = "Fehlende Spalten:\n"
+            if missing_rollen:
+                error_msg += f"Rollen: {', '.join(missing_rollen)}\n"
+            if missing_granulate:
+                error_msg += f"Granulate: {', '.join(missing_granulate)}"
+            raise ArbeitstabelleFehler(error_msg)
+        
+        rollen_count = len(stamm_rollen)
+        granulate_count = len(stamm_granulate)
+        total_count = rollen_count + granulate_count
+        
+        dauer_ms = (time.perf_counter() - start) * 1000
+        auswahl = f" für {self.partition}" if self.partition.aktiv else ""
+        self.logger.info(f"Arbeitstabelle geladen ({quelle}, {dauer_ms:.0f} ms){auswahl}: {rollen_count} Rollen, {granulate_count} Granulate, {total_count} gesamt")
+        
+        return stamm_rollen, stamm_granulate, charge_index
+    
+    def arbeitstabelle_laden(self):
+        """Lädt die Arbeitstabelle und übernimmt sie (False, wenn die Datei fehlt)"""
+        daten = self.arbeitstabelle_daten_laden()
+        if daten is None:
+            return False
+        self.stammdaten_uebernehmen(daten)
+        return True
+    
+    def stammdaten_uebernehmen(self, daten):
+        """Übernimmt (stamm_rollen, stamm_granulate, charge_index) aus arbeitstabelle_daten_laden"""
+        self.stamm_rollen, self.stamm_granulate, self.charge_index = daten
+        self.statistik.soll = {'ROLLE': len(self.stamm_rollen), 'GRANULAT': len(self.stamm_granulate)}
+        self.fremde_verwerfen()
+    
+    def arbeitstabelle_stand(self):
+        """(Größe, Änderungszeit) der Arbeitstabelle oder None, wenn sie fehlt"""
+        try:
+            stat = self.arbeitstabelle_path.stat()
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+    
+    def arbeitstabelle_geaendert(self):
+        """True, wenn die Arbeitstabelle seit dem Laden geändert wurde und seit der letzten Prüfung gleich blieb
+        
+        Eine Datei, die gerade noch geschrieben wird (SAP-Export, Kopieren), wird so erst danach gelesen.
+        """
+        stand = self.arbeitstabelle_stand()
+        vorher, self.arbeitstabelle_pruefstand = self.arbeitstabelle_pruefstand, stand
+        return stand is not None and stand == vorher and stand != self.arbeitstabelle_geladen
+    
+    def arbeitstabelle_nachladen(self):
+        """Liest die geänderte Arbeitstabelle und vergleicht sie mit den aktuellen Stammdaten (eigener Thread)
+        
+        Liefert (daten, unterschiede) für stammdaten_aktualisieren oder None, wenn die Datei fehlt.
+        Die aktuellen Stammdaten werden nur gelesen, geändert werden sie erst im Tk-Thread.
+        """
+        daten = self.arbeitstabelle_daten_laden()
+        if daten is None:
+            return None
+        
+        start = time.perf_counter()
+        if self.stamm_rollen is None or self.stamm_granulate is None:
+            aktuell = (StammdatenBlatt(daten[0].spalten), StammdatenBlatt(daten[1].spalten), ChargeIndex())
+        else:
+            aktuell = (self.stamm_rollen, self.stamm_granulate, self.charge_index)
+        unterschiede = stammdaten_vergleichen(aktuell, daten)
+        dauer_ms = (time.perf_counter() - start) * 1000
+        self.logger.info(f"Arbeitstabelle verglichen ({dauer_ms:.0f} ms): {unterschiede_text(unterschiede)}")
+        return daten, unterschiede
+    
+    def stammdaten_aktualisieren(self, daten, unterschiede):
+        """Übernimmt eine nachgeladene Arbeitstabelle, im Charge-Index nur die geänderten Chargen (Tk-Thread)
+        
+        Gescannte Einträge, deren Zeile sich geändert hat, entfallen oder neu ist, bekommen einen Hinweis
+        (stammdaten_hinweis). Liefert die neu markierten Einträge.
+        """
+        blaetter = {'ROLLE': self.stamm_rollen, 'GRANULAT': self.stamm_granulate}
+        # Andere Spalten passen nicht in die bisherigen Blätter: dann komplett übernehmen
+        komplett = (self.stamm_rollen is None or self.stamm_granulate is None
+                    or self.stamm_rollen.spalten != daten[0].spalten
+                    or self.stamm_granulate.spalten != daten[1].spalten)
+        index = self.charge_index
+        betroffen = []
+        
+        for art, charge, typ, werte in unterschiede:
+            vorher = index.exakt.get(charge)
+            eintraege = self.gescannte_chargen.get(charge_schluessel(charge))
+            if eintraege:
+                alt = blaetter[vorher[0]].datensatz(vorher[1]) if vorher else None
+                betroffen.append((art, charge, typ, werte, alt, eintraege))
+            if komplett:
+                continue
+            
+            if art == 'geaendert' and vorher[0] == typ:
+                blaetter[typ].zeilen[vorher[1]] = werte
+                continue
+            if vorher is not None:
+                index.entfernen(charge)
+                blaetter[vorher[0]].zeile_entfernen(vorher[1])
+            if werte is not None:
+                blatt = blaetter[typ]
+                index.hinzufuegen(typ, len(blatt.zeilen), charge)
+                blatt.zeilen.append(werte)
+        
+        if komplett:
+            self.stammdaten_uebernehmen(daten)
+        else:
+            self.statistik.soll = {'ROLLE': len(self.stamm_rollen), 'GRANULAT': len(self.stamm_granulate)}
+            self.fremde_verwerfen()  # Übrige Werke/Lagerorte neu aus der geänderten Datei
+        if self.statistik.zaehlt is not None:
+            self.statistik.neu_aufbauen(self.alle_eintraege())  # Zugehörigkeit zur Partition kann sich geändert haben
+        
+        markiert = []
+        for art, charge, typ, werte, alt, eintraege in betroffen:
+            bezeichnung = 'Rolle' if typ == 'ROLLE' else 'Granulat'
+            if art == 'entfernt':
+                if self.charge_index.suche(charge) is not None:
+                    continue  # Gleiche Charge mit anderen führenden Nullen ist noch vorhanden
+                hinweis = "nicht mehr in der Arbeitstabelle" + (f" für {self.partition}" if self.partition.aktiv else "")
+            elif art == 'neu':
+                hinweis = f"neu in der Arbeitstabelle ({bezeichnung})"
+            elif alt is None or any(eintrag.typ != typ for eintrag in eintraege):
+                hinweis = f"in der Arbeitstabelle jetzt {bezeichnung}"
+            else:
+                neu = dict(zip(blaetter[typ].spalten, werte))
+                hinweis = "Arbeitstabelle geändert: " + ", ".join(
+                    f"{spalte} {zelltext(alt_wert)} → {zelltext(neu_wert)}"
+                    for spalte, (alt_wert, neu_wert) in zeilen_unterschiede(alt, neu).items())
+            for eintrag in eintraege:
+                self.stammdaten_hinweise[id(eintrag)] = (eintrag, hinweis)
+                markiert.append(eintrag)
+                self.logger.warning(f"Gescannte Charge {eintrag.charge}: {hinweis}")
+        
+        self.logger.info(f"Arbeitstabelle nachgeladen ({'komplett' if komplett else 'geänderte Chargen'}): "
+                         f"{unterschiede_text(unterschiede)}, {len(markiert)} gescannte Einträge betroffen")
+        return markiert
+    
+    def stammdaten_hinweis(self, eintrag):
+        """Hinweis zu einer geänderten Zeile der Arbeitstabelle für einen Eintrag (None, wenn unverändert)"""
+        markierung = self.stammdaten_hinweise.get(id(eintrag))
+        return markierung[1] if markierung is not None else None
+    
+    def fremde_stammdaten(self):
+        """Zeilen der übrigen Werke/Lagerorte als (stamm_rollen, stamm_granulate, charge_index)
+        
+        Mit fremde_synchron beim ersten Bedarf geladen, sonst erst nach fremde_stammdaten_uebernehmen.
+        None ohne Partition, solange noch nicht geladen oder wenn nicht lesbar.
+        """
+        if (self.fremde_daten is None and self.fremde_synchron and self.partition.aktiv
+                and self.stamm_rollen is not None):
+            self.fremde_daten = self.fremde_stammdaten_laden()
+        return self.fremde_daten
+    
+    def fremde_laedt(self):
+        """True, solange der Zweit-Index im Hintergrund geladen wird (fremde Chargen noch nicht auffindbar)"""
+        return self.partition.aktiv and not self.fremde_synchron and self.fremde_daten is None
+    
+    def fremde_verwerfen(self):
+        """Verwirft den Zweit-Index nach einer neuen Arbeitstabelle (neu laden bzw. vorladen)"""
+        self.fremde_daten = None
+        self.fremde_version += 1
+    
+    def fremde_stammdaten_vorladen(self):
+        """Lädt den Zweit-Index in einem eigenen Thread; Ergebnis für fremde_stammdaten_uebernehmen"""
+        version = self.fremde_version
+        return version, self.fremde_stammdaten_laden()
+    
+    def fremde_stammdaten_uebernehmen(self, ergebnis):
+        """Übernimmt den vorgeladenen Zweit-Index, wenn inzwischen keine neue Arbeitstabelle geladen wurde"""
+        version, daten = ergebnis
+        if version != self.fremde_version or self.stamm_rollen is None:
+            return False
+        if daten is None:
+            # Nicht lesbar (Fehler geloggt): fremde Chargen bis zur nächsten Arbeitstabelle nicht gefunden
+            daten = (StammdatenBlatt(self.stamm_rollen.spalten), StammdatenBlatt(self.stamm_granulate.spalten),
+                     ChargeIndex())
+        self.fremde_daten = daten
+        return True
+    
+    def fremde_stammdaten_laden(self):
+        """Liest die übrigen Werke/Lagerorte (Cache, sonst Excel und Cache schreiben); None, wenn nicht lesbar"""
+        start = time.perf_counter()
+        cache = MasterdatenCache(self.arbeitstabelle_path, self.partition.kennung(rest=True))
+        cache_schluessel = None
+        daten = None
+        quelle = "Cache"
+        try:
+            cache_schluessel = cache.schluessel()
+            daten = cache.laden(cache_schluessel)
+        except Exception as e:
+            self.logger.warning(f"Cache der übrigen Werke/Lagerorte nicht lesbar: {e}")
+        
+        if daten is None:
+            quelle = "Excel"
+            try:
+                daten = arbeitstabelle_streamen(self.arbeitstabelle_path, self.partition)[3]
+            except Exception as e:
+                # Scans laufen ohne Zweit-Index weiter (Charge gilt dann als nicht gefunden)
+                self.logger.error(f"Fehler beim Laden der übrigen Werke/Lagerorte: {e}")
+                return None
+            if cache_schluessel is not None:
+                try:
+                    cache.speichern(cache_schluessel, daten)
+                except Exception as e:
+                    self.logger.warning(f"Cache der übrigen Werke/Lagerorte nicht geschrieben: {e}")
+        
+        dauer_ms = (time.perf_counter() - start) * 1000
+        self.logger.info(f"Übrige Werke/Lagerorte geladen ({quelle}, {dauer_ms:.0f} ms): {len(daten[2])} Chargen")
+        return daten
+    
+    def suche_charge(self, charge_nummer):
+        """Sucht Charge über den Charge-Index und gibt Typ zurück (andere Werke/Lagerorte über den Zweit-Index)"""
+        blaetter = (self.stamm_rollen, self.stamm_granulate)
+        treffer = self.charge_index.suche(charge_nummer)
+        if treffer is None and self.partition.aktiv:
+            fremde = self.fremde_stammdaten()
+            if fremde is not None:
+                blaetter = fremde[:2]
+                treffer = fremde[2].suche(charge_nummer)
+        if treffer is None:
+            return ('NICHT_GEFUNDEN', None)
+        
+        typ, zeile = treffer
+        item = (blaetter[0] if typ == 'ROLLE' else blaetter[1]).datensatz(zeile)
+        if blaetter[0] is not self.stamm_rollen:
+            self.logger.info(f"Charge {charge_nummer} gehört zu {self.fremde_partition(item)}")
+        return (typ, item)
+    
+    def in_partition(self, item):
+        """True, wenn die Charge eines Eintrags in den geladenen Stammdaten (eigene Partition) steht"""
+        return self.charge_index.suche(item.charge) is not None
+    
+    def fremde_partition(self, item):
+        """Werk/Lagerort eines Datensatzes aus dem Zweit-Index als Text (None bei der eigenen Partition)"""
+        if item is None or 'Lagerort' not in item:
+            return None
+        return f"Werk {zelltext(item['Werk'])} / Lagerort {zelltext(item['Lagerort'])}"
+    
+    def vorschlaege(self, teil):
+        """Mögliche Chargen für ein beschädigtes/unvollständiges Etikett: Liste von (Typ, Datensatz, Art, Abstand)"""
+        ergebnis = []
+        for charge, typ, zeile, art, abstand in self.charge_index.vorschlaege(
+                teil, self.config.get('vorschlaege_max_abstand', 2), self.config.get('vorschlaege_anzahl', 8)):
+            blatt = self.stamm_rollen if typ == 'ROLLE' else self.stamm_granulate
+            ergebnis.append((typ, blatt.datensatz(zeile), art, abstand))
+        return ergebnis
+    
+    def neuer_scan(self, charge):
+        """Erzeugt den Eintrag für eine gefundene Charge (None, wenn nicht in der Arbeitstabelle)"""
+        typ, item = self.suche_charge(charge)
+        if typ == 'NICHT_GEFUNDEN':
+            return None
+        charge = str(item['Charge']).strip()  # Verwende Charge laut Arbeitstabelle
+        klasse = RollenEintrag if typ == 'ROLLE' else GranulatEintrag
+        return klasse.aus_stammdaten(item, charge)
+    
+    def is_already_scanned(self, charge):
+        """Prüft ob eine Charge hier oder an einer anderen Station bereits gescannt wurde (O(1))"""
+        schluessel = charge_schluessel(charge)
+        return schluessel in self.gescannte_chargen or schluessel in self.fremde_chargen
+    
+    def fremde_station(self, charge):
+        """Gibt die Station zurück, an der die Charge gescannt wurde (None, wenn nur lokal oder gar nicht)"""
+        schluessel = charge_schluessel(charge)
+        if schluessel in self.gescannte_chargen or schluessel not in self.fremde_chargen:
+            return None
+        return ", ".join(sorted(self.fremde_chargen[schluessel]))
+    
+    # --- Datenlisten ---
+    
+    def alle_eintraege(self):
+        """Alle Einträge (Rollen vor Granulaten, jeweils gefunden vor nicht gefunden) als neue Liste"""
+        return [*self.inventur_rollen_data, *self.nicht_gefunden_rollen_data,
+                *self.inventur_granulat_data, *self.nicht_gefunden_granulat_data]
+    
+    def anzahl(self):
+        """Gibt (Anzahl Rollen, Anzahl Granulate) zurück, jeweils inkl. nicht gefundener"""
+        total_rollen = len(self.inventur_rollen_data) + len(self.nicht_gefunden_rollen_data)
+        total_granulat = len(self.inventur_granulat_data) + len(self.nicht_gefunden_granulat_data)
+        return total_rollen, total_granulat
+    
+    def gescannte_chargen_aufbauen(self):
+        """Baut die gescannten Chargen komplett aus allen Listen neu auf (nach dem Laden)"""
+        self.gescannte_chargen = {}
+        for item_list in (self.inventur_rollen_data, self.inventur_granulat_data,
+                          self.nicht_gefunden_rollen_data, self.nicht_gefunden_granulat_data):
+            for item in item_list:
+                self.gescannte_chargen.setdefault(charge_schluessel(item.charge), []).append(item)
+        self.statistik.neu_aufbauen(self.alle_eintraege())
+    
+    def ziel_liste(self, typ, status):
+        """Gibt die Datenliste für Typ und Status zurück"""
+        if typ == 'ROLLE':
+            return self.inventur_rollen_data if status == 'gefunden' else self.nicht_gefunden_rollen_data
+        return self.inventur_granulat_data if status == 'gefunden' else self.nicht_gefunden_granulat_data
+    
+    def eintrag_hinzufuegen(self, item):
+        """Fügt einen Eintrag nach seinem Zeitstempel in die passende Datenliste ein und merkt sich die Charge"""
+        self.ziel_liste(item.typ, item.status).einsortieren(item)
+        self.gescannte_chargen.setdefault(charge_schluessel(item.charge), []).append(item)
+        self.statistik.anpassen(item, 1)
+    
+    def eintrag_entfernen(self, charge, typ=None, status=None):
+        """Entfernt eine Charge aus allen (bzw. der angegebenen) Datenlisten, gibt die entfernten Einträge zurück
+        
+        Über gescannte_chargen werden nur die Einträge dieser Charge angefasst (O(1) statt Durchlauf aller Listen).
+        """
+        schluessel = charge_schluessel(charge)
+        vorhandene = self.gescannte_chargen.get(schluessel, [])
+        entfernte = [item for item in vorhandene
+                     if item.charge == charge and (typ is None or item.typ == typ)
+                     and (status is None or (item.status == 'gefunden') == (status == 'gefunden'))]
+        if not entfernte:
+            return []
+        
+        for item in entfernte:
+            self.ziel_liste(item.typ, item.status).entfernen(item)
+            self.statistik.anpassen(item, -1)
+        rest = [item for item in vorhandene if not any(item is entfernt for entfernt in entfernte)]
+        if rest:
+            self.gescannte_chargen[schluessel] = rest
+        else:
+            del self.gescannte_chargen[schluessel]
+        return entfernte
+    
+    # --- Erfassen, Löschen, Rückgängig ---
+    
+    def verlauf_zuordnen(self, neu):
+        """Bindet den Rückgängig-Verlauf an die geladene Inventur; Schritte einer anderen werden verworfen"""
+        try:
+            verworfen = self.verlauf.zuordnen((self.inventur_rollen_path, self.inventur_granulat_path), neu)
+        except Exception as e:
+            self.logger.error(f"Fehler beim Zuordnen des Verlaufs: {e}")
+            return
+        if verworfen:
+            self.logger.info(f"Rückgängig-Verlauf verworfen ({verworfen} Schritte): gehört nicht zu dieser Inventur")
+    
+    def verlauf_merken(self, aktion, eintraege):
+        """Legt einen Schritt im Rückgängig-Verlauf ab (Fehler werden gemeldet, der Scan bleibt gültig)"""
+        try:
+            self.verlauf.merken(aktion, eintraege)
+        except Exception as e:
+            self.logger.error(f"Fehler beim Schreiben des Verlaufs: {e}")
+    
+    def erfassen(self, eintrag):
+        """Speichert einen fertigen Scan: Zeitstempel, Datenliste, Undo und Journal"""
+        eintrag.zeitstempel = datetime.now().strftime('%d.%m.%Y %H:%M:%S')
+        
+        with self.messung.phase('speichern'):
+            # Liste und Undo teilen sich den Eintrag, keine Kopien
+            self.eintrag_hinzufuegen(eintrag)
+            self.aenderungen_schreiben([('add', eintrag)])
+            self.verlauf_merken('add', [eintrag])
+        self.statistik.scans_zaehlen([eintrag])
+        return eintrag
+    
+    def scan_erfassen(self, charge, fach='', breite='', zahlmenge='', bemerkung=''):
+        """Sucht eine Charge, prüft die Eingaben und erfasst den Scan in einem Schritt
+        
+        Gibt den Eintrag zurück; EingabeFehler, wenn die Charge schon gescannt bzw. nicht in der
+        Arbeitstabelle ist oder Eingaben fehlen. charge darf ein ganzer Etiketteninhalt (z.B. GS1) sein,
+        ein Gewicht darauf ersetzt eine fehlende Zählmenge.
+        """
+        with self.messung.phase('dekodieren'):
+            gelesen = self.dekodierer.dekodieren(charge)
+        charge = gelesen['charge']
+        if not str(zahlmenge).strip() and gelesen['zahlmenge'] is not None:
+            zahlmenge = str(gelesen['zahlmenge'])
+        with self.messung.phase('duplikat'):
+            bereits_gescannt = self.is_already_scanned(charge)
+        if bereits_gescannt:
+            raise EingabeFehler('charge', f"Die Ware mit Charge {charge} wurde bereits eingescannt!")
+        with self.messung.phase('suche'):
+            eintrag = self.neuer_scan(charge)
+        if eintrag is None:
+            raise EingabeFehler('charge', f"Charge {charge} nicht in der Arbeitstabelle gefunden!")
+        with self.messung.phase('pruefung'):
+            eingaben_uebernehmen(eintrag, fach, breite, zahlmenge, bemerkung)
+        return self.erfassen(eintrag)
+    
+    def eintraege_uebernehmen(self, eintraege):
+        """Übernimmt mehrere fertige Einträge mit einem einzigen Schreibvorgang"""
+        for eintrag in eintraege:
+            self.eintrag_hinzufuegen(eintrag)
+        self.aenderungen_schreiben([('add', eintrag) for eintrag in eintraege])
+        
+        # Der ganze Import ist ein Undo-Schritt; in den Durchsatz zählt er nicht (Scans liegen zurück)
+        self.verlauf_merken('import', eintraege)
+        self.logger.info(f"Batch-Import: {len(eintraege)} Einträge übernommen")
+    
+    def loeschen(self, charge):
+        """Löscht eine Charge aus allen Datenlisten, gibt die entfernten Einträge zurück"""
+        entfernte = self.eintrag_entfernen(charge)
+        if entfernte:
+            # Je entferntem Eintrag eine Löschung mit Typ/Status (andere Stationen zählen je Eintrag)
+            self.aenderungen_schreiben([('delete', {'charge': item.charge, 'typ': item.typ, 'status': item.status})
+                                        for item in entfernte])
+            self.verlauf_merken('delete', entfernte)
+            self.logger.info(f"Eintrag gelöscht: {charge}")
+        return entfernte
+    
+    def _schritt_anwenden(self, hinzufuegen, eintraege):
+        """Fügt die Einträge eines Verlaufsschritts hinzu bzw. entfernt sie (ein Schreibvorgang)
+        
+        Gibt (hinzugefügte, entfernte, übersprungene) Einträge zurück; übersprungen sind Einträge des Schritts,
+        die inzwischen anderweitig erfasst (beim Hinzufügen) bzw. schon entfernt sind (beim Entfernen).
+        """
+        if hinzufuegen:
+            # Inzwischen anderweitig erfasste Chargen nicht doppelt anlegen
+            hinzugefuegt, uebersprungen = [], []
+            for eintrag in eintraege:
+                (uebersprungen if self.is_already_scanned(eintrag.charge) else hinzugefuegt).append(eintrag)
+            for eintrag in hinzugefuegt:
+                self.eintrag_hinzufuegen(eintrag)
+            if hinzugefuegt:
+                self.aenderungen_schreiben([('add', eintrag) for eintrag in hinzugefuegt])
+            return hinzugefuegt, [], uebersprungen
+        
+        entfernte, uebersprungen = [], []
+        for eintrag in eintraege:
+            gefunden = self.eintrag_entfernen(eintrag.charge, eintrag.typ, eintrag.status)
+            entfernte.extend(gefunden)
+            if not gefunden:
+                uebersprungen.append(eintrag)
+        # Nur tatsächlich entfernte Einträge melden (andere Stationen zählen Löschungen je Eintrag)
+        if entfernte:
+            self.aenderungen_schreiben([('delete', {'charge': item.charge, 'typ': item.typ, 'status': item.status})
+                                        for item in entfernte])
+        return [], entfernte, uebersprungen
+    
+    def schritt_protokollieren(self, art, aktion, eintraege, uebersprungen):
+        """Loggt einen rückgängig gemachten bzw. wiederholten Schritt samt übersprungener Chargen"""
+        self.logger.info(f"{art} {aktion}: {', '.join(eintrag.charge for eintrag in eintraege[:5])}"
+                         + (f" (+{len(eintraege) - 5})" if len(eintraege) > 5 else ''))
+        if uebersprungen:
+            self.logger.info(f"{art} {aktion}: {len(uebersprungen)} übersprungen (bereits erfasst bzw. entfernt): "
+                             f"{', '.join(eintrag.charge for eintrag in uebersprungen)}")
+    
+    def rueckgaengig(self):
+        """Macht den letzten Schritt rückgängig (auch nach einem Neustart)
+        
+        Liefert (Aktion, Einträge des Schritts, hinzugefügte, entfernte, übersprungene Einträge) oder None,
+        wenn es nichts rückgängig zu machen gibt. Ein ganzer Batch-Import wird mit einem Schreibvorgang
+        zurückgenommen; wieder hinzugefügte Einträge stehen nach ihrem Zeitstempel, nicht am Ende.
+        """
+        schritt = self.verlauf.letzter()
+        if schritt is None:
+            return None
+        schritt_id, aktion, eintraege = schritt
+        
+        # Löschen rückgängig = wieder hinzufügen, Erfassen/Import rückgängig = entfernen
+        hinzugefuegt, entfernte, uebersprungen = self._schritt_anwenden(aktion == 'delete', eintraege)
+        self.verlauf.markieren(schritt_id, True)
+        self.schritt_protokollieren("Undo", aktion, eintraege, uebersprungen)
+        return aktion, eintraege, hinzugefuegt, entfernte, uebersprungen
+    
+    def wiederholen(self):
+        """Wiederholt den zuletzt rückgängig gemachten Schritt (Rückgabe wie rueckgaengig)"""
+        schritt = self.verlauf.naechster_wiederholbarer()
+        if schritt is None:
+            return None
+        schritt_id, aktion, eintraege = schritt
+        
+        hinzugefuegt, entfernte, uebersprungen = self._schritt_anwenden(aktion != 'delete', eintraege)
+        self.verlauf.markieren(schritt_id, False)
+        self.schritt_protokollieren("Redo", aktion, eintraege, uebersprungen)
+        return aktion, eintraege, hinzugefuegt, entfernte, uebersprungen
+    
+    def aenderungen_schreiben(self, aktionen):
+        """Schreibt mehrere Änderungen in einem Vorgang (ein fsync bzw. eine Transaktion)"""
+        try:
+            if self.store is not None:
+                self.store.mehrere_anwenden(aktionen)
+            else:
+                self.journal.mehrere_anhaengen([(aktion, daten.als_dict() if aktion == 'add' else daten)
+                                                for aktion, daten in aktionen])
+        except Exception as e:
+            self.fehler_melden(f"Fehler beim Schreiben des Journals:\n{e}")
+            self.logger.error(f"Fehler beim Schreiben des Journals: {e}")
+        
+        if self.sync is not None:
+            self.sync_vormerken(aktionen)
+    
+    # --- Batch-Import ---
+    
+    def auszug_zeile_dekodieren(self, roh):
+        """Wie dekodierer.dekodieren, ein unlesbares Etikett bleibt aber als Charge stehen (landet in der Arbeitsliste)"""
+        try:
+            return self.dekodierer.dekodieren(roh)
+        except EingabeFehler as e:
+            self.logger.warning(f"Auszug: {e}")
+            return {'charge': roh, 'material': None, 'zahlmenge': None, 'etikett': None}
+    
+    def batch_lesen(self, pfad):
+        """Liest einen Scanner-Speicherauszug und ordnet alle Chargen zu (siehe chargen_klassifizieren)"""
+        df = scan_datei_lesen(pfad)
+        
+        # Etiketteninhalte (z.B. GS1) im Auszug: Charge herauslösen, Gewicht als Zählmenge vorgeben
+        gelesen = [self.auszug_zeile_dekodieren(roh) for roh in df['Charge']]
+        if any(eintrag['etikett'] for eintrag in gelesen):
+            df['Charge'] = [eintrag['charge'] for eintrag in gelesen]
+            gewichte = pd.Series([eintrag['zahlmenge'] for eintrag in gelesen], index=df.index, dtype=object)
+            if 'Zählmenge' in df.columns:
+                leer = df['Zählmenge'].fillna('').astype(str).str.strip() == ''
+                df.loc[leer, 'Zählmenge'] = gewichte[leer]
+            else:
+                df['Zählmenge'] = gewichte
+        
+        bereits_gescannt = set(self.gescannte_chargen) | set(self.fremde_chargen)
+        df = chargen_klassifizieren(df, self.charge_index, bereits_gescannt)
+        
+        # Chargen anderer Werke/Lagerorte über den Zweit-Index (Spalte Fremd)
+        df['Fremd'] = False
+        fehlend = df['Klasse'] == 'NICHT_GEFUNDEN'
+        fremde = self.fremde_stammdaten() if fehlend.any() else None
+        if fremde is not None:
+            nachtrag = chargen_klassifizieren(df.loc[fehlend, ['Charge']], fremde[2])
+            gefunden = nachtrag.index[nachtrag['Typ'].notna()]
+            df.loc[gefunden, ['Typ', 'Zeile', 'Klasse']] = nachtrag.loc[gefunden, ['Typ', 'Zeile', 'Klasse']]
+            df.loc[gefunden, 'Fremd'] = True
+        return df
+    
+    def batch_eintraege_erstellen(self, df):
+        """Erzeugt Einträge für gefundene Chargen; vollständige (Fach/Breite bzw. Zählmenge im Auszug)
+        werden direkt übernommen, alle anderen kommen in die Arbeitsliste"""
+        fertige, offene = [], []
+        zeitstempel = datetime.now().strftime('%d.%m.%Y %H:%M:%S')
+        
+        for zeile in df.to_dict('records'):
+            klasse = zeile['Klasse']
+            if klasse == 'DUPLIKAT':
+                continue
+            vorgaben = {feld: str(zeile.get(feld, '') or '').strip() for feld in ('Fach', 'Breite', 'Zählmenge', 'Bemerkung')}
+            
+            if klasse == 'NICHT_GEFUNDEN':
+                offene.append({'charge': zeile['Charge'], 'typ': '', 'material': '', 'kurztext': '',
+                               'fehlt': 'Stammdaten (nicht gefunden)', 'vorgaben': vorgaben})
+                continue
+            
+            blaetter = self.fremde_stammdaten() if zeile['Fremd'] else (self.stamm_rollen, self.stamm_granulate)
+            item = (blaetter[0] if klasse == 'ROLLE' else blaetter[1]).datensatz(zeile['Zeile'])
+            charge = str(item['Charge']).strip()  # Charge laut Arbeitstabelle
+            
+            if klasse == 'ROLLE':
+                eintrag = RollenEintrag.aus_stammdaten(item, charge)
+                gueltig, breite = validiere_breite(vorgaben['Breite'])
+                fehlt = [name for name, ok in (('Fach', vorgaben['Fach']), ('Breite', gueltig)) if not ok]
+                if not fehlt:
+                    eintrag.fach_kontrolliert = vorgaben['Fach']
+                    eintrag.breite_kontrolliert = breite
+            else:
+                eintrag = GranulatEintrag.aus_stammdaten(item, charge)
+                gueltig, zahlmenge = validiere_gewicht(vorgaben['Zählmenge'])
+                fehlt = [] if gueltig else ['Zählmenge']
+                if gueltig:
+                    eintrag.zahlmenge_kg = zahlmenge
+            
+            if fehlt:
+                offene.append({'charge': charge, 'typ': klasse, 'material': eintrag.material,
+                               'kurztext': eintrag.kurztext, 'fehlt': ", ".join(fehlt), 'vorgaben': vorgaben})
+                continue
+            
+            eintrag.bemerkung = vorgaben['Bemerkung']
+            eintrag.zeitstempel = zeitstempel
+            fertige.append(eintrag)
+        
+        return fertige, offene
+    
+    # --- Sync ---
+    
+    def sync_vormerken(self, aktionen):
+        """Legt lokale Änderungen in den Sync-Ausgang (werden gebündelt übertragen)"""
+        try:
+            self.sync.mehrere_vormerken([
+                ('add', daten.charge, daten.typ, daten.status) if aktion == 'add'
+                else ('delete', daten['charge'], daten.get('typ'), daten.get('status'))
+                for aktion, daten in aktionen])
+        except Exception as e:
+            self.logger.error(f"Fehler beim Schreiben des Sync-Ausgangs: {e}")
+    
+    def sync_bestaetigen(self, ausgang_stand, anzahl, antwort):
+        """Kürzt den Sync-Ausgang und übernimmt die fremden Änderungen aus der Server-Antwort"""
+        for aenderung in self.sync.bestaetigen(ausgang_stand, anzahl, antwort):
+            self.fremde_aenderung_anwenden(aenderung)
+    
+    def fremde_aenderung_anwenden(self, aenderung):
+        """Übernimmt einen Scan bzw. eine Löschung einer anderen Station in die Duplikatprüfung"""
+        schluessel = charge_schluessel(aenderung['charge'])
+        station = aenderung['station']
+        stationen = self.fremde_chargen.setdefault(schluessel, Counter())
+        if aenderung['aktion'] == 'add':
+            stationen[station] += 1
+        else:
+            stationen[station] -= 1
+            if stationen[station] <= 0:
+                del stationen[station]
+        if not stationen:
+            del self.fremde_chargen[schluessel]
+    
+    # --- Bestehende Inventur laden ---
+    
+    def inventur_laden(self):
+        """Lädt bestehende Inventur-Daten (Excel bzw. Datenbank) und spielt das Journal ein
+        
+        Liefert (geladene Einträge gesamt, davon aus dem Journal). Ungültige Zellen stehen danach
+        in ladeprobleme.
+        """
+        total_loaded = 0
+        vorhanden = self.inventur_rollen_path.exists() or self.inventur_granulat_path.exists()
+        
+        if self.store is not None:
+            # Datenbank-Betrieb: Einträge aus SQLite (beim ersten Start aus Excel übernommen)
+            total_loaded += self.load_existing_datenbank()
+        else:
+            # Lade Rollen-Inventur
+            total_loaded += self.load_existing_rollen()
+            
+            # Lade Granulat-Inventur
+            total_loaded += self.load_existing_granulat()
+        
+        # Duplikatprüfung auf den geladenen Stand bringen
+        self.gescannte_chargen_aufbauen()
+        
+        # Journal seit der letzten Excel-Speicherung einspielen
+        journal_count = self.journal_wiederherstellen()
+        total_loaded += journal_count
+        
+        # Rückgängig-Verlauf nur für diese Inventur (nicht für gelöschte oder ersetzte Dateien)
+        vorhanden = vorhanden or journal_count > 0 or (self.store is not None and self.store.anzahl() > 0)
+        self.verlauf_zuordnen(neu=not vorhanden)
+        
+        if total_loaded > 0:
+            total_rollen, total_granulat = self.anzahl()
+            self.logger.info(f"Bestehende Inventur geladen: {total_rollen} Rollen, {total_granulat} Granulate")
+        
+        return total_loaded, journal_count
+    
+    def load_existing_datenbank(self):
+        """Lädt die Inventur aus der SQLite-Datenbank"""
+        try:
+            if self.store.anzahl() == 0:
+                # Erster Start mit Datenbank: bestehende Excel-Inventur in einer Transaktion übernehmen
+                loaded_count = self.load_existing_rollen() + self.load_existing_granulat()
+                if loaded_count > 0:
+                    self.store.mehrere_hinzufuegen(self.alle_eintraege())
+                    self.store.exportiert = self.store.aenderungen
+                    self.logger.info(f"Excel-Inventur in Datenbank übernommen: {loaded_count} Einträge")
+                return loaded_count
+            
+            loaded_count = 0
+            for item in self.store.eintraege():
+                self.ziel_liste(item.typ, item.status).append(item)
+                loaded_count += 1
+            return loaded_count
+        
+        except Exception as e:
+            self.logger.error(f"Fehler beim Laden der Datenbank: {e}")
+            self.fehler_melden(f"Fehler beim Laden der Datenbank:\n{e}")
+            return 0
+    
+    def load_existing_rollen(self):
+        """Lädt bestehende Rollen-Inventur"""
+        return self.load_existing_datei(self.inventur_rollen_path, INVENTUR_SPALTEN_ROLLEN, 'ROLLE')
+    
+    def load_existing_granulat(self):
+        """Lädt bestehende Granulat-Inventur"""
+        return self.load_existing_datei(self.inventur_granulat_path, INVENTUR_SPALTEN_GRANULAT, 'GRANULAT')
+    
+    def load_existing_datei(self, pfad, spalten, typ):
+        """Lädt beide Tabellenblätter einer Inventur-Datei spaltenweise (ungültige Zellen werden einzeln gemeldet)"""
+        if not pfad.exists():
+            return 0
+        
+        try:
+            # Alle Tabellenblätter in einem Durchgang, als Text (Umwandlung danach spaltenweise)
+            blaetter = pd.read_excel(pfad, sheet_name=None, dtype=str)
+        except Exception as e:
+            self.logger.error(f"Fehler beim Laden von {pfad.name}: {e}")
+            self.ladeprobleme.append(f"{pfad.name}: Datei nicht lesbar ({e})")
+            return 0
+        
+        loaded_count = 0
+        for sheet, status in (('Inventur', 'gefunden'), ('Nicht_gefunden', 'nicht_gefunden')):
+            if sheet not in blaetter:
+                continue  # Sheet existiert noch nicht
+            
+            eintraege, probleme = inventur_blatt_umwandeln(blaetter[sheet], spalten, typ, status)
+            self.ziel_liste(typ, status).extend(eintraege)
+            loaded_count += len(eintraege)
+            
+            for zeile, charge, spalte, wert in probleme:
+                meldung = (f"{pfad.name} / {sheet}, Zeile {zeile} (Charge {charge}): "
+                           f"ungültiger Wert '{wert}' in '{spalte}', als 0 übernommen")
+                self.logger.warning(meldung)
+                self.ladeprobleme.append(meldung)
+        
+        return loaded_count
+    
+    def journal_wiederherstellen(self):
+        """Spielt das Journal nach dem Laden der Excel-Dateien erneut ein"""
+        try:
+            eintraege = self.journal.lesen()
+        except Exception as e:
+            self.logger.error(f"Fehler beim Lesen des Journals: {e}")
+            return 0
+        
+        for aktion, daten in eintraege:
+            if aktion == 'add':
+                # Eintrag evtl. schon in Excel (Absturz zwischen Speichern und Leeren)
+                if charge_schluessel(daten['charge']) in self.gescannte_chargen:
+                    continue
+                daten = InventurEintrag.aus_dict(daten)
+                self.eintrag_hinzufuegen(daten)
+            elif aktion == 'delete':
+                self.eintrag_entfernen(daten['charge'], daten.get('typ'), daten.get('status'))
+            if self.store is not None:
+                self.store.anwenden(aktion, daten)
+        
+        if eintraege:
+            self.logger.info(f"Journal wiederhergestellt: {len(eintraege)} Einträge")
+            if self.store is not None:
+                # Einträge stehen jetzt in der Datenbank, das Journal wird nicht mehr gebraucht
+                self.journal.entfernen_bis(self.journal.geschrieben)
+        return len(eintraege)
+    
+    # --- Excel-Dateien und Export ---
+    
+    def daten_snapshot(self):
+        """Erstellt eine Momentaufnahme der Datenlisten für den Schreib-Thread"""
+        if self.store is not None:
+            # Der Schreib-Thread liest selbst in einer Lesetransaktion aus der Datenbank
+            return {'datenbank': True, 'journal_stand': self.journal.geschrieben,
+                    'store_stand': self.store.aenderungen}
+        # Gespeicherte Einträge werden nicht mehr verändert, flache Kopien der Listen genügen
+        return {
+            'inventur_rollen': list(self.inventur_rollen_data),
+            'nicht_gefunden_rollen': list(self.nicht_gefunden_rollen_data),
+            'inventur_granulat': list(self.inventur_granulat_data),
+            'nicht_gefunden_granulat': list(self.nicht_gefunden_granulat_data),
+            'journal_stand': self.journal.geschrieben
+        }
+    
+    def snapshot_gespeichert(self, snapshot):
+        """Nach erfolgreichem Schreiben einer Momentaufnahme: Journal kürzen, Datenbank-Export merken"""
+        try:
+            self.journal.entfernen_bis(snapshot['journal_stand'])
+        except Exception as e:
+            self.logger.error(f"Fehler beim Kürzen des Journals: {e}")
+        if self.store is not None:
+            self.store.exportiert = max(self.store.exportiert, snapshot['store_stand'])
+    
+    def persistenz_offen(self):
+        """True, wenn Änderungen noch nicht in die Excel-Dateien übernommen wurden"""
+        if self.journal.offen():
+            return True
+        return self.store is not None and self.store.exportiert < self.store.aenderungen
+    
+    def speichern(self):
+        """Schreibt beide Excel-Dateien sofort (ohne Schreib-Thread) und kürzt danach das Journal"""
+        snapshot = self.daten_snapshot()
+        self.save_to_excel(snapshot)
+        self.snapshot_gespeichert(snapshot)
+    
+    def save_to_excel(self, snapshot):
+        """Speichert eine Momentaufnahme in separate Excel-Dateien (läuft im Schreib-Thread)"""
+        if snapshot.get('datenbank'):
+            self.save_to_excel_aus_datenbank()
+            return
+        
+        # Speichere Rollen-Datei
+        self.save_rollen_excel(snapshot['inventur_rollen'], snapshot['nicht_gefunden_rollen'])
+        
+        # Speichere Granulat-Datei
+        self.save_granulat_excel(snapshot['inventur_granulat'], snapshot['nicht_gefunden_granulat'])
+        
+        self.logger.info("Excel-Dateien gespeichert")
+    
+    def save_to_excel_aus_datenbank(self):
+        """Exportiert beide Excel-Dateien direkt aus der Datenbank (eigene Leseverbindung, Schreib-Thread)"""
+        verbindung = self.store.verbinden()
+        try:
+            # Eine Lesetransaktion → beide Dateien zeigen denselben Stand
+            verbindung.execute('BEGIN')
+            self.save_rollen_excel(self.store.eintraege('ROLLE', 'gefunden', verbindung),
+                                   self.store.eintraege('ROLLE', 'nicht_gefunden', verbindung))
+            self.save_granulat_excel(self.store.eintraege('GRANULAT', 'gefunden', verbindung),
+                                     self.store.eintraege('GRANULAT', 'nicht_gefunden', verbindung))
+        finally:
+            verbindung.close()
+        
+        self.logger.info("Excel-Dateien aus der Datenbank exportiert")
+    
+    def save_rollen_excel(self, inventur_data, nicht_gefunden_data):
+        """Speichert Rollen-Daten in Inventur_Rollen.xlsx (Listen oder Datenbank-Iteratoren)"""
+        # Erstelle oder lade Workbook
+        if self.inventur_rollen_path.exists():
+            wb = openpyxl.load_workbook(self.inventur_rollen_path)
+        else:
+            wb = openpyxl.Workbook()
+            # Entferne Standard-Sheet
+            if 'Sheet' in wb.sheetnames:
+                wb.remove(wb['Sheet'])
+        
+        # Erstelle/aktualisiere Inventur-Sheet
+        if 'Inventur' in wb.sheetnames:
+            wb.remove(wb['Inventur'])
+        
+        ws_inventur = wb.create_sheet('Inventur')
+        
+        # Header für Rollen-Inventur (erweiterte Struktur)
+        headers = ['Datum/Uhrzeit', 'Charge', 'Material', 'Materialkurztext', 
+                  'Länge m', 'Fläche m²', 'Breite mm', 'Breite kontrolliert', 
+                  'Fach', 'Fach kontrolliert', 'Bemerkung']
+        ws_inventur.append(headers)
+        
+        # Daten für Rollen-Inventur
+        for zeile, item in enumerate(inventur_data, start=2):
+            bemerkung = item.bemerkung
+            if bemerkung == 'nan' or str(bemerkung).lower() == 'nan':
+                bemerkung = ''
+            
+            row = [
+                item.zeitstempel,
+                item.charge,
+                item.material,
+                item.kurztext,
+                item.laenge,
+                item.flaeche,
+                item.breite_original,  # Original aus Arbeitstabelle
+                item.breite_kontrolliert,  # Vom Nutzer eingegeben
+                item.fach_original,  # Original aus Arbeitstabelle
+                item.fach_kontrolliert,  # Vom Nutzer eingegeben
+                bemerkung
+            ]
+            ws_inventur.append(row)
+            ws_inventur.cell(row=zeile, column=2).number_format = '@'  # Charge als Text
+        
+        # Erstelle/aktualisiere Nicht_gefunden-Sheet
+        if 'Nicht_gefunden' in wb.sheetnames:
+            wb.remove(wb['Nicht_gefunden'])
+        
+        ws_nicht_gefunden = wb.create_sheet('Nicht_gefunden')
+        ws_nicht_gefunden.append(headers)
+        
+        # Daten für Nicht_gefunden Rollen
+        for zeile, item in enumerate(nicht_gefunden_data, start=2):
+            bemerkung = item.bemerkung
+            if bemerkung == 'nan' or str(bemerkung).lower() == 'nan':
+                bemerkung = ''
+            
+            row = [
+                item.zeitstempel,
+                item.charge,
+                item.material,
+                item.kurztext,
+                item.laenge,
+                item.flaeche,
+                item.breite_original,
+                item.breite_kontrolliert,
+                item.fach_original,
+                item.fach_kontrolliert,
+                bemerkung
+            ]
+            ws_nicht_gefunden.append(row)
+            ws_nicht_gefunden.cell(row=zeile, column=2).number_format = '@'  # Charge als Text
+        
+        # Speichern (erst in temporäre Datei, dann ersetzen)
+        self.workbook_speichern(wb, self.inventur_rollen_path)
+    
+    def save_granulat_excel(self, inventur_data, nicht_gefunden_data):
+        """Speichert Granulat-Daten in Inventur_Granulat.xlsx (Listen oder Datenbank-Iteratoren)"""
+        # Erstelle oder lade Workbook
+        if self.inventur_granulat_path.exists():
+            wb = openpyxl.load_workbook(self.inventur_granulat_path)
+        else:
+            wb = openpyxl.Workbook()
+            # Entferne Standard-Sheet
+            if 'Sheet' in wb.sheetnames:
+                wb.remove(wb['Sheet'])
+        
+        # Erstelle/aktualisiere Inventur-Sheet
+        if 'Inventur' in wb.sheetnames:
+            wb.remove(wb['Inventur'])
+        
+        ws_inventur = wb.create_sheet('Inventur')
+        
+        # Header für Granulat-Inventur
+        headers = ['Datum/Uhrzeit', 'Charge', 'Material', 'Materialkurztext', 
+                  'Frei verwendbar (KG)', 'Zählmenge (KG)', 'Bemerkung']
+        ws_inventur.append(headers)
+        
+        # Daten für Granulat-Inventur
+        for zeile, item in enumerate(inventur_data, start=2):
+            bemerkung = item.bemerkung
+            if bemerkung == 'nan' or str(bemerkung).lower() == 'nan':
+                bemerkung = ''
+            
+            row = [
+                item.zeitstempel,
+                item.charge,
+                item.material,
+                item.kurztext,
+                item.frei_verwendbar_kg,  # Soll-Gewicht
+                item.zahlmenge_kg,  # Ist-Gewicht
+                bemerkung
+            ]
+            ws_inventur.append(row)
+            ws_inventur.cell(row=zeile, column=2).number_format = '@'  # Charge als Text
+        
+        # Erstelle/aktualisiere Nicht_gefunden-Sheet
+        if 'Nicht_gefunden' in wb.sheetnames:
+            wb.remove(wb['Nicht_gefunden'])
+        
+        ws_nicht_gefunden = wb.create_sheet('Nicht_gefunden')
+        ws_nicht_gefunden.append(headers)
+        
+        # Daten für Nicht_gefunden Granulat
+        for zeile, item in enumerate(nicht_gefunden_data, start=2):
+            bemerkung = item.bemerkung
+            if bemerkung == 'nan' or str(bemerkung).lower() == 'nan':
+                bemerkung = ''
+            
+            row = [
+                item.zeitstempel,
+                item.charge,
+                item.material,
+                item.kurztext,
+                item.frei_verwendbar_kg,
+                item.zahlmenge_kg,
+                bemerkung
+            ]
+            ws_nicht_gefunden.append(row)
+            ws_nicht_gefunden.cell(row=zeile, column=2).number_format = '@'  # Charge als Text
+        
+        # Speichern (erst in temporäre Datei, dann ersetzen)
+        self.workbook_speichern(wb, self.inventur_granulat_path)
+    
+    def workbook_speichern(self, wb, pfad):
+        """Speichert ein Workbook atomar, damit ein Absturz keine halbe Datei hinterlässt"""
+        temp_pfad = pfad.with_name(pfad.stem + '.tmp.xlsx')
+        wb.save(temp_pfad)
+        os.replace(temp_pfad, pfad)
+    
+    def abgleich_erstellen(self, eintraege=None, pfad=None):
+        """Erstellt den Soll/Ist-Abgleich (Toleranzen aus der Konfiguration) als Excel-Bericht
+        
+        eintraege ist eine Momentaufnahme (z.B. aus dem Tk-Thread), sonst werden die aktuellen Listen
+        verwendet. Liefert (Pfad, {Blattname: DataFrame}).
+        """
+        if self.stamm_rollen is None or self.stamm_granulate is None:
+            raise ArbeitstabelleFehler("Keine Arbeitstabelle geladen - Abgleich nicht möglich.")
+        eintraege = self.alle_eintraege() if eintraege is None else eintraege
+        
+        start = time.perf_counter()
+        berichte = abgleich_berechnen(self.stamm_rollen, self.stamm_granulate, eintraege,
+                                      toleranz_breite_mm=self.config.get('abgleich_toleranz_breite_mm', 0),
+                                      toleranz_gewicht_kg=self.config.get('abgleich_toleranz_gewicht_kg', 0),
+                                      toleranz_gewicht_prozent=self.config.get('abgleich_toleranz_gewicht_prozent', 0))
+        dauer_ms = (time.perf_counter() - start) * 1000
+        
+        pfad = Path(pfad) if pfad else self.data_dir / f"Abgleich_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        temp_pfad = pfad.with_name(pfad.stem + '.tmp.xlsx')
+        with pd.ExcelWriter(temp_pfad, engine='openpyxl') as writer:
+            for blatt, df in berichte.items():
+                df.to_excel(writer, sheet_name=blatt, index=False)
+        os.replace(temp_pfad, pfad)
+        
+        self.logger.info(f"Soll/Ist-Abgleich erstellt ({dauer_ms:.0f} ms berechnet): {pfad.name}; "
+                         + abgleich_zusammenfassung(berichte).replace('\n', ', '))
+        return pfad, berichte
+    
+    def backup_erstellen(self, zeitstempel=None):
+        """Kopiert beide Inventur-Dateien in den Backup-Ordner (vorher speichern, falls Änderungen offen sind)
+        
+        Liefert {Typ: Backup-Pfad} der kopierten Dateien.
+        """
+        zeitstempel = zeitstempel or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.backup_dir.mkdir(exist_ok=True)
+        
+        backups = {}
+        for typ, pfad, name in (('ROLLE', self.inventur_rollen_path, 'Inventur_Rollen'),
+                                ('GRANULAT', self.inventur_granulat_path, 'Inventur_Granulat')):
+            if pfad.exists():
+                ziel = self.backup_dir / f"{name}_Backup_{zeitstempel}.xlsx"
+                shutil.copy2(pfad, ziel)
+                backups[typ] = ziel
+        
+        if backups:
+            self.logger.info(f"V2 Backup erstellt: {len(backups)} Dateien")
+        return backups
+    
+    def schliessen(self):
+        """Schließt Journal, Sync-Ausgang und Datenbank (ausstehende Excel-Aufträge vorher abwarten)"""
+        self.journal.schliessen()
+        self.verlauf.schliessen()
+        if self.sync is not None:
+            self.sync.schliessen()
+        if self.store is not None:
+            self.store.schliessen()
+
+
+def main(argv=None):
+    """Kommandozeile für Läufe ohne Display (Build-Rechner, Batch-Verarbeitung)"""
+    basis = Path(__file__).resolve().parent
+    parser = argparse.ArgumentParser(description="Inventur ohne Oberfläche")
+    parser.add_argument('--daten', type=Path, default=basis / 'data', help="Datenordner (Arbeitstabelle, Inventur)")
+    parser.add_argument('--config', type=Path, default=basis / 'config' / 'settings.json', help="Konfigurationsdatei")
+    parser.add_argument('--werk', help="Nur dieses Werk laden (statt partition_werk aus der Konfiguration)")
+    parser.add_argument('--lagerort', help="Nur diesen Lagerort laden (statt partition_lagerort aus der Konfiguration)")
+    befehle = parser.add_subparsers(dest='befehl', required=True)
+    
+    befehle.add_parser('info', help="Stammdaten und Inventur-Stand anzeigen")
+    
+    suchen = befehle.add_parser('suchen', help="Chargen in der Arbeitstabelle suchen")
+    suchen.add_argument('chargen', nargs='+')
+    
+    erfassen = befehle.add_parser('erfassen', help="Eine Charge mit Eingaben erfassen")
+    erfassen.add_argument('charge')
+    erfassen.add_argument('--fach', default='')
+    erfassen.add_argument('--breite', default='')
+    erfassen.add_argument('--zahlmenge', default='')
+    erfassen.add_argument('--bemerkung', default='')
+    
+    loeschen = befehle.add_parser('loeschen', help="Eine Charge aus der Inventur löschen")
+    loeschen.add_argument('charge')
+    
+    importieren = befehle.add_parser('import', help="Scanner-Speicherauszug (Text/CSV) importieren")
+    importieren.add_argument('datei', type=Path)
+    
+    befehle.add_parser('rueckgaengig', help="Letzten Schritt (Erfassen, Import, Löschen) rückgängig machen")
+    befehle.add_parser('wiederholen', help="Zuletzt rückgängig gemachten Schritt wiederholen")
+    
+    befehle.add_parser('export', help="Excel-Dateien schreiben und Backup erstellen")
+    
+    abgleich = befehle.add_parser('abgleich', help="Soll/Ist-Abgleich als Excel-Bericht erstellen")
+    abgleich.add_argument('--ausgabe', type=Path, help="Zieldatei (Standard: Datenordner/Abgleich_<Zeit>.xlsx)")
+    
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger('inventur_engine')
+    
+    config = {}
+    if args.config.exists():
+        with open(args.config, 'r', encoding='utf-8-sig') as f:
+            config = json.load(f)
+    if args.werk is not None:
+        config['partition_werk'] = args.werk
+    if args.lagerort is not None:
+        config['partition_lagerort'] = args.lagerort
+    
+    engine = InventurEngine(args.daten, config, logger)
+    try:
+        if not engine.arbeitstabelle_laden():
+            logger.warning(f"Arbeitstabelle nicht gefunden: {engine.arbeitstabelle_path}")
+        engine.inventur_laden()
+        
+        if args.befehl == 'info':
+            total_rollen, total_granulat = engine.anzahl()
+            if engine.stamm_rollen is not None:
+                print(f"Arbeitstabelle: {len(engine.stamm_rollen)} Rollen, {len(engine.stamm_granulate)} Granulate"
+                      f" ({engine.partition})")
+            print(f"Inventur: {total_rollen} Rollen, {total_granulat} Granulate "
+                  f"({'Datenbank' if engine.store is not None else 'Excel'}-Speicher)")
+            print(f"Nicht in Excel übernommen: {'ja' if engine.persistenz_offen() else 'nein'}")
+            werte = engine.statistik.auswertung()
+            for typ, text in (('ROLLE', 'Rollen'), ('GRANULAT', 'Granulate')):
+                if werte[typ]['abdeckung'] is not None:
+                    print(f"Erfasst {text}: {werte[typ]['gefunden']} von {werte[typ]['soll']} "
+                          f"({werte[typ]['abdeckung']:.1f} %), offen {werte[typ]['offen']}")
+            for meldung in engine.ladeprobleme:
+                print(f"Problem: {meldung}")
+        
+        elif args.befehl == 'suchen':
+            for charge in args.chargen:
+                charge = engine.dekodierer.dekodieren(charge)['charge']
+                typ, item = engine.suche_charge(charge)
+                gescannt = " (bereits gescannt)" if engine.is_already_scanned(charge) else ""
+                if item is None:
+                    print(f"{charge}\t{typ}{gescannt}")
+                    for vorschlag_typ, vorschlag, art, abstand in engine.vorschlaege(charge):
+                        print(f"  ? {vorschlag['Charge']}\t{vorschlag_typ}\t{vorschlag.get('Materialkurztext', '')}"
+                              f"\t({vorschlag_text(art, abstand)})")
+                else:
+                    fremd = engine.fremde_partition(item)
+                    print(f"{charge}\t{typ}\t{item.get('Material', '')}\t{item.get('Materialkurztext', '')}{gescannt}"
+                          + (f"\t({fremd})" if fremd else ""))
+        
+        elif args.befehl == 'erfassen':
+            eintrag = engine.scan_erfassen(args.charge, args.fach, args.breite, args.zahlmenge, args.bemerkung)
+            engine.speichern()
+            print(f"{eintrag.typ} gespeichert: {eintrag.charge}")
+        
+        elif args.befehl == 'loeschen':
+            entfernte = engine.loeschen(args.charge)
+            if not entfernte:
+                print(f"Charge {args.charge} ist nicht in der Inventur")
+                return 1
+            engine.speichern()
+            print(f"Eintrag gelöscht: {args.charge}")
+        
+        elif args.befehl == 'import':
+            df = engine.batch_lesen(args.datei)
+            fertige, offene = engine.batch_eintraege_erstellen(df)
+            if fertige:
+                engine.eintraege_uebernehmen(fertige)
+                engine.speichern()
+            print(batch_zusammenfassung(df, fertige, offene))
+            for eintrag in offene:
+                print(f"Offen: {eintrag['charge']}\t{eintrag['typ'] or '-'}\t{eintrag['fehlt']}")
+        
+        elif args.befehl in ('rueckgaengig', 'wiederholen'):
+            ergebnis = engine.rueckgaengig() if args.befehl == 'rueckgaengig' else engine.wiederholen()
+            if ergebnis is None:
+                print("Nichts zum Rückgängigmachen" if args.befehl == 'rueckgaengig' else "Nichts zum Wiederholen")
+                return 1
+            aktion, eintraege, hinzugefuegt, entfernte, uebersprungen = ergebnis
+            engine.speichern()
+            print(f"{aktion}: {len(hinzugefuegt)} hinzugefügt, {len(entfernte)} entfernt"
+                  + (f", {len(uebersprungen)} übersprungen" if uebersprungen else ""))
+            for eintrag in hinzugefuegt + entfernte:
+                print(f"{eintrag.typ}\t{eintrag.charge}")
+            for eintrag in uebersprungen:
+                print(f"{eintrag.typ}\t{eintrag.charge}\tübersprungen (bereits erfasst bzw. entfernt)")
+        
+        elif args.befehl == 'export':
+            if (engine.persistenz_offen() or not engine.inventur_rollen_path.exists()
+                    or not engine.inventur_granulat_path.exists()):
+                engine.speichern()
+            for pfad in engine.backup_erstellen().values():
+                print(pfad)
+        
+        elif args.befehl == 'abgleich':
+            pfad, berichte = engine.abgleich_erstellen(pfad=args.ausgabe)
+            print(abgleich_zusammenfassung(berichte))
+            print(pfad)
+        
+        return 0
+    
+    except (ArbeitstabelleFehler, EingabeFehler) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.schliessen()
+
+
+if __name__ == "__main__":
+    # Über den Modulnamen starten: der Arbeitstabellen-Cache (Pickle) enthält dann dieselben
+    # Klassenpfade (inventur_engine.*) wie beim Start über die Oberfläche
+    import inventur_engine
+    sys.exit(inventur_engine.main())
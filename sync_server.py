@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SYNC-SERVER FÜR MEHRERE INVENTUR-STATIONEN
+==========================================
+
+Kleiner zentraler Dienst (nur Standardbibliothek), der die Scans aller
+Scanner-PCs sammelt und jeder Station die Chargen der anderen Stationen liefert.
+
+Endpunkte (JSON über HTTP):
+  POST /scans                          {"station": "PC1", "scans": [{"id", "aktion", "charge", "typ", "status"}, ...]}
+  GET  /aenderungen?seit=N&station=PC1 Änderungen der anderen Stationen seit Stand N
+  GET  /status                         Anzahl Ereignisse und Stationen
+
+Aufruf: python sync_server.py [--host 0.0.0.0] [--port 8765] [--datei data/Sync_Zentrale.jsonl]
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+
+class SyncZentrale:
+    """Ereignisliste aller Stationen (laufende Nummer = Stand), optional in JSON Lines gesichert"""
+
+    def __init__(self, pfad=None):
+        self.pfad = Path(pfad) if pfad else None
+        self.ereignisse = []
+        self.ids = set()  # bereits angenommene Scan-IDs (erneutes Senden nach Verbindungsabbruch)
+        self.lock = threading.Lock()
+        self.datei = None
+        if self.pfad is not None:
+            self.laden()
+            self.datei = open(self.pfad, 'a', encoding='utf-8')
+
+    def laden(self):
+        """Liest gesicherte Ereignisse nach einem Neustart ein"""
+        if not self.pfad.exists():
+            return
+        with open(self.pfad, 'r', encoding='utf-8') as f:
+            for zeile in f:
+                try:
+                    ereignis = json.loads(zeile)
+                except ValueError:
+                    break  # beim Absturz abgeschnittene letzte Zeile
+                self.ereignisse.append(ereignis)
+                self.ids.add(ereignis['id'])
+
+    def annehmen(self, station, scans):
+        """Übernimmt neue Scans einer Station; bekannte IDs werden übersprungen"""
+        angenommen = 0
+        with self.lock:
+            for scan in scans:
+                if scan['id'] in self.ids:
+                    continue
+                ereignis = {
+                    'nr': len(self.ereignisse) + 1,
+                    'id': scan['id'],
+                    'station': station,
+                    'aktion': scan['aktion'],
+                    'charge': scan['charge'],
+                    'typ': scan.get('typ'),
+                    'status': scan.get('status'),
+                    'empfangen': datetime.now().strftime('%d.%m.%Y %H:%M:%S')
+                }
+                self.ereignisse.append(ereignis)
+                self.ids.add(scan['id'])
+                if self.datei is not None:
+                    self.datei.write(json.dumps(ereignis, ensure_ascii=False) + '\n')
+                angenommen += 1
+            if self.datei is not None and angenommen:
+                self.datei.flush()
+                os.fsync(self.datei.fileno())
+            return angenommen, len(self.ereignisse)
+
+    def aenderungen(self, seit, station):
+        """Ereignisse der anderen Stationen nach Stand 'seit'"""
+        with self.lock:
+            neue = [e for e in self.ereignisse[seit:] if e['station'] != station]
+            return len(self.ereignisse), neue
+
+    def status(self):
+        """Kurzübersicht für /status"""
+        with self.lock:
+            return {'ereignisse': len(self.ereignisse),
+                    'stationen': sorted({e['station'] for e in self.ereignisse})}
+
+
+class SyncHandler(BaseHTTPRequestHandler):
+    """HTTP-Schnittstelle zur SyncZentrale"""
+
+    zentrale = None
+
+    def antworten(self, code, daten):
+        inhalt = json.dumps(daten, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(inhalt)))
+        self.end_headers()
+        self.wfile.write(inhalt)
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/scans':
+            self.antworten(404, {'fehler': 'unbekannter Pfad'})
+            return
+        try:
+            laenge = int(self.headers.get('Content-Length', 0))
+            anfrage = json.loads(self.rfile.read(laenge).decode('utf-8'))
+            angenommen, stand = self.zentrale.annehmen(str(anfrage['station']), anfrage['scans'])
+        except (ValueError, KeyError, TypeError) as e:
+            self.antworten(400, {'fehler': str(e)})
+            return
+        self.antworten(200, {'angenommen': angenommen, 'stand': stand})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/aenderungen':
+            parameter = parse_qs(url.query)
+            try:
+                seit = int(parameter.get('seit', ['0'])[0])
+            except ValueError:
+                self.antworten(400, {'fehler': 'seit muss eine Zahl sein'})
+                return
+            station = parameter.get('station', [''])[0]
+            stand, aenderungen = self.zentrale.aenderungen(seit, station)
+            self.antworten(200, {'stand': stand, 'aenderungen': aenderungen})
+        elif url.path == '/status':
+            self.antworten(200, self.zentrale.status())
+        else:
+            self.antworten(404, {'fehler': 'unbekannter Pfad'})
+
+    def log_message(self, format, *args):
+        logging.info("%s - %s", self.address_string(), format % args)
+
+
+def server_erstellen(host, port, pfad=None):
+    """Erstellt den HTTP-Server (auch für Tests im selben Prozess nutzbar)"""
+    handler = type('Handler', (SyncHandler,), {'zentrale': SyncZentrale(pfad)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zentraler Sync-Server für mehrere Inventur-Stationen")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--datei', default=None, help='Ereignisse in dieser JSONL-Datei sichern')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = server_erstellen(args.host, args.port, args.datei)
+    logging.info(f"Sync-Server läuft auf {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Tests der Duplikatprüfung der InventurEngine (ohne Oberfläche): gescannte_chargen muss nach
+jeder Änderung genau den Datenlisten entsprechen.
+
+Aufruf: python -m pytest -q
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import EintragListe, InventurEintrag, InventurEngine, charge_schluessel  # noqa: E402
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Engine mit leerem Datenordner"""
+    engine = InventurEngine(tmp_path, {})
+    yield engine
+    engine.schliessen()
+
+
+def eintrag(charge, typ='ROLLE', status='gefunden'):
+    return InventurEintrag.aus_dict({'charge': charge, 'typ': typ, 'status': status})
+
+
+def pruefen(engine):
+    """gescannte_chargen stimmt mit einem Neuaufbau aus allen Datenlisten überein"""
+    erwartet = {}
+    for item_list in (engine.inventur_rollen_data, engine.inventur_granulat_data,
+                      engine.nicht_gefunden_rollen_data, engine.nicht_gefunden_granulat_data):
+        for item in item_list:
+            erwartet.setdefault(charge_schluessel(item.charge), []).append(item)
+    assert ({schluessel: sorted(map(id, items)) for schluessel, items in engine.gescannte_chargen.items()}
+            == {schluessel: sorted(map(id, items)) for schluessel, items in erwartet.items()})
+
+
+def test_hinzufuegen_entfernen(engine):
+    engine.eintrag_hinzufuegen(eintrag('4300000001'))
+    engine.eintrag_hinzufuegen(eintrag('0610000001', typ='GRANULAT'))
+    engine.eintrag_hinzufuegen(eintrag('4300000002', status='nicht_gefunden'))
+    pruefen(engine)
+    assert engine.is_already_scanned('4300000001')
+    assert engine.is_already_scanned(' 4300000002 ')
+
+    # Ohne führende Null gescannt: gleiche Charge, Duplikat
+    assert engine.is_already_scanned('610000001')
+
+    engine.eintrag_entfernen('4300000001')
+    pruefen(engine)
+    assert not engine.is_already_scanned('4300000001')
+
+    # Typ/Status passen nicht: nichts entfernt
+    engine.eintrag_entfernen('0610000001', typ='ROLLE')
+    engine.eintrag_entfernen('0610000001', typ='GRANULAT', status='nicht_gefunden')
+    pruefen(engine)
+    assert engine.is_already_scanned('0610000001')
+
+    engine.eintrag_entfernen('0610000001', typ='GRANULAT', status='gefunden')
+    engine.eintrag_entfernen('4300000002', typ='ROLLE', status='nicht_gefunden')
+    pruefen(engine)
+    assert engine.gescannte_chargen == {}
+
+
+def test_mehrfach_erfasst(engine):
+    # Dieselbe Charge in zwei Listen: erst nach dem letzten Entfernen kein Duplikat mehr
+    engine.eintrag_hinzufuegen(eintrag('4300000001'))
+    engine.eintrag_hinzufuegen(eintrag('4300000001', status='nicht_gefunden'))
+    pruefen(engine)
+    engine.eintrag_entfernen('4300000001', status='gefunden')
+    pruefen(engine)
+    assert engine.is_already_scanned('4300000001')
+    engine.eintrag_entfernen('4300000001')
+    pruefen(engine)
+    assert not engine.is_already_scanned('4300000001')
+
+
+def test_neu_aufbauen(engine):
+    # Nach dem Laden aus den Dateien: Neuaufbau entspricht der laufenden Zählung
+    engine.inventur_rollen_data = EintragListe([eintrag('4300000001'), eintrag('4300000003')])
+    engine.nicht_gefunden_granulat_data = EintragListe([eintrag('0610000002', typ='GRANULAT', status='nicht_gefunden')])
+    engine.gescannte_chargen_aufbauen()
+    pruefen(engine)
+    assert engine.is_already_scanned('610000002')
+    assert not engine.is_already_scanned('4300000002')
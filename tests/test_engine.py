@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+Tests der InventurEngine (ohne Oberfläche): gescannte_chargen muss nach jeder Änderung
+genau den Datenlisten entsprechen – auch nach Neustart und Journal-Wiederherstellung.
+
+Aufruf: python -m pytest -q
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from inventur_engine import (GranulatEintrag, InventurEngine, RollenEintrag, charge_schluessel,  # noqa: E402
+                             chargen_normalisieren, module_laden)
+
+ROLLEN = ['4300000001', '4300000002', '4300000003']
+FREMDE_ROLLE = '4300000101'  # Lagerort 0102
+GRANULATE = ['0610000001', '0610000002']
+
+
+@pytest.fixture(scope='module', autouse=True)
+def module():
+    module_laden()
+
+
+@pytest.fixture
+def daten(tmp_path):
+    """Datenordner mit einer kleinen Arbeitstabelle (Rollen und Granulate)"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Rollen'
+    ws.append(['Werk', 'Lagerort', 'Material', 'Materialkurztext', 'Charge', 'Länge m',
+               'Breite mm', 'Frei verwendbar', 'Rollenstatus', 'Fach'])
+    for i, charge in enumerate(ROLLEN):
+        ws.append(['1701', '0101', 17000000 + i, f'Band Typ {i}', charge, 100.0, 1000, 150.5, 'frei', 'A01'])
+    ws.append(['1701', '0102', 17000099, 'Band Typ 99', FREMDE_ROLLE, 100.0, 1000, 150.5, 'frei', 'B01'])
+    ws = wb.create_sheet('Granulate')
+    ws.append(['Werk', 'LOrt', 'Materialnummer', 'Materialkurztext', 'Charge', 'Frei verwendbar', 'BME'])
+    for i, charge in enumerate(GRANULATE):
+        ws.append(['1701', '0101', 20000000 + i, f'Granulat {i}', charge, 25.0, 'KG'])
+    wb.save(tmp_path / 'Arbeitstabelle.xlsx')
+    return tmp_path
+
+
+def starten(verzeichnis, config=None):
+    """Engine wie beim Programmstart: Arbeitstabelle und bestehende Inventur laden"""
+    engine = InventurEngine(verzeichnis, config or {})
+    assert engine.arbeitstabelle_laden()
+    engine.inventur_laden()
+    return engine
+
+
+def pruefen(engine):
+    """gescannte_chargen stimmt mit einem Neuaufbau aus allen Datenlisten überein"""
+    erwartet = {}
+    for eintrag in engine.alle_eintraege():
+        erwartet.setdefault(charge_schluessel(eintrag.charge), []).append(eintrag)
+    assert ({schluessel: sorted(map(id, eintraege)) for schluessel, eintraege in engine.gescannte_chargen.items()}
+            == {schluessel: sorted(map(id, eintraege)) for schluessel, eintraege in erwartet.items()})
+    for eintraege in engine.gescannte_chargen.values():
+        for eintrag in eintraege:
+            assert engine.is_already_scanned(eintrag.charge)
+
+
+def chargen(engine):
+    return sorted(eintrag.charge for eintrag in engine.alle_eintraege())
+
+
+def journal(engine):
+    """Journal als [(Aktion, Charge)]"""
+    return [(aktion, daten['charge']) for aktion, daten in engine.journal.lesen()]
+
+
+def rolle(charge, zeitstempel):
+    return RollenEintrag(charge=charge, status='gefunden', zeitstempel=zeitstempel, fach_kontrolliert='A01',
+                         breite_kontrolliert=1000)
+
+
+def test_erfassen_loeschen(daten):
+    engine = starten(daten)
+    engine.scan_erfassen(ROLLEN[0], fach='A01', breite='1000')
+    engine.scan_erfassen(GRANULATE[0], zahlmenge='25')
+    pruefen(engine)
+    assert engine.anzahl() == (1, 1)
+
+    # Ohne führende Null gescannt: gleiche Charge, Duplikat
+    assert engine.is_already_scanned(GRANULATE[0].lstrip('0'))
+
+    assert len(engine.loeschen(ROLLEN[0])) == 1
+    pruefen(engine)
+    assert engine.anzahl() == (0, 1)
+    assert not engine.is_already_scanned(ROLLEN[0])
+    assert engine.loeschen(ROLLEN[0]) == []
+    engine.schliessen()
+
+
+def test_loeschen_je_eintrag(daten):
+    # Dieselbe Charge gefunden und als nicht gefunden erfasst: Löschen schreibt beide mit Typ/Status
+    engine = starten(daten)
+    engine.eintraege_uebernehmen([RollenEintrag(charge='4300000009', status='gefunden'),
+                                  GranulatEintrag(charge='4300000009', status='nicht_gefunden')])
+    assert len(engine.loeschen('4300000009')) == 2
+    pruefen(engine)
+    loeschungen = [eintrag for aktion, eintrag in engine.journal.lesen() if aktion == 'delete']
+    assert sorted((eintrag['typ'], eintrag['status']) for eintrag in loeschungen) == [
+        ('GRANULAT', 'nicht_gefunden'), ('ROLLE', 'gefunden')]
+    engine.schliessen()
+
+
+def test_rueckgaengig_wiederholen(daten):
+    engine = starten(daten)
+    engine.scan_erfassen(ROLLEN[0], fach='A01', breite='1000')
+    engine.scan_erfassen(ROLLEN[1], fach='A02', breite='1100')
+    engine.loeschen(ROLLEN[0])
+
+    assert engine.rueckgaengig()[0] == 'delete'
+    pruefen(engine)
+    assert chargen(engine) == [ROLLEN[0], ROLLEN[1]]
+
+    assert engine.rueckgaengig()[0] == 'add'
+    pruefen(engine)
+    assert chargen(engine) == [ROLLEN[0]]
+
+    assert engine.wiederholen()[0] == 'add'
+    pruefen(engine)
+    assert chargen(engine) == [ROLLEN[0], ROLLEN[1]]
+
+    assert engine.wiederholen()[0] == 'delete'
+    pruefen(engine)
+    assert chargen(engine) == [ROLLEN[1]]
+    assert engine.wiederholen() is None
+    engine.schliessen()
+
+
+def test_neustart(daten):
+    engine = starten(daten)
+    engine.scan_erfassen(ROLLEN[0], fach='A01', breite='1000')
+    engine.scan_erfassen(GRANULATE[1], zahlmenge='24,5')
+    engine.speichern()
+    engine.scan_erfassen(ROLLEN[2], fach='A03', breite='1000')
+    engine.schliessen()
+
+    # Zwei Einträge aus Excel, einer aus dem Journal
+    engine = starten(daten)
+    pruefen(engine)
+    assert chargen(engine) == sorted([ROLLEN[0], ROLLEN[2], GRANULATE[1]])
+
+    # Undo über den Neustart hinweg
+    assert engine.rueckgaengig()[0] == 'add'
+    pruefen(engine)
+    assert chargen(engine) == sorted([ROLLEN[0], GRANULATE[1]])
+    engine.schliessen()
+
+
+def test_verlauf_gehoert_zur_inventur(daten):
+    engine = starten(daten)
+    engine.scan_erfassen(ROLLEN[0], fach='A01', breite='1000')
+    engine.speichern()
+    engine.schliessen()
+
+    # Inventur-Dateien und Journal gelöscht: neue Inventur, der alte Verlauf gilt nicht mehr
+    for pfad in (engine.inventur_rollen_path, engine.inventur_granulat_path, engine.journal_path):
+        pfad.unlink(missing_ok=True)
+    engine = starten(daten)
+    assert engine.verlauf.anzahl() == (0, 0)
+    assert engine.rueckgaengig() is None
+    assert engine.wiederholen() is None
+    assert engine.anzahl() == (0, 0)
+    engine.schliessen()
+
+
+def test_rueckgaengig_loeschen_fremd_gescannt(daten):
+    # Nach dem Löschen hat eine andere Station die Charge gescannt: Undo legt sie nicht doppelt an
+    engine = starten(daten)
+    engine.scan_erfassen(ROLLEN[0], fach='A01', breite='1000')
+    engine.loeschen(ROLLEN[0])
+    engine.fremde_aenderung_anwenden({'charge': ROLLEN[0], 'station': 'B', 'aktion': 'add'})
+    aktion, eintraege, hinzugefuegt, entfernte, uebersprungen = engine.rueckgaengig()
+    assert aktion == 'delete' and hinzugefuegt == [] and entfernte == []
+    assert [eintrag.charge for eintrag in uebersprungen] == [ROLLEN[0]]
+    assert journal(engine)[-1] == ('delete', ROLLEN[0])  # Undo hat nichts geschrieben
+    assert engine.anzahl() == (0, 0)
+    pruefen(engine)
+    engine.schliessen()
+
+
+@pytest.mark.parametrize('config', [{}, {'speicher_backend': 'sqlite'}])
+def test_rueckgaengig_loeschen_reihenfolge(daten, config):
+    # Ein älterer Eintrag kommt nach Löschen + Rückgängig an seine Stelle zurück, nicht ans Ende
+    engine = starten(daten, config)
+    engine.eintraege_uebernehmen([rolle(ROLLEN[0], '30.09.2026 16:00:00'), rolle(ROLLEN[1], '01.10.2026 08:00:00'),
+                                  rolle(ROLLEN[2], '01.10.2026 09:00:00')])
+    engine.loeschen(ROLLEN[0])
+    assert engine.rueckgaengig()[0] == 'delete'
+    pruefen(engine)
+    reihenfolge = [eintrag.charge for eintrag in engine.inventur_rollen_data]
+    assert reihenfolge == ROLLEN
+    engine.speichern()
+    engine.schliessen()
+
+    # Export und frisch geladene Inventur in derselben Reihenfolge
+    assert pd.read_excel(engine.inventur_rollen_path, sheet_name='Inventur', dtype=str)['Charge'].tolist() == ROLLEN
+    engine = starten(daten, config)
+    assert [eintrag.charge for eintrag in engine.inventur_rollen_data] == reihenfolge
+    engine.schliessen()
+
+
+def test_wiederholen_nach_rueckgaengig_journal(daten):
+    engine = starten(daten)
+    engine.scan_erfassen(ROLLEN[0], fach='A01', breite='1000')
+    engine.scan_erfassen(ROLLEN[1], fach='A02', breite='1000')
+    engine.loeschen(ROLLEN[0])
+    assert journal(engine) == [('add', ROLLEN[0]), ('add', ROLLEN[1]), ('delete', ROLLEN[0])]
+
+    engine.rueckgaengig()
+    pruefen(engine)
+    assert journal(engine)[3:] == [('add', ROLLEN[0])]
+
+    engine.wiederholen()
+    pruefen(engine)
+    assert journal(engine)[4:] == [('delete', ROLLEN[0])]
+    assert chargen(engine) == [ROLLEN[1]]
+
+    # Wiederholtes Löschen kommt nach einem Neustart aus dem Journal genauso heraus
+    engine.journal.schliessen()
+    engine = starten(daten)
+    pruefen(engine)
+    assert chargen(engine) == [ROLLEN[1]]
+    engine.schliessen()
+
+
+def test_schritt_teilweise_geaendert(daten):
+    engine = starten(daten)
+    engine.eintraege_uebernehmen([rolle(ROLLEN[0], '01.10.2026 08:00:00'), rolle(ROLLEN[1], '01.10.2026 08:00:00')])
+    engine.speichern()
+    # ROLLEN[1] außerhalb des Programms aus der Inventur entfernt (nicht im Verlauf)
+    engine.eintrag_entfernen(ROLLEN[1])
+    engine.speichern()
+    engine.schliessen()
+
+    engine = starten(daten)
+    aktion, eintraege, hinzugefuegt, entfernte, uebersprungen = engine.rueckgaengig()
+    assert aktion == 'import' and len(eintraege) == 2
+    assert [eintrag.charge for eintrag in entfernte] == [ROLLEN[0]]
+    assert [eintrag.charge for eintrag in uebersprungen] == [ROLLEN[1]]
+    assert journal(engine) == [('delete', ROLLEN[0])]  # keine Löschung für den fehlenden Eintrag
+    pruefen(engine)
+
+    # Inzwischen an einer anderen Station gescannt: Wiederholen legt nur ROLLEN[0] wieder an
+    engine.fremde_aenderung_anwenden({'charge': ROLLEN[1], 'station': 'B', 'aktion': 'add'})
+    aktion, eintraege, hinzugefuegt, entfernte, uebersprungen = engine.wiederholen()
+    assert [eintrag.charge for eintrag in hinzugefuegt] == [ROLLEN[0]]
+    assert [eintrag.charge for eintrag in uebersprungen] == [ROLLEN[1]]
+    assert journal(engine) == [('delete', ROLLEN[0]), ('add', ROLLEN[0])]
+    assert chargen(engine) == [ROLLEN[0]]
+    pruefen(engine)
+    engine.schliessen()
+
+
+def test_journal_wiederherstellen(daten):
+    # Absturz ohne Excel-Speicherung: alles steht nur im Journal, inkl. einer Löschung
+    engine = starten(daten)
+    engine.scan_erfassen(ROLLEN[0], fach='A01', breite='1000')
+    engine.scan_erfassen(ROLLEN[1], fach='A02', breite='1000')
+    engine.scan_erfassen(GRANULATE[0], zahlmenge='25')
+    engine.loeschen(ROLLEN[1])
+    engine.journal.schliessen()
+
+    engine = InventurEngine(daten, {})
+    engine.arbeitstabelle_laden()
+    assert engine.inventur_laden() == (4, 4)
+    pruefen(engine)
+    assert chargen(engine) == sorted([ROLLEN[0], GRANULATE[0]])
+
+    # Journal noch einmal eingespielt (Absturz zwischen Speichern und Kürzen): keine Doppelten
+    engine.journal_wiederherstellen()
+    pruefen(engine)
+    assert chargen(engine) == sorted([ROLLEN[0], GRANULATE[0]])
+    engine.schliessen()
+
+
+def test_datenbank(daten):
+    config = {'speicher_backend': 'sqlite'}
+    engine = starten(daten, config)
+    engine.scan_erfassen(ROLLEN[0], fach='A01', breite='1000')
+    engine.scan_erfassen(GRANULATE[0], zahlmenge='25')
+    engine.loeschen(GRANULATE[0])
+    engine.rueckgaengig()
+    pruefen(engine)
+    engine.schliessen()
+
+    engine = starten(daten, config)
+    pruefen(engine)
+    assert chargen(engine) == sorted([ROLLEN[0], GRANULATE[0]])
+    engine.schliessen()
+
+
+def test_chargen_normalisieren():
+    chargen = ['4300000001', ' 0610000001 ', '000', '0', '0A12', 'ABC', '', ' 0012 ', 61]
+    erwartet = [charge_schluessel(charge) for charge in chargen]
+    assert chargen_normalisieren(pd.Series(chargen, dtype=object)).tolist() == erwartet
+
+
+def test_zweit_index_vorladen(daten):
+    # Wie in der Oberfläche: Zweit-Index nie synchron, bis zum Vorladen gilt die fremde Charge als nicht gefunden
+    engine = InventurEngine(daten, {'partition_lagerort': '0101'})
+    engine.fremde_synchron = False
+    assert engine.arbeitstabelle_laden()
+    assert engine.suche_charge(FREMDE_ROLLE) == ('NICHT_GEFUNDEN', None)
+    assert engine.fremde_laedt()
+
+    # Vorgeladener Stand einer inzwischen ersetzten Arbeitstabelle wird verworfen
+    veraltet = engine.fremde_stammdaten_vorladen()
+    engine.fremde_verwerfen()
+    assert not engine.fremde_stammdaten_uebernehmen(veraltet)
+    assert engine.fremde_laedt()
+
+    assert engine.fremde_stammdaten_uebernehmen(engine.fremde_stammdaten_vorladen())
+    assert not engine.fremde_laedt()
+    typ, item = engine.suche_charge(FREMDE_ROLLE)
+    assert typ == 'ROLLE' and engine.fremde_partition(item) == "Werk 1701 / Lagerort 0102"
+    engine.schliessen()
+
+    # Aus Excel neu aufgebaut: danach liegt der Zweit-Index im Cache
+    for pfad in daten.glob('*.rest*'):
+        pfad.unlink()
+    engine = InventurEngine(daten, {'partition_lagerort': '0101'})
+    engine.arbeitstabelle_laden()
+    assert engine.fremde_stammdaten_laden() is not None
+    assert list(daten.glob('*.rest*'))
+    engine.schliessen()